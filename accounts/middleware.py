@@ -0,0 +1,34 @@
+import asyncio
+
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject
+
+from .profiles import get_account
+
+
+@sync_and_async_middleware
+def AccountMiddleware(get_response):
+    """Sets request.account lazily. Install it after AuthenticationMiddleware.
+
+    The account is an Account with role, is_lawyer and is_client set, or an
+    AnonymousAccount; see accounts/profiles.py. Requests that never look at
+    it cost nothing. It is lazy under ASGI too: the views are sync, so they
+    read it in their own thread, not on the event loop.
+    """
+
+    def attach(request):
+        request.account = SimpleLazyObject(lambda: get_account(request.user))
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            attach(request)
+            return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            attach(request)
+            return get_response(request)
+
+    return middleware
@@ -6,6 +6,8 @@ from django.db import models
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+from the_acce.validation import columns
+
 
 class Account(models.Model):
     """Model extending built-in abstract class of User model."""
@@ -15,7 +17,8 @@ class Account(models.Model):
         LAWYER = 1, _("As a legal service")
         CLIENT = 2, _("As a client")
 
-    key = models.UUIDField(default=uuid.uuid4, editable=False)
+    # Random, not time-ordered: it names the account in public URLs.
+    key = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     user = models.OneToOneField(
         User,
         on_delete=models.CASCADE,
@@ -37,17 +40,42 @@ class Account(models.Model):
         null=True,
     )
 
+    # Messages of the errors clean() raises, by code.
+    CLEAN_ERRORS = {
+        "contact_details_missing": (
+            "You need to have a way to be contacted in order to use this site!"
+        ),
+    }
+
     def get_absolute_url(self):
         """Returns the url to access a particular instance of the model."""
-        return reverse("view", args=[str(self.key)])
+        return reverse("Account profile", args=[self.key])
 
     def clean(self):
         """Validates various fields of this model."""
         if not (self.email and self.phone and self.website and self.address):
             # Don't allow already due matters.
-            raise ValidationError(
-                "You need to have a way to be contacted in order to use this site!"
+            code = "contact_details_missing"
+            raise ValidationError(self.CLEAN_ERRORS[code], code=code)
+
+    @classmethod
+    def validate_batch(cls, data):
+        """Applies the rules of clean() to columns of values.
+
+        data is anything the_acce.validation.columns() takes. Returns, for
+        each row, the code of the error clean() would raise, or None. The
+        address column holds ids, and an id counts as an address.
+        """
+        return [
+            (
+                None
+                if email and phone and website and address is not None
+                else "contact_details_missing"
+            )
+            for email, phone, website, address in zip(
+                *columns(data, ["email", "phone", "website", "address"])
             )
+        ]
 
 
 class Location(models.Model):
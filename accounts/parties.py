@@ -0,0 +1,78 @@
+"""Lawyers and clients, and their work across the matters and negotiations apps.
+
+Matters and negotiations both refer to the Lawyer and Client rows of this
+app, so everything one party is involved in hangs off a single row. The
+functions below fetch a party's matters and negotiations together in a
+fixed number of queries, however many parties or rows there are.
+"""
+
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Prefetch
+
+from matters.models import Matter
+from negotiations.models import Negotiation
+
+from .models import Account, Client, Lawyer
+
+USER_TYPES = {Lawyer: Account.UserTypes.LAWYER, Client: Account.UserTypes.CLIENT}
+
+
+def create_party(model, username=None, **account_fields):
+    """Creates a user with an account and a Lawyer or Client row for it.
+
+    Returns the Lawyer or Client. Without a username, a unique one is made up.
+    """
+    if username is None:
+        username = f"{model.__name__.lower()}-{uuid.uuid4().hex[:12]}"
+    with transaction.atomic():
+        user = User.objects.create_user(username)
+        account = Account.objects.create(
+            user=user, user_type=USER_TYPES[model], **account_fields
+        )
+        return model.objects.create(account=account)
+
+
+def create_lawyer(username=None, **account_fields):
+    return create_party(Lawyer, username, **account_fields)
+
+
+def create_client(username=None, **account_fields):
+    return create_party(Client, username, **account_fields)
+
+
+def with_work(parties, matters=None, negotiations=None):
+    """Returns a Lawyer or Client queryset with each party's work prefetched.
+
+    Every party's .matters.all() and .negotiations.all() are filled from one
+    query each, with the other party of each row joined in, so evaluating it
+    costs three queries in all. Pass matters or negotiations querysets to
+    filter or order what is fetched.
+    """
+    other = "client_key" if parties.model is Lawyer else "lawyer_key"
+    if matters is None:
+        matters = Matter.objects.all()
+    if negotiations is None:
+        negotiations = Negotiation.objects.all()
+    return parties.select_related("account__user").prefetch_related(
+        Prefetch("matters", queryset=matters.select_related(other)),
+        Prefetch("negotiations", queryset=negotiations.select_related(other)),
+    )
+
+
+def lawyer_work(lawyer_id, matters=None, negotiations=None):
+    """Returns the lawyer with their matters and negotiations, in three queries.
+
+    Raises Lawyer.DoesNotExist for an unknown id.
+    """
+    return with_work(Lawyer.objects.filter(pk=lawyer_id), matters, negotiations).get()
+
+
+def client_work(client_id, matters=None, negotiations=None):
+    """Returns the client with their matters and negotiations, in three queries.
+
+    Raises Client.DoesNotExist for an unknown id.
+    """
+    return with_work(Client.objects.filter(pk=client_id), matters, negotiations).get()
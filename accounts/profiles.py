@@ -0,0 +1,210 @@
+"""Cached resolution of the signed-in user's Account and role.
+
+AccountMiddleware (accounts/middleware.py) sets request.account to a lazy
+object, so requests that never look at it cost nothing. The first access
+loads the account and its
+Lawyer or Client row in one joined query and caches the result for
+ACCOUNT_CACHE_TIMEOUT seconds; later requests by the same user read the
+cache. Signals in accounts/signals.py drop the entry whenever the account,
+or the row that decides its role, changes.
+
+Public profile pages find accounts by their key instead, through a bounded
+in-process LRU in front of a shared cache of key to user id. Keys never
+change, so an LRU entry can only go stale by its account being deleted,
+which shows up as a missing account. Each cached account carries the time
+it was loaded, and its values give an ETag, so a conditional request for an
+unchanged profile is answered from the caches alone.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from the_acce.routers import from_primary
+
+from .models import Account
+
+ACCOUNT_FIELDS = [field.attname for field in Account._meta.concrete_fields]
+
+# Stored for users without an account, so they are not looked up every time.
+NO_ACCOUNT = "none"
+
+
+class AnonymousAccount:
+    """Stands in for the account of anonymous users and users without one."""
+
+    pk = user_id = None
+    role = None
+    is_lawyer = is_client = False
+
+    def __bool__(self):
+        return False
+
+    def __str__(self):
+        return "AnonymousAccount"
+
+
+class LRU:
+    """A thread-safe mapping that keeps only its most recently used items."""
+
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+# User ids by account key, for this process.
+key_ids = LRU(settings.ACCOUNT_KEY_LRU_SIZE)
+
+
+def get_cache():
+    return caches[settings.ACCOUNT_CACHE_ALIAS]
+
+
+def cache_key(user_id):
+    return f"accounts:account:{user_id}"
+
+
+def key_cache_key(key):
+    return f"accounts:key:{key}"
+
+
+def load_account(user_id):
+    """Returns the user's Account with its role set, or None, in one query.
+
+    Reads the primary, as the result is cached until the account changes.
+    """
+    with from_primary():
+        account = (
+            Account.objects.select_related("lawyer", "client")
+            .filter(user_id=user_id)
+            .first()
+        )
+    if account is not None:
+        # Missing reverse one-to-one rows are cached by select_related too.
+        set_role(account, hasattr(account, "lawyer"), hasattr(account, "client"))
+    return account
+
+
+def set_role(account, is_lawyer, is_client):
+    account.is_lawyer = is_lawyer
+    account.is_client = is_client
+    account.role = "lawyer" if is_lawyer else "client" if is_client else None
+
+
+def cached_entry(user_id):
+    """Returns the cached (values, is_lawyer, is_client, loaded_at) of an account.
+
+    Loads and caches it on a miss. Returns NO_ACCOUNT if the user has none.
+    """
+    cache = get_cache()
+    cached = cache.get(cache_key(user_id))
+    if cached is None:
+        account = load_account(user_id)
+        if account is None:
+            cached = NO_ACCOUNT
+        else:
+            values = [getattr(account, name) for name in ACCOUNT_FIELDS]
+            cached = (values, account.is_lawyer, account.is_client, time.time())
+        cache.set(cache_key(user_id), cached, settings.ACCOUNT_CACHE_TIMEOUT)
+    return cached
+
+
+def from_entry(entry):
+    """Returns the Account, with its role, that a cached entry describes."""
+    values, is_lawyer, is_client, _ = entry
+    account = Account.from_db(Account.objects.db, ACCOUNT_FIELDS, values)
+    set_role(account, is_lawyer, is_client)
+    return account
+
+
+def get_account(user):
+    """Returns user's Account with its role, from the cache when possible.
+
+    Returns an AnonymousAccount for anonymous users and users without one.
+    """
+    if not user.is_authenticated:
+        return AnonymousAccount()
+    cached = cached_entry(user.pk)
+    if cached == NO_ACCOUNT:
+        return AnonymousAccount()
+    return from_entry(cached)
+
+
+def resolve_key(key):
+    """Returns the user id of the account with key, or None if there is none.
+
+    Reads the LRU, then the shared cache, then the unique index on key.
+    """
+    user_id = key_ids.get(key)
+    if user_id is None:
+        cache = get_cache()
+        user_id = cache.get(key_cache_key(key))
+        if user_id is None:
+            user_id = (
+                Account.objects.filter(key=key)
+                .values_list("user_id", flat=True)
+                .first()
+            )
+            if user_id is None:
+                return None
+            cache.set(key_cache_key(key), user_id, settings.ACCOUNT_CACHE_TIMEOUT)
+        key_ids.set(key, user_id)
+    return user_id
+
+
+def get_profile(key):
+    """Returns (account, etag, last_modified) for the account with key, or None.
+
+    last_modified is a Unix timestamp: when the account was last loaded,
+    which is at or after its last change. Costs no query when the key and
+    the account are both cached.
+    """
+    user_id = resolve_key(key)
+    if user_id is None:
+        return None
+    cached = cached_entry(user_id)
+    if cached == NO_ACCOUNT:
+        # Deleted since another process cached its key.
+        forget_key(key)
+        return None
+    values, is_lawyer, is_client, loaded_at = cached
+    etag = hashlib.md5(repr((values, is_lawyer, is_client)).encode()).hexdigest()
+    return from_entry(cached), etag, int(loaded_at)
+
+
+def forget_account(user_id):
+    """Drops a user's cached account, e.g. after it changed."""
+    get_cache().delete(cache_key(user_id))
+
+
+def forget_key(key):
+    """Drops where an account key leads, e.g. after the account was deleted."""
+    key_ids.delete(key)
+    get_cache().delete(key_cache_key(key))
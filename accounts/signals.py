@@ -0,0 +1,36 @@
+"""Drop cached accounts when the rows behind them change.
+
+Entries are dropped once the write commits, like fragment versions (see
+the_acce/cache.py): dropped earlier, a request between the delete and the
+commit would cache the old rows again and serve them for
+ACCOUNT_CACHE_TIMEOUT.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Account, Client, Lawyer
+from .profiles import forget_account, forget_key
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def forget_changed_account(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(forget_account, instance.user_id), using=using)
+
+
+@receiver(post_delete, sender=Account)
+def forget_deleted_key(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(forget_key, instance.key), using=using)
+
+
+@receiver(post_save, sender=Lawyer)
+@receiver(post_delete, sender=Lawyer)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def forget_changed_role(sender, instance, using, **kwargs):
+    """A Lawyer or Client row decides its account's role."""
+    transaction.on_commit(partial(forget_account, instance.account_id), using=using)
@@ -1,3 +1,201 @@
-from django.test import TestCase
+import random
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+
+from matters.models import Matter
+from negotiations.models import Negotiation
+from the_acce.validation import clean_error
+
+from .models import Account, Client, Lawyer, Location
+from .parties import client_work, create_client, create_lawyer, lawyer_work, with_work
+from .profiles import LRU, AnonymousAccount, get_account, key_ids
+
+
+class RequestAccountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("counsel")
+        cls.account = Account.objects.create(
+            user=cls.user, user_type=Account.UserTypes.LAWYER, email="c@example.com"
+        )
+        Lawyer.objects.create(account=cls.account)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_page_views_after_the_first_add_no_profile_queries(self):
+        # Session and user, plus one joined query for the account and role.
+        with self.assertNumQueries(3):
+            response = self.client.get("/accounts/")
+        self.assertContains(response, "Signed in as a lawyer.")
+        for _ in range(3):
+            with self.assertNumQueries(2):
+                self.assertContains(self.client.get("/accounts/"), "a lawyer.")
+
+    def test_changes_expire_the_cached_account(self):
+        self.client.get("/accounts/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.lawyer.delete()
+        self.assertContains(self.client.get("/accounts/"), "a new member.")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.company = "Chen LLP"
+            self.account.save()
+            # Until the write commits, other requests keep the cached account.
+            self.assertIsNone(get_account(self.user).company)
+        self.assertEqual(get_account(self.user).company, "Chen LLP")
+
+    def test_anonymous_and_accountless_users(self):
+        self.assertIsInstance(get_account(AnonymousUser()), AnonymousAccount)
+        loner = User.objects.create_user("loner")
+        with self.assertNumQueries(1):
+            self.assertFalse(get_account(loner))
+        with self.assertNumQueries(0):
+            self.assertFalse(get_account(loner))
+        self.client.logout()
+        self.assertContains(self.client.get("/accounts/"), "Hello, world!")
+
+    async def test_asgi_requests_get_the_account(self):
+        browser = AsyncClient()
+        response = await browser.get("/accounts/")
+        self.assertContains(response, "Hello, world!")
+        await sync_to_async(browser.force_login)(self.user)
+        response = await browser.get("/accounts/")
+        self.assertContains(response, "Signed in as a lawyer.")
+
+
+class PartyWorkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer("counsel")
+        cls.clients = [create_client(f"client-{number}") for number in range(3)]
+        for number, client in enumerate(cls.clients):
+            for title in (f"Lease {number}", f"Probate {number}"):
+                Matter.objects.create(
+                    title=title,
+                    description="Test matter",
+                    lawyer_key=cls.lawyer,
+                    client_key=client,
+                )
+            Negotiation.objects.create(
+                title=f"Retainer {number}", lawyer_key=cls.lawyer, client_key=client
+            )
+
+    def test_matters_and_negotiations_share_the_parties(self):
+        client = self.clients[0]
+        self.assertEqual(client.matters.get(title="Lease 0").lawyer_key, self.lawyer)
+        self.assertEqual(client.negotiations.get().lawyer_key, self.lawyer)
+
+    def test_a_partys_work_is_three_queries(self):
+        with self.assertNumQueries(3):
+            lawyer = lawyer_work(self.lawyer.pk)
+            self.assertEqual(lawyer.account.user.username, "counsel")
+            self.assertEqual(len(lawyer.matters.all()), 6)
+            self.assertEqual(
+                [n.client_key for n in lawyer.negotiations.all()], self.clients
+            )
+        with self.assertNumQueries(3):
+            client = client_work(
+                self.clients[1].pk, matters=Matter.objects.filter(title__startswith="L")
+            )
+            self.assertEqual([m.title for m in client.matters.all()], ["Lease 1"])
+            [negotiation] = client.negotiations.all()
+            self.assertEqual(negotiation.lawyer_key, self.lawyer)
+        with self.assertRaises(Lawyer.DoesNotExist):
+            lawyer_work(self.clients[0].pk)
+
+    def test_listing_parties_does_not_grow_with_them(self):
+        with self.assertNumQueries(3):
+            clients = list(with_work(Client.objects.order_by("pk")))
+            self.assertEqual(
+                [len(client.matters.all()) for client in clients], [2, 2, 2]
+            )
+
+
+class ProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer(
+            "counsel", company="Chen LLP", email="chen@example.com"
+        )
+        cls.account = cls.lawyer.account
+
+    def setUp(self):
+        cache.clear()
+        key_ids.clear()
+        self.url = self.account.get_absolute_url()
+
+    def test_repeat_fetches_are_answered_from_the_caches(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Chen LLP")
+        self.assertContains(response, "lawyer")
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(self.url), "Chen LLP")
+            revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(revalidated.status_code, 304)
+            revalidated = self.client.get(
+                self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+            self.assertEqual(revalidated.status_code, 304)
+        # Another process starts with only the shared cache.
+        key_ids.clear()
+        with self.assertNumQueries(0):
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_changes_change_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.account.company = "Chen & Byrne LLP"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Chen &amp; Byrne LLP")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_deleted_accounts_are_not_found(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        # A process that still remembers the key finds the account gone.
+        key_ids.set(self.account.key, self.account.pk)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertIsNone(key_ids.get(self.account.key))
+
+    def test_lru_keeps_the_most_recently_used(self):
+        lru = LRU(2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual([lru.get(key) for key in "abc"], [1, None, 3])
+
+
+class BatchValidationTests(TestCase):
+    def test_accounts_agree_with_clean(self):
+        # Random contact details, from a fixed seed, each present or blank.
+        rng = random.Random(22)
+        location = Location.objects.create()
+        rows = [
+            {
+                "email": rng.choice([None, "", "a@example.com"]),
+                "phone": rng.choice([None, "", "555 0100"]),
+                "website": rng.choice([None, "", "example.com"]),
+                "address": rng.choice([None, location]),
+            }
+            for _ in range(2000)
+        ]
+        expected = [clean_error(Account(**row)) for row in rows]
+        columns = {
+            "email": [row["email"] for row in rows],
+            "phone": [row["phone"] for row in rows],
+            "website": [row["website"] for row in rows],
+            "address": [row["address"] and row["address"].pk for row in rows],
+        }
+        self.assertEqual(Account.validate_batch(columns), expected)
+        self.assertEqual(set(expected), {None, "contact_details_missing"})
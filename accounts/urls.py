@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     path("", views.index, name="Accounts"),
+    path("<uuid:key>/", views.profile, name="Account profile"),
 ]
@@ -1,9 +1,38 @@
+from django.http import Http404
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views import generic
 
+from . import profiles
+
 
 def index(request):
     return render(
         request,
         "accounts_overview.html",
     )
+
+
+def profile_response(request, profile):
+    """Returns the profile page, or 304 if the browser's copy is current.
+
+    Browsers must revalidate every time, so a changed account shows at once,
+    and an unchanged one is answered without rendering.
+    """
+    if profile is None:
+        raise Http404("No account has this key.")
+    account, etag, last_modified = profile
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render(request, "accounts_profile.html", {"account": account})
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def profile(request, key):
+    """Shows the account with key; see profiles.get_profile()."""
+    return profile_response(request, profiles.get_profile(key))
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'home'
+
+    def ready(self):
+        # Migrations read and write the primary, not a replica.
+        from the_acce.routers import pin_to_primary
+
+        pre_migrate.connect(pin_to_primary)
@@ -0,0 +1,100 @@
+import importlib.util
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as TestClient
+
+from accounts.parties import create_client, create_lawyer
+from matters.models import Matter
+from matters.summaries import refresh_summary
+from the_acce.loadtest import DEFAULT_HOST, run_load, running_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares serving the site under WSGI (runserver) and ASGI (uvicorn) "
+        "at several concurrency levels. The views are the same under both, so "
+        "this measures the servers and Django's handlers, not the views."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--matters", type=int, default=200, help="Matters seeded for the lawyer."
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON only.")
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec("uvicorn") is None:
+            raise CommandError("The ASGI benchmark needs uvicorn: pip install uvicorn")
+        lawyer = create_lawyer()
+        client = create_client()
+        # The lawyer's page needs matters.view_matter; a superuser has it.
+        reader = User.objects.create_user("bench-asgi-reader", is_superuser=True)
+        browser = TestClient(HTTP_HOST=DEFAULT_HOST)
+        browser.force_login(reader)
+        headers = {
+            "Cookie": f"{settings.SESSION_COOKIE_NAME}={browser.session.session_key}"
+        }
+        try:
+            Matter.objects.bulk_create(
+                Matter(
+                    title=f"Benchmark matter {n:05d}",
+                    description="Benchmark matter",
+                    lawyer_key=lawyer,
+                    client_key=client,
+                )
+                for n in range(options["matters"])
+            )
+            refresh_summary(lawyer.pk)
+            paths = [
+                "/",
+                "/matters/",
+                f"/matters/lawyer/{lawyer.pk}/",
+                "/accounts/",
+                "/negotiations/",
+            ]
+            results = {
+                "wsgi": self.measure("wsgi", paths, headers, options),
+                "asgi": self.measure("asgi", paths, headers, options),
+            }
+        finally:
+            browser.logout()
+            reader.delete()
+            # Deleting the users cascades to their accounts and matters.
+            lawyer.account.user.delete()
+            client.account.user.delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'server':<11} {'conc':>5} {'req/s':>9} {'p50 ms':>9} "
+            f"{'p99 ms':>9} {'errors':>7}"
+        )
+        for server, levels in results.items():
+            for concurrency, stats in levels.items():
+                self.stdout.write(
+                    f"{server:<11} {concurrency:>5} {stats['rps']:>9.1f} "
+                    f"{stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+                    f"{stats['errors']:>7}"
+                )
+
+    def measure(self, server, paths, headers, options):
+        """Starts a server and returns {concurrency: stats} for it."""
+        with running_server(server) as base_url:
+            # Warm up imports, template caches and database connections.
+            run_load(base_url, paths, concurrency=4, requests=100, headers=headers)
+            return {
+                concurrency: run_load(
+                    base_url,
+                    paths,
+                    concurrency=concurrency,
+                    requests=options["requests"],
+                    headers=headers,
+                )
+                for concurrency in options["concurrency"]
+            }
@@ -0,0 +1,113 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+
+from the_acce.uuids import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+# Scratch table, dropped after each run. Its key column is a UUIDField's.
+TABLE = "bench_keys"
+PAYLOAD = "x" * 64
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares random (version 4) with time-ordered (version 7) UUID "
+        "primary keys on the configured database: bulk insert throughput as "
+        "a table grows, and reading back the most recent rows by key range. "
+        "Uses a scratch table that is dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--recent", type=int, default=10_000, help="Newest rows to read back."
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--json", action="store_true", help="Print JSON only.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        results = {
+            name: self.measure(connection, generator, options)
+            for name, generator in GENERATORS.items()
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{connection.vendor}, {options['rows']} rows in batches of "
+            f"{options['batch_size']}, reading back the newest {options['recent']}"
+        )
+        self.stdout.write(
+            f"{'keys':<6} {'insert/s':>10} {'first 10%':>10} {'last 10%':>10} "
+            f"{'recent ms':>10} {'rows read':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<6} {result['insert_rps']:>10.0f} "
+                f"{result['first_rps']:>10.0f} {result['last_rps']:>10.0f} "
+                f"{result['recent_ms']:>10.2f} {result['recent_rows_read']:>10}"
+            )
+
+    def measure(self, connection, generator, options):
+        """Fills the scratch table with keys from generator and times it."""
+        rows, batch_size = options["rows"], options["batch_size"]
+        field = models.UUIDField()
+        table = connection.ops.quote_name(TABLE)
+        insert = f"INSERT INTO {table} (id, payload) VALUES (%s, %s)"
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(
+                f"CREATE TABLE {table} (id {field.db_type(connection)} NOT NULL "
+                f"PRIMARY KEY, payload varchar(64) NOT NULL)"
+            )
+        try:
+            keys, seconds = [], []
+            for start in range(0, rows, batch_size):
+                batch = [generator() for _ in range(min(batch_size, rows - start))]
+                params = [
+                    (field.get_db_prep_value(key, connection), PAYLOAD) for key in batch
+                ]
+                began = time.perf_counter()
+                with transaction.atomic(using=connection.alias):
+                    with connection.cursor() as cursor:
+                        cursor.executemany(insert, params)
+                seconds.append(time.perf_counter() - began)
+                keys.extend(batch)
+
+            # The newest rows are one key range only if keys follow time.
+            recent = keys[-options["recent"] :]
+            bounds = [
+                field.get_db_prep_value(key, connection)
+                for key in (min(recent), max(recent))
+            ]
+            timings = []
+            for _ in range(options["repeat"]):
+                began = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT id, payload FROM {table} "
+                        f"WHERE id BETWEEN %s AND %s ORDER BY id",
+                        bounds,
+                    )
+                    read = len(cursor.fetchall())
+                timings.append((time.perf_counter() - began) * 1000)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+        tenth = max(len(seconds) // 10, 1)
+        return {
+            "insert_rps": rows / sum(seconds),
+            "first_rps": tenth * batch_size / sum(seconds[:tenth]),
+            "last_rps": tenth * batch_size / sum(seconds[-tenth:]),
+            "recent_ms": statistics.median(timings),
+            "recent_rows_read": read,
+        }
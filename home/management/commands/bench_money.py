@@ -0,0 +1,168 @@
+import json
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models import Count, F, Q, Sum
+
+from the_acce.exports import iter_rows
+from the_acce.money import MoneyField
+
+CENT = Decimal("0.01")
+
+
+def scratch_model(name, amount_field):
+    """Returns an unmanaged model of a scratch table with two amount columns."""
+
+    class Meta:
+        app_label = "home"
+        db_table = f"bench_money_{name}"
+        managed = False
+
+    return type(
+        f"BenchMoney{name.title()}",
+        (models.Model,),
+        {
+            "__module__": __name__,
+            "Meta": Meta,
+            "lawyer": models.IntegerField(),
+            "amount": amount_field(),
+            "budget": amount_field(),
+        },
+    )
+
+
+# The columns before and after amounts became integer minor units.
+MODELS = {
+    "decimal": scratch_model(
+        "decimal", lambda: models.DecimalField(max_digits=14, decimal_places=2)
+    ),
+    "money": scratch_model("money", MoneyField),
+}
+
+
+def rounded(value):
+    # As matters/summaries.py did: SQLite sums decimals as floats.
+    return value.quantize(CENT) if isinstance(value, Decimal) else value
+
+
+def total(model):
+    totals = model.objects.aggregate(Sum("amount"), Sum("budget"))
+    return {column: rounded(value) for column, value in totals.items()}
+
+
+def by_lawyer(model):
+    rows = (
+        model.objects.order_by("lawyer")
+        .values("lawyer")
+        .annotate(
+            total_amount=Sum("amount"),
+            total_budget=Sum("budget"),
+            over_budget=Count("pk", filter=Q(amount__gt=F("budget"))),
+        )
+    )
+    return [{column: rounded(value) for column, value in row.items()} for row in rows]
+
+
+def load(model):
+    return list(model.objects.values_list("amount", "budget"))
+
+
+def export(file_format):
+    def rows(model):
+        return "".join(
+            iter_rows(model.objects.order_by("pk"), ["amount", "budget"], file_format)
+        )
+
+    return rows
+
+
+WORKLOADS = {
+    "total": total,
+    "by lawyer": by_lawyer,
+    "load": load,
+    "csv": export("csv"),
+    "jsonl": export("jsonl"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares amounts stored as decimals with amounts stored as integer "
+        "minor units (MoneyField) on the configured database: totals, totals "
+        "by lawyer, loading values, and CSV and JSON Lines exports, all "
+        "through the ORM. Uses scratch tables that are dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--lawyers", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--json", action="store_true", help="Print JSON only.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        rng = random.Random(options["seed"])
+        rows = [
+            (
+                rng.randrange(options["lawyers"]),
+                Decimal(rng.randint(0, 999_999)).scaleb(-2),
+                Decimal(rng.randint(0, 999_999)).scaleb(-2),
+            )
+            for _ in range(options["rows"])
+        ]
+        results = {workload: {} for workload in WORKLOADS}
+        outputs = {}
+        for name, model in MODELS.items():
+            with connection.schema_editor() as editor:
+                editor.create_model(model)
+            try:
+                model.objects.using(connection.alias).bulk_create(
+                    (
+                        model(lawyer=lawyer, amount=amount, budget=budget)
+                        for lawyer, amount, budget in rows
+                    ),
+                    batch_size=5000,
+                )
+                for workload, function in WORKLOADS.items():
+                    results[workload][name], outputs[workload, name] = self.time(
+                        function, model, options["repeat"]
+                    )
+            finally:
+                with connection.schema_editor() as editor:
+                    editor.delete_model(model)
+
+        for workload in WORKLOADS:
+            decimal, money = (
+                json.dumps(outputs[workload, name], default=str) for name in MODELS
+            )
+            if decimal != money:
+                raise CommandError(f"{workload}: the two columns disagree.")
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{connection.vendor}, {options['rows']} rows over "
+            f"{options['lawyers']} lawyers, median of {options['repeat']}\n"
+            f"{'workload':<10} {'decimal ms':>11} {'money ms':>9} {'speedup':>8}"
+        )
+        for workload, timings in results.items():
+            self.stdout.write(
+                f"{workload:<10} {timings['decimal']:>11.1f} "
+                f"{timings['money']:>9.1f} "
+                f"{timings['decimal'] / timings['money']:>7.1f}x"
+            )
+
+    def time(self, function, model, repeat):
+        """Returns (median milliseconds, result) of calling function(model)."""
+        timings = []
+        for _ in range(repeat):
+            began = time.perf_counter()
+            result = function(model)
+            timings.append((time.perf_counter() - began) * 1000)
+        return statistics.median(timings), result
@@ -0,0 +1,152 @@
+import json
+import re
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client as TestClient
+from django.urls import reverse
+
+from matters.models import Matter
+from negotiations.models import Negotiation
+from the_acce.loadtest import DEFAULT_HOST, compare, run_load, running_server
+
+BENCH_USERNAME = "bench-admin"
+QUERY_COUNT = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def benchmark_paths():
+    """Returns the site's routes and every admin changelist, with seeded ids.
+
+    Lawyer and client pages use the busiest lawyer and client, which is where
+    skewed data hurts most.
+    """
+    lawyer = (
+        Matter.objects.values("lawyer_key")
+        .annotate(matters=Count("key"))
+        .order_by("-matters")
+        .first()
+    )
+    client = (
+        Negotiation.objects.values("client_key")
+        .annotate(negotiations=Count("key"))
+        .order_by("-negotiations")
+        .first()
+    )
+    if lawyer is None or client is None:
+        raise CommandError("There is nothing to benchmark; run seed_scale first.")
+    paths = [
+        reverse("index"),
+        reverse("Matters"),
+        reverse("Lawyer matters", args=[lawyer["lawyer_key"]]),
+        reverse("Accounts"),
+        reverse("Negotiations"),
+        reverse("Client negotiations", args=[client["client_key"]]),
+    ]
+    for model in admin.site._registry:
+        opts = model._meta
+        paths.append(reverse(f"admin:{opts.app_label}_{opts.model_name}_changelist"))
+    return paths
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests every site route and admin changelist against a running "
+        "server and reports throughput, latency percentiles and query counts "
+        "as JSON. With --baseline, fails when a route regressed by more than "
+        "--threshold. Seed data with seed_scale first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Per route and level."
+        )
+        parser.add_argument("--output", type=Path, help="Also write results here.")
+        parser.add_argument(
+            "--baseline", type=Path, help="Results of an earlier run to compare."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.15,
+            help="Allowed fractional p95 growth or throughput loss.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(options["baseline"].read_text())
+        paths = benchmark_paths()
+        user, _ = User.objects.get_or_create(
+            username=BENCH_USERNAME, defaults={"is_staff": True, "is_superuser": True}
+        )
+        browser = TestClient(HTTP_HOST=DEFAULT_HOST)
+        browser.force_login(user)
+        try:
+            routes = {path: self.profile(browser, path) for path in paths}
+            cookie = f"{settings.SESSION_COOKIE_NAME}={browser.session.session_key}"
+            with running_server(options["server"]) as base_url:
+                for path, route in routes.items():
+                    # Warm up imports, template caches and database connections.
+                    run_load(base_url, [path], 2, 20, headers={"Cookie": cookie})
+                    route["levels"] = {
+                        str(concurrency): run_load(
+                            base_url,
+                            [path],
+                            concurrency=concurrency,
+                            requests=options["requests"],
+                            headers={"Cookie": cookie},
+                        )
+                        for concurrency in options["concurrency"]
+                    }
+        finally:
+            browser.logout()
+            user.delete()
+
+        results = {
+            "commit": current_commit(),
+            "server": options["server"],
+            "requests": options["requests"],
+            "routes": routes,
+        }
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            options["output"].write_text(output + "\n")
+        self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = compare(baseline, results, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regressions against {options['baseline']}:\n"
+                    + "\n".join(regressions)
+                )
+            self.stderr.write(f"No regressions against {options['baseline']}.")
+
+    def profile(self, browser, path):
+        """Fetches path in-process and returns its status and query count."""
+        response = browser.get(path)
+        match = QUERY_COUNT.search(response.get("Server-Timing", ""))
+        return {
+            "status": response.status_code,
+            "queries": int(match.group(1)) if match else None,
+        }
@@ -0,0 +1,199 @@
+import asyncio
+import importlib.util
+import json
+import resource
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from accounts.parties import create_client, create_lawyer
+from negotiations import events
+from negotiations.models import Negotiation, NegotiationEvent
+from the_acce.loadtest import DEFAULT_HOST, free_port, percentile
+from the_acce.pubsub import get_broker
+
+# Streams opened at once; more overflow uvicorn's accept backlog.
+CONNECTING = 200
+
+
+def rss_kb():
+    """Returns this process's resident memory in KB."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Holds many idle live-update streams open on one ASGI worker (uvicorn, "
+        "run in this process), then records negotiation changes and measures "
+        "how long each takes to reach every stream, and the memory a stream "
+        "costs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=2000)
+        parser.add_argument(
+            "--changes", type=int, default=20, help="Changes fanned out to them."
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON only.")
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec("uvicorn") is None:
+            raise CommandError("The SSE benchmark needs uvicorn: pip install uvicorn")
+        # Each stream holds a socket at either end.
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = 2 * options["connections"] + 100
+        if needed > hard:
+            raise CommandError(f"{needed} open files are needed; the limit is {hard}.")
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, needed), hard))
+
+        lawyer = create_lawyer()
+        client = create_client()
+        negotiation = Negotiation.objects.create(
+            title="Benchmark negotiation",
+            amount=Decimal("100"),
+            lawyer_key=lawyer,
+            client_key=client,
+        )
+        try:
+            results = self.measure(negotiation, options)
+        finally:
+            # Deleting the users cascades to their accounts and negotiations.
+            lawyer.account.user.delete()
+            client.account.user.delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{results['connections']} idle streams on one uvicorn worker: "
+            f"connected in {results['connect_seconds']:.2f}s, "
+            f"{results['kb_per_stream']:.1f} KB each (client and server sides)."
+        )
+        fan_out = results["fan_out_ms"]
+        self.stdout.write(
+            f"{results['changes']} changes reached every stream in "
+            f"{fan_out['p50']:.1f} ms p50, {fan_out['p99']:.1f} ms p99, "
+            f"{fan_out['max']:.1f} ms max; {results['errors']} streams failed."
+        )
+
+    def measure(self, negotiation, options):
+        import uvicorn
+
+        from the_acce.asgi import application
+
+        port = free_port()
+        server = uvicorn.Server(
+            uvicorn.Config(
+                application,
+                host="127.0.0.1",
+                port=port,
+                lifespan="off",
+                log_level="warning",
+                access_log=False,
+                backlog=max(2048, CONNECTING),
+            )
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        # One thread records the changes, as a sync view would.
+        writer = ThreadPoolExecutor(1)
+        try:
+            return asyncio.run(self.run_clients(port, negotiation, writer, options))
+        finally:
+            writer.submit(connections.close_all).result()
+            writer.shutdown()
+            server.should_exit = True
+            thread.join()
+
+    def login(self, negotiation):
+        """Returns the key of a new session for the negotiation's client."""
+        browser = Client()
+        browser.force_login(negotiation.client_key.account.user)
+        return browser.cookies[settings.SESSION_COOKIE_NAME].value
+
+    async def run_clients(self, port, negotiation, writer, options):
+        loop = asyncio.get_running_loop()
+        path = f"/negotiations/client/{negotiation.client_key_id}/live/"
+        # Streams are only served to the client, so log in as them.
+        session = await loop.run_in_executor(writer, self.login, negotiation)
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: {DEFAULT_HOST}\r\n"
+            f"Cookie: {settings.SESSION_COOKIE_NAME}={session}\r\n"
+            "Accept: text/event-stream\r\n\r\n"
+        ).encode()
+        gate = asyncio.Semaphore(CONNECTING)
+
+        async def connect():
+            async with gate:
+                reader, stream_writer = await asyncio.open_connection("127.0.0.1", port)
+                stream_writer.write(request)
+                await reader.readuntil(b"retry: 5000\n\n")
+                return reader, stream_writer
+
+        async def next_change(reader):
+            while b"event: negotiation" not in await reader.readuntil(b"\n\n"):
+                pass
+            return time.perf_counter()
+
+        def record(amount):
+            events.record(
+                negotiation.pk,
+                NegotiationEvent.Kinds.COUNTER,
+                NegotiationEvent.Parties.LAWYER,
+                amount=amount,
+            )
+
+        before = rss_kb()
+        began = time.perf_counter()
+        streams = await asyncio.gather(
+            *(connect() for _ in range(options["connections"]))
+        )
+        connect_seconds = time.perf_counter() - began
+        # Let the server settle before reading memory.
+        await asyncio.sleep(0.5)
+        kb_per_stream = (rss_kb() - before) / len(streams)
+        subscribed = get_broker().subscriber_count()
+
+        last_arrivals, errors = [], 0
+        for change in range(options["changes"]):
+            waiting = [
+                asyncio.ensure_future(asyncio.wait_for(next_change(reader), 30))
+                for reader, _ in streams
+            ]
+            began = time.perf_counter()
+            await loop.run_in_executor(writer, record, Decimal(101 + change))
+            arrivals = await asyncio.gather(*waiting, return_exceptions=True)
+            received = [at for at in arrivals if isinstance(at, float)]
+            errors += len(arrivals) - len(received)
+            if received:
+                last_arrivals.append((max(received) - began) * 1000)
+
+        for _, stream_writer in streams:
+            stream_writer.close()
+        last_arrivals.sort()
+        return {
+            "connections": len(streams),
+            "subscribed": subscribed,
+            "connect_seconds": connect_seconds,
+            "kb_per_stream": kb_per_stream,
+            "changes": options["changes"],
+            "errors": errors,
+            "fan_out_ms": {
+                "p50": statistics.median(last_arrivals) if last_arrivals else 0.0,
+                "p99": percentile(last_arrivals, 0.99),
+                "max": last_arrivals[-1] if last_arrivals else 0.0,
+            },
+        }
@@ -0,0 +1,95 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account, Location
+from matters.models import Contact, Matter
+from negotiations.models import Negotiation
+from the_acce.validation import clean_error
+
+TEXT = [None, "", "x"]
+
+
+def matter_row(rng, today):
+    return {
+        "has_client_permission": rng.random() < 0.5,
+        "has_client_pre_tasks": rng.random() < 0.2,
+        "has_external_services": rng.random() < 0.2,
+        "logged_hours": Decimal(rng.choice([0, 0, 150, 275])) / 100,
+        "start_date": today + timedelta(days=rng.randint(-3, 30)),
+    }
+
+
+def negotiation_row(rng, today):
+    return {
+        "amount": Decimal(rng.randint(0, 999_999)) / 100,
+        "initial_amount": Decimal(rng.randint(0, 999_999)) / 100,
+    }
+
+
+def contact_row(rng, today):
+    return {
+        "email": rng.choice(TEXT),
+        "phone": rng.choice(TEXT),
+        "website": rng.choice(TEXT),
+        # Unsaved, so clean() reads it without a query; batches see the id.
+        "address": rng.choice([None, Location(pk=1)]),
+    }
+
+
+MODELS = {
+    "matter": (Matter, matter_row),
+    "negotiation": (Negotiation, negotiation_row),
+    "account": (Account, contact_row),
+    "contact": (Contact, contact_row),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares validating rows one model instance at a time, with clean(), "
+        "against validate_batch() on the same values as columns. Runs in "
+        "memory; nothing is written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        today = date.today()
+        self.stdout.write(
+            f"{options['rows']} rows, best of {options['repeat']}\n"
+            f"{'model':<12} {'clean() ms':>11} {'batch ms':>9} {'speedup':>8}"
+        )
+        for name, (model, make_row) in MODELS.items():
+            rows = [make_row(rng, today) for _ in range(options["rows"])]
+            data = {field: [row[field] for row in rows] for field in rows[0]}
+            if "address" in data:
+                data["address"] = [a and a.pk for a in data["address"]]
+            one_by_one, expected = self.time(
+                lambda: [clean_error(model(**row)) for row in rows], options["repeat"]
+            )
+            batch, codes = self.time(
+                lambda: model.validate_batch(data), options["repeat"]
+            )
+            if codes != expected:
+                raise CommandError(f"{name}: validate_batch() disagrees with clean().")
+            self.stdout.write(
+                f"{name:<12} {one_by_one:>11.1f} {batch:>9.1f} "
+                f"{one_by_one / batch:>7.1f}x"
+            )
+
+    def time(self, function, repeat):
+        """Returns (best milliseconds, result) of calling function."""
+        timings = []
+        for _ in range(repeat):
+            began = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - began) * 1000)
+        return min(timings), result
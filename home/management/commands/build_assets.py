@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import urllib.request
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from the_acce.assets import (
+    BOOTSTRAP_FILES,
+    BOOTSTRAP_STATIC_DIR,
+    BOOTSTRAP_URL,
+    PURGED_CSS,
+    purge_css,
+    used_classes,
+)
+
+try:
+    import sass
+except ImportError:  # Optional: the compiled CSS is committed alongside the SCSS.
+    sass = None
+
+VENDOR_DIR = Path(settings.BASE_DIR) / "home" / "static" / BOOTSTRAP_STATIC_DIR
+# Classes Bootstrap's JavaScript adds at runtime, so no template names them.
+BOOTSTRAP_SAFELIST = {
+    "active",
+    "collapse",
+    "collapsing",
+    "disabled",
+    "fade",
+    "modal-backdrop",
+    "modal-open",
+    "show",
+    "showing",
+}
+
+
+def integrity(content):
+    """Returns the sha384 subresource integrity string of content."""
+    return "sha384-" + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles the SCSS, vendors Bootstrap and purges its CSS down to the "
+        "classes our templates use, then runs collectstatic to write hashed, "
+        "precompressed files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Fail instead of downloading Bootstrap if it is not vendored yet.",
+        )
+        parser.add_argument(
+            "--no-collect", action="store_true", help="Skip collectstatic."
+        )
+
+    def handle(self, *args, **options):
+        self.compile_scss()
+        self.vendor_bootstrap(options["offline"])
+        self.purge_bootstrap()
+        if not options["no_collect"]:
+            call_command(
+                "collectstatic",
+                interactive=False,
+                verbosity=options["verbosity"],
+            )
+
+    def project_apps(self):
+        base_dir = Path(settings.BASE_DIR)
+        return [
+            app for app in apps.get_app_configs() if base_dir in Path(app.path).parents
+        ]
+
+    def compile_scss(self):
+        sources = [
+            path
+            for app in self.project_apps()
+            for path in (Path(app.path) / "static").rglob("*.scss")
+        ]
+        if sass is None:
+            self.stderr.write(
+                "libsass is not installed; using the committed CSS. "
+                "Run pip install libsass to compile the SCSS."
+            )
+            return
+        for source in sources:
+            css, source_map = sass.compile(
+                filename=str(source),
+                output_style="compressed",
+                source_map_filename=f"{source.with_suffix('.css').name}.map",
+                output_filename_hint=source.with_suffix(".css").name,
+            )
+            source.with_suffix(".css").write_text(css)
+            Path(f"{source.with_suffix('.css')}.map").write_text(source_map)
+            self.stdout.write(f"Compiled {source.relative_to(settings.BASE_DIR)}")
+
+    def vendor_bootstrap(self, offline):
+        VENDOR_DIR.mkdir(parents=True, exist_ok=True)
+        for name, (url_path, expected) in BOOTSTRAP_FILES.items():
+            path = VENDOR_DIR / name
+            if path.exists():
+                content = path.read_bytes()
+            elif offline:
+                raise CommandError(f"{path} is missing; run without --offline.")
+            else:
+                with urllib.request.urlopen(BOOTSTRAP_URL + url_path) as response:
+                    content = response.read()
+            if integrity(content) != expected:
+                raise CommandError(f"{name} does not match its integrity hash.")
+            if not path.exists():
+                path.write_bytes(content)
+                self.stdout.write(f"Vendored {name}")
+
+    def purge_bootstrap(self):
+        classes = BOOTSTRAP_SAFELIST | used_classes(
+            Path(app.path) / "templates" for app in self.project_apps()
+        )
+        css = (VENDOR_DIR / "bootstrap.min.css").read_text(encoding="utf-8")
+        purged = purge_css(css, classes)
+        (VENDOR_DIR / PURGED_CSS).write_text(purged, encoding="utf-8")
+        self.stdout.write(
+            f"Purged Bootstrap CSS from {len(css)} to {len(purged)} bytes "
+            f"for {len(classes)} classes."
+        )
@@ -0,0 +1,304 @@
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from accounts.models import Account, Client, Lawyer
+from matters import ledger, reminders
+from matters.models import Contact, Matter, Pretask
+from matters.summaries import refresh_summaries
+from negotiations import events
+from negotiations.models import Negotiation
+from the_acce.uuids import make_uuid7
+
+# Usernames of generated accounts start with this, so a second run is refused.
+USERNAME_PREFIX = "seed-"
+# Generated keys are timestamped from here on, 2024-01-01 UTC in milliseconds.
+KEY_EPOCH_MS = 1_704_067_200_000
+
+TOPICS = [
+    "Lease",
+    "Merger",
+    "Employment",
+    "Licensing",
+    "Probate",
+    "Shareholder",
+    "Supply",
+    "Trademark",
+    "Tenancy",
+    "Franchise",
+]
+ACTIONS = ["review", "dispute", "drafting", "renewal", "advice", "due diligence"]
+FIRST_NAMES = ["Ada", "Kofi", "Mei", "Ravi", "Sade", "Tomas", "Yara", "Zain"]
+LAST_NAMES = ["Adeyemi", "Byrne", "Chen", "Dubois", "Haddad", "Novak", "Okafor"]
+
+
+def skewed_counts(rng, total, buckets, skew):
+    """Splits total into buckets sizes following a Zipf-like distribution.
+
+    Bucket i gets a share proportional to 1 / (i + 1) ** skew, shuffled so the
+    busiest bucket is not always the first one created.
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(buckets)]
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.sample(range(buckets), total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+def bulk_create_with_ids(model, objs, batch_size):
+    """bulk_create() that leaves primary keys set on every backend.
+
+    Backends that can't return ids from bulk inserts (SQLite before Django
+    4.0) number the rows after the current maximum, in insertion order, so
+    the ids are filled in from there. Call it inside a transaction.
+    """
+    objs = list(objs)
+    last = model.objects.aggregate(last=Max("pk"))["last"] or 0
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    for number, obj in enumerate(objs, start=last + 1):
+        if obj.pk is None:
+            obj.pk = number
+    return objs
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a reproducible, skewed data set of accounts, lawyers, "
+        "clients, matters, contacts, pretasks and negotiations for load tests. "
+        "Run it against an empty database; the same --seed gives the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lawyers", type=int, default=100)
+        parser.add_argument(
+            "--matters", type=int, default=50, help="Mean matters per lawyer."
+        )
+        parser.add_argument(
+            "--clients", type=int, default=None, help="Defaults to 5 per lawyer."
+        )
+        parser.add_argument(
+            "--negotiations", type=int, default=3, help="Mean per client."
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of rows per lawyer and client; 0 is uniform.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError(
+                "Seeded accounts already exist; flush the database first."
+            )
+        self.rng = random.Random(options["seed"])
+        self.clock = KEY_EPOCH_MS
+        self.batch_size = options["batch_size"]
+        lawyer_count = options["lawyers"]
+        client_count = options["clients"] or lawyer_count * 5
+        skew = options["skew"]
+
+        with transaction.atomic():
+            lawyers = self.create_parties(Lawyer, lawyer_count)
+            clients = self.create_parties(Client, client_count)
+            client_weights = list(
+                accumulate(
+                    skewed_counts(self.rng, client_count * 100, client_count, skew)
+                )
+            )
+
+            matters = []
+            per_lawyer = skewed_counts(
+                self.rng, lawyer_count * options["matters"], lawyer_count, skew
+            )
+            for lawyer, count in zip(lawyers, per_lawyer):
+                for _ in range(count):
+                    client = self.rng.choices(clients, cum_weights=client_weights)[0]
+                    matters.append(self.make_matter(lawyer, client))
+            # bulk_create() skips the signal that schedules reminders.
+            reminders.schedule(matters)
+            Matter.objects.bulk_create(matters, batch_size=self.batch_size)
+            ledger.open_balances(matters, self.batch_size)
+            pretasks = self.create_pretasks(matters)
+            contacts = self.create_contacts(matters)
+
+            negotiations = []
+            per_client = skewed_counts(
+                self.rng, client_count * options["negotiations"], client_count, skew
+            )
+            for client, count in zip(clients, per_client):
+                for _ in range(count):
+                    negotiations.append(
+                        self.make_negotiation(self.rng.choice(lawyers), client)
+                    )
+            Negotiation.objects.bulk_create(negotiations, batch_size=self.batch_size)
+            # bulk_create() skips the signal that starts each event log.
+            events.begin(negotiations, self.batch_size)
+
+            refresh_summaries([lawyer.pk for lawyer in lawyers])
+
+        self.stdout.write(
+            f"Seeded {lawyer_count} lawyers, {client_count} clients, "
+            f"{len(matters)} matters (busiest lawyer {max(per_lawyer)}), "
+            f"{contacts} contacts, {pretasks} pretasks and "
+            f"{len(negotiations)} negotiations."
+        )
+
+    def uuid(self):
+        """Returns a version 4 UUID drawn from the seeded generator."""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def key(self):
+        """Returns a time-ordered primary key drawn from the seeded generator.
+
+        Keys are a millisecond apart, as if each row were created in turn.
+        """
+        self.clock += 1
+        return make_uuid7(
+            self.clock, self.rng.getrandbits(41), self.rng.getrandbits(32)
+        )
+
+    def create_parties(self, model, count):
+        """Creates users with accounts and a Lawyer or Client row each.
+
+        Returns the Lawyer or Client rows, in creation order.
+        """
+        kind = model.__name__.lower()
+        password = make_password(None)
+        users = bulk_create_with_ids(
+            User,
+            (
+                User(
+                    username=f"{USERNAME_PREFIX}{kind}-{number:06d}",
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        user_type = (
+            Account.UserTypes.LAWYER if model is Lawyer else Account.UserTypes.CLIENT
+        )
+        accounts = Account.objects.bulk_create(
+            (
+                Account(
+                    user=user,
+                    key=self.uuid(),
+                    user_type=user_type,
+                    email=f"{user.username}@example.com",
+                    phone=f"+44 20 7{number:07d}" if model is Lawyer else None,
+                    website=(
+                        f"https://{user.username}.example.com"
+                        if model is Lawyer
+                        else None
+                    ),
+                )
+                for number, user in enumerate(users)
+            ),
+            batch_size=self.batch_size,
+        )
+        return model.objects.bulk_create(
+            (model(account=account) for account in accounts),
+            batch_size=self.batch_size,
+        )
+
+    def make_matter(self, lawyer, client):
+        rng = self.rng
+        started = rng.random() < 0.6
+        estimated = Decimal(rng.randint(1, 400)) / 2
+        logged = (
+            (estimated * Decimal(rng.uniform(0, 1.3))).quantize(Decimal("0.01"))
+            if started
+            else Decimal("0")
+        )
+        start_date = date.today() + timedelta(days=rng.randint(-365, 60))
+        return Matter(
+            key=self.key(),
+            title=f"{rng.choice(TOPICS)} {rng.choice(ACTIONS)} {rng.randint(1, 9999)}",
+            description="Generated by seed_scale.",
+            cost_type=rng.choice(Matter.CostTypes.values),
+            amount=Decimal(rng.randint(50, 999_999)) / 100,
+            budget=Decimal(rng.randint(100, 999_999)) / 100,
+            estimated_hours=min(estimated, Decimal("9999.99")),
+            logged_hours=min(logged, Decimal("9999.99")),
+            start_date=start_date,
+            due_date=(
+                start_date + timedelta(days=rng.randint(7, 180))
+                if rng.random() < 0.8
+                else None
+            ),
+            has_client_permission=started or start_date < date.today(),
+            has_client_pre_tasks=rng.random() < 0.3,
+            has_external_services=rng.random() < 0.2,
+            is_active=rng.random() < 0.7,
+            lawyer_key=lawyer,
+            client_key=client,
+        )
+
+    def create_pretasks(self, matters):
+        pretasks = [
+            Pretask(
+                key=self.key(),
+                title=f"Provide document {number + 1}",
+                description="Generated by seed_scale.",
+                is_complete=self.rng.random() < 0.5,
+                matter_key=matter,
+            )
+            for matter in matters
+            if matter.has_client_pre_tasks
+            for number in range(self.rng.randint(1, 4))
+        ]
+        Pretask.objects.bulk_create(pretasks, batch_size=self.batch_size)
+        return len(pretasks)
+
+    def create_contacts(self, matters):
+        """Creates one external contact per few matters that need one."""
+        needing = [matter for matter in matters if matter.has_external_services]
+        contacts, links = [], []
+        Link = Contact.matter_key.through
+        for start in range(0, len(needing), 3):
+            contact = Contact(
+                key=self.key(),
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                company=f"{self.rng.choice(LAST_NAMES)} & Partners",
+                email=f"contact-{len(contacts):06d}@example.com",
+            )
+            contacts.append(contact)
+            links.extend(
+                Link(contact_id=contact.key, matter_id=matter.key)
+                for matter in needing[start : start + 3]
+            )
+        Contact.objects.bulk_create(contacts, batch_size=self.batch_size)
+        Link.objects.bulk_create(links, batch_size=self.batch_size)
+        return len(contacts)
+
+    def make_negotiation(self, lawyer, client):
+        amount = Decimal(self.rng.randint(100, 999_999)) / 100
+        return Negotiation(
+            key=self.key(),
+            title=f"{self.rng.choice(TOPICS)} fee {self.rng.randint(1, 9999)}",
+            cost_type=self.rng.choice(Negotiation.CostTypes.values),
+            amount=amount,
+            initial_amount=(amount * Decimal(self.rng.uniform(0, 0.5))).quantize(
+                Decimal("0.01")
+            ),
+            budget=Decimal(self.rng.randint(100, 999_999)) / 100,
+            is_accepted=self.rng.random() < 0.4,
+            lawyer_key=lawyer,
+            client_key=client,
+        )
@@ -0,0 +1,42 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the primary SQLite database over each replica in DB_REPLICAS, "
+        "standing in for replication when trying replicas locally. Repeat it "
+        "to let the replicas catch up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Keep copying, waiting this many seconds between copies.",
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if "sqlite" not in primary["ENGINE"]:
+            raise CommandError("Replicas are only copied for SQLite databases.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("Set DB_REPLICAS to one or more database files.")
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                self.copy(primary["NAME"], settings.DATABASES[alias]["NAME"])
+                self.stdout.write(f"Copied the primary to {alias}.")
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
+
+    def copy(self, source, target):
+        # The backup API copies a consistent snapshot while others write.
+        with sqlite3.connect(source) as primary, sqlite3.connect(target) as replica:
+            primary.backup(replica)
+        replica.close()
+        primary.close()
@@ -1,3 +1,350 @@
-from django.test import TestCase
+import gzip
+import json
+import pickle
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import router
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Lawyer
+from home.management.commands.build_assets import integrity
+from accounts.parties import create_client, create_lawyer
+from matters.models import Matter
+from matters.summaries import find_drift
+
+from the_acce.assets import (
+    BOOTSTRAP_FILES,
+    BOOTSTRAP_STATIC_DIR,
+    IMMUTABLE_CACHE_CONTROL,
+    PURGED_CSS,
+    purge_css,
+)
+from the_acce.exports import iter_rows
+from the_acce.loadtest import compare
+from the_acce.money import Money
+from the_acce.routers import (
+    STICKY_COOKIE,
+    ReplicaStickinessMiddleware,
+    from_primary,
+    routing,
+)
+from the_acce.uuids import make_uuid7, uuid7, uuid7_datetime
+
+
+class PurgeCssTests(SimpleTestCase):
+    def test_keeps_only_rules_for_used_classes(self):
+        css = (
+            "/* banner */body{margin:0}.btn,.nav-item{color:red}"
+            ".card .card-body{padding:1rem}.d-flex:not(.x){display:flex}"
+            "@media (min-width:576px){.col-sm{flex:1}.row{display:flex}}"
+            "@keyframes spin{to{transform:rotate(1turn)}}"
+        )
+        self.assertEqual(
+            purge_css(css, {"nav-item", "d-flex", "col-sm"}),
+            "body{margin:0}.nav-item{color:red}.d-flex:not(.x){display:flex}"
+            "@media (min-width:576px){.col-sm{flex:1}}"
+            "@keyframes spin{to{transform:rotate(1turn)}}",
+        )
+
+
+class HashedStaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        settings = override_settings(STATIC_ROOT=directory.name)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name("root/style.css")
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertNotEqual(self.hashed, "root/style.css")
+        path = Path(staticfiles_storage.path(self.hashed))
+        self.assertEqual(
+            gzip.decompress(Path(f"{path}.gz").read_bytes()), path.read_bytes()
+        )
+
+    def test_hashed_files_are_served_compressed_and_immutable(self):
+        response = self.client.get(
+            f"/static/{self.hashed}", HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_plain_names_are_not_immutable(self):
+        response = self.client.get("/static/root/style.css")
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class VendoredBootstrapTests(SimpleTestCase):
+    def test_vendored_files_match_their_integrity_hashes(self):
+        for name, (_, expected) in BOOTSTRAP_FILES.items():
+            path = finders.find(f"{BOOTSTRAP_STATIC_DIR}/{name}")
+            self.assertEqual(integrity(Path(path).read_bytes()), expected)
+
+    def test_pages_load_the_vendored_files(self):
+        response = self.client.get("/")
+        self.assertContains(response, f"/static/{BOOTSTRAP_STATIC_DIR}/{PURGED_CSS}")
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lawyer = create_lawyer()
+        Matter.objects.create(
+            title="Lease review",
+            description="Test matter",
+            lawyer_key=self.lawyer,
+            client_key=create_client(),
+        )
+        self.url = reverse("Lawyer matters", args=[self.lawyer.pk])
+        # The session and user add two queries; a superuser's permission
+        # check adds none.
+        reader = User.objects.create_user("reader", is_superuser=True)
+        self.client.force_login(reader)
+        self.async_client.force_login(reader)
+
+    def test_header_reports_queries_and_phases(self):
+        with self.assertLogs("the_acce.timing", "INFO") as logs:
+            response = self.client.get(self.url)
+        header = response["Server-Timing"]
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="4 queries"')
+        for metric in ("tpl", "view", "total"):
+            self.assertRegex(header, rf"{metric};dur=[\d.]+")
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["path"], self.url)
+        self.assertEqual(line["queries"], 4)
+        self.assertEqual(len(logs.records), 1)
+
+    async def test_header_under_asgi(self):
+        with self.assertLogs("the_acce.timing", "INFO"):
+            response = await self.async_client.get(self.url)
+        self.assertIn('desc="4 queries"', response["Server-Timing"])
+
+    @override_settings(SERVER_TIMING_SLOW_MS=0)
+    def test_slow_requests_log_query_plans(self):
+        with self.assertLogs("the_acce.timing", "WARNING") as logs:
+            self.client.get(self.url)
+        slow = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual(len(slow), 4)
+        self.assertTrue(all(entry["plan"] for entry in slow))
+        self.assertIn("matters_matter", " ".join(entry["sql"] for entry in slow))
+
+
+class SeedScaleTests(TestCase):
+    def seed(self, **options):
+        call_command("seed_scale", lawyers=4, matters=10, stdout=StringIO(), **options)
+        return list(Matter.objects.order_by("key").values_list("key", "lawyer_key"))
+
+    def test_seeding_is_reproducible_and_summarised(self):
+        first = self.seed(seed=3)
+        self.assertEqual(len(first), 40)
+        self.assertEqual(Lawyer.objects.count(), 4)
+        self.assertEqual(find_drift(), [])
+        with self.assertRaises(CommandError):
+            self.seed(seed=3)
+        call_command("flush", interactive=False, verbosity=0)
+        self.assertEqual(self.seed(seed=3), first)
+
+
+class CompareTests(SimpleTestCase):
+    def results(self, queries, p95, rps):
+        return {
+            "routes": {
+                "/matters/": {
+                    "queries": queries,
+                    "levels": {"10": {"p95_ms": p95, "rps": rps}},
+                }
+            }
+        }
+
+    def test_within_threshold_passes(self):
+        baseline = self.results(2, 10.0, 500.0)
+        self.assertEqual(compare(baseline, self.results(2, 10.9, 460.0), 0.1), [])
+
+    def test_queries_latency_and_throughput_regressions(self):
+        baseline = self.results(2, 10.0, 500.0)
+        regressions = compare(baseline, self.results(3, 12.0, 400.0), 0.1)
+        self.assertEqual(len(regressions), 3)
+        self.assertIn("2 -> 3 queries", regressions[0])
+
+
+class TimeOrderedKeyTests(SimpleTestCase):
+    def test_keys_are_version_7_and_strictly_increasing(self):
+        keys = [uuid7() for _ in range(1000)]
+        self.assertEqual(
+            {(key.version, key.variant) for key in keys}, {(7, uuid.RFC_4122)}
+        )
+        self.assertEqual(keys, sorted(set(keys)))
+        # SQLite stores keys as hex, which must sort the same way.
+        self.assertEqual([key.hex for key in keys], sorted(key.hex for key in keys))
+
+    def test_the_clock_going_back_keeps_keys_increasing(self):
+        first = uuid7()
+        with mock.patch("time.time_ns", return_value=0):
+            second = uuid7()
+        self.assertGreater(second, first)
+        self.assertEqual(uuid7_datetime(second), uuid7_datetime(first))
+
+    def test_timestamps(self):
+        key = make_uuid7(1_704_067_200_000, 0, 0)
+        self.assertEqual(uuid7_datetime(key), datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.assertIsNone(uuid7_datetime(uuid.uuid4()))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1", "replica_2"])
+class ReplicaRouterTests(SimpleTestCase):
+    def view(self, request):
+        # Records where a read would go before and after an optional write.
+        request.reads = [router.db_for_read(Matter)]
+        if request.method == "POST":
+            router.db_for_write(Matter)
+            request.reads.append(router.db_for_read(Matter))
+        return HttpResponse()
+
+    def get_response(self, method="get", **cookies):
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies)
+        response = ReplicaStickinessMiddleware(self.view)(request)
+        return request.reads, response
+
+    def test_reads_go_to_replicas_until_a_write(self):
+        with routing() as state:
+            self.assertIn(router.db_for_read(Matter), ["replica_1", "replica_2"])
+            self.assertEqual(router.db_for_read(User), "default")
+            self.assertEqual(router.db_for_write(Matter), "default")
+            self.assertEqual(router.db_for_read(Matter), "default")
+        self.assertTrue(state.wrote)
+
+    def test_cache_fills_read_from_the_primary(self):
+        with routing():
+            with from_primary():
+                self.assertEqual(router.db_for_read(Matter), "default")
+            self.assertNotEqual(router.db_for_read(Matter), "default")
+            with from_primary():
+                router.db_for_write(Matter)
+            # Having written, it stays on the primary.
+            self.assertEqual(router.db_for_read(Matter), "default")
+
+    def test_writers_read_from_the_primary_for_a_window(self):
+        reads, response = self.get_response()
+        self.assertIn(reads[0], ["replica_1", "replica_2"])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        reads, response = self.get_response("post")
+        self.assertEqual(reads[1], "default")
+        cookie = response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], 5)
+
+        reads, _ = self.get_response(**{STICKY_COOKIE: cookie.value})
+        self.assertEqual(reads, ["default"])
+        expired = f"{time.time() - 1:.3f}"
+        reads, _ = self.get_response(**{STICKY_COOKIE: expired})
+        self.assertNotEqual(reads, ["default"])
+
+    def test_forged_cookies_are_ignored(self):
+        for value in [f"{time.time() + 3600:.3f}", "soon"]:
+            reads, _ = self.get_response(**{STICKY_COOKIE: value})
+            self.assertNotEqual(reads, ["default"])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(router.allow_migrate("replica_1", "matters"), False)
+        self.assertIs(router.allow_migrate("default", "matters"), True)
+
+
+class MoneyTests(SimpleTestCase):
+    def test_arithmetic_is_exact(self):
+        total = sum([Money.of("0.10"), Money.of("0.20"), Money.of(0.3)])
+        self.assertEqual(total, Money.of("0.60"))
+        self.assertEqual(str(total * 3 - Money.of(2)), "-0.20")
+        self.assertEqual(f"{Money.of(150):>8}", "  150.00")
+        self.assertEqual(Money.of("1234567.89").minor, 123456789)
+        self.assertEqual(str(Money.of(5, "JPY")), "5")
+        self.assertLess(Money(1), Money(2))
+        self.assertFalse(Money(0))
+
+    def test_ambiguous_amounts_are_refused(self):
+        for amount in ["1.001", "ten", "NaN", None]:
+            with self.assertRaises(ValueError):
+                Money.of(amount)
+        with self.assertRaises(ValueError):
+            Money(1, "USD") + Money(1, "EUR")
+        with self.assertRaises(TypeError):
+            Money(100) * Decimal("1.5")
+        self.assertNotEqual(Money(100), Decimal(1))
+
+    def test_immutable_and_picklable(self):
+        money = Money.of("12.34")
+        with self.assertRaises(AttributeError):
+            money.minor = 0
+        self.assertEqual(pickle.loads(pickle.dumps(money)), money)
+        self.assertEqual(len({money, Money(1234)}), 1)
+
+
+class MoneyFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+
+    def make_matter(self, title, amount):
+        return Matter.objects.create(
+            title=title,
+            description="Test matter",
+            lawyer_key=self.lawyer,
+            client_key=self.client_,
+            amount=amount,
+        )
+
+    def test_amounts_above_the_old_cap_round_trip(self):
+        matter = self.make_matter("Merger", Decimal("1234567.89"))
+        self.make_matter("Lease", "0.11")
+        self.assertEqual(matter.amount, Money(123456789))
+        matter.refresh_from_db()
+        self.assertEqual(matter.amount, Money.of("1234567.89"))
+        self.assertEqual(
+            list(Matter.objects.filter(amount__gt=10_000).values_list("title")),
+            [("Merger",)],
+        )
+        totals = Matter.objects.aggregate(Sum("amount"))
+        self.assertEqual(totals["amount__sum"], Money.of("1234568.00"))
+        rows = "".join(iter_rows(Matter.objects.filter(pk=matter.pk), ["amount"]))
+        self.assertEqual(rows, "amount\r\n1234567.89\r\n")
+
+    def test_cleaning(self):
+        matter = Matter(title="Lease", description="Test matter", amount="1.001")
+        with self.assertRaises(ValidationError) as raised:
+            matter.clean_fields(exclude=["lawyer_key", "client_key"])
+        self.assertIn("amount", raised.exception.message_dict)
+        matter.amount = -1
+        with self.assertRaises(ValidationError):
+            matter.clean_fields(exclude=["lawyer_key", "client_key"])
+
+    def test_form_fields_see_unchanged_amounts(self):
+        field = Matter._meta.get_field("amount").formfield()
+        self.assertFalse(field.has_changed(Money.of("150"), "150.00"))
+        self.assertFalse(field.has_changed(Money.of("150"), "150"))
+        self.assertTrue(field.has_changed(Money.of("150"), "150.01"))
+        self.assertEqual(field.prepare_value(Money.of("150")), Decimal("150.00"))
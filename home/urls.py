@@ -5,4 +5,5 @@ from . import views
 urlpatterns = [
     path("", views.index, name="index"),
     path("looksgood", views.template_test, name="Template test"),
+    path("cache-stats", views.cache_stats, name="Cache stats"),
 ]
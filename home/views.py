@@ -1,6 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.views import generic
 
+from the_acce import cache
+
 
 def index(request):
     return render(
@@ -8,8 +12,15 @@ def index(request):
         "index.html",
     )
 
+
 def template_test(request):
     return render(
         request,
         "test.html",
     )
+
+
+@staff_member_required
+def cache_stats(request):
+    """Reports fragment cache hits and misses for monitoring."""
+    return JsonResponse(cache.stats())
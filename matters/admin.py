@@ -1,10 +1,120 @@
 from django.contrib import admin
 
-from .models import Client, Contact, Lawyer, Location, Matter, Pretask
-
-admin.site.register(Matter)
-admin.site.register(Contact)
-admin.site.register(Pretask)
-admin.site.register(Location)
-admin.site.register(Lawyer)
-admin.site.register(Client)
+from the_acce.admin import ScalableModelAdmin
+from the_acce.exports import export_action
+
+from . import archive, ledger
+from .models import ArchivedMatter, ArchivedPretask, Contact, Matter, Pretask, TimeEntry
+
+
+@admin.register(Matter)
+class MatterAdmin(ScalableModelAdmin):
+    actions = [export_action("Export selected matters as CSV")]
+    list_display = [
+        "title",
+        "lawyer_key",
+        "client_key",
+        "cost_type",
+        "amount",
+        "due_date",
+        "is_active",
+        "pretask_progress",
+    ]
+    list_select_related = ["lawyer_key", "client_key"]
+    # Due date ranges are read from matter_due_idx.
+    list_filter = ["is_active", "due_date"]
+    # Exact keys and case-sensitive title prefixes; both can use an index.
+    search_fields = ["=key", "^title"]
+    raw_id_fields = ["lawyer_key", "client_key"]
+
+    @admin.display(description="Pre-tasks done", ordering="pretask_completed")
+    def pretask_progress(self, matter):
+        # Read from the matter's own counters, so it costs no extra queries.
+        return f"{matter.pretask_completed} of {matter.pretask_total}"
+
+
+@admin.register(Contact)
+class ContactAdmin(ScalableModelAdmin):
+    list_display = ["first_name", "last_name", "company", "email"]
+    search_fields = ["=key", "=email", "^last_name"]
+    raw_id_fields = ["address", "matter_key"]
+
+
+@admin.register(Pretask)
+class PretaskAdmin(ScalableModelAdmin):
+    list_display = ["title", "matter_key", "is_complete", "is_active"]
+    list_select_related = ["matter_key"]
+    list_filter = ["is_complete", "is_active"]
+    search_fields = ["=key", "^title"]
+    raw_id_fields = ["matter_key"]
+
+
+@admin.register(TimeEntry)
+class TimeEntryAdmin(ScalableModelAdmin):
+    list_display = ["started_at", "matter", "lawyer", "hours", "note"]
+    list_select_related = ["matter", "lawyer"]
+    # Entries by matter and start are read from time_entry_matter_idx.
+    search_fields = ["=matter__key"]
+    raw_id_fields = ["matter", "lawyer"]
+    fields = ["matter", "lawyer", "started_at", "ended_at", "hours", "note"]
+
+    # The ledger is append-only: a wrong entry is corrected by adding one
+    # with negative hours.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        ledger.append([obj])
+
+
+class ArchivedPretaskInline(admin.TabularInline):
+    model = ArchivedPretask
+    fields = ["title", "is_complete", "is_active"]
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedMatter)
+class ArchivedMatterAdmin(ScalableModelAdmin):
+    actions = [
+        "restore_matters",
+        export_action("Export selected archived matters as CSV"),
+    ]
+    list_display = [
+        "title",
+        "lawyer_key",
+        "client_key",
+        "cost_type",
+        "amount",
+        "due_date",
+        "archived_at",
+    ]
+    list_select_related = ["lawyer_key", "client_key"]
+    search_fields = ["=key", "^title"]
+    inlines = [ArchivedPretaskInline]
+
+    # Archived matters are read only; restore one to change it.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    # Restoring puts matters back where they can be changed.
+    def has_restore_permission(self, request):
+        return request.user.has_perm("matters.change_matter")
+
+    @admin.action(description="Restore selected matters", permissions=["restore"])
+    def restore_matters(self, request, queryset):
+        count = archive.restore(queryset.values_list("pk", flat=True))
+        self.message_user(request, f"Restored {count} matters.")
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MattersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "matters"
+
+    def ready(self):
+        # Connects the handlers that keep LawyerMatterSummary, pre-task
+        # progress, reminders, cached pages and the search index current.
+        from . import signals
+
+        post_migrate.connect(signals.ensure_search_index, sender=self)
@@ -0,0 +1,272 @@
+"""Hot/cold archival of inactive matters.
+
+Finished matters used to stay in the hot tables for good, so every index
+and scan of matters, pre-tasks, contact links and time entries kept growing
+with them. archive() moves inactive matters last due (or started, if they
+have no due date) before a cutoff into tables of their own: ArchivedMatter,
+ArchivedPretask, ArchivedTimeEntry, and ArchivedMatter.contacts for the
+contact links. Time rollups are derived from the entries, so they are
+dropped, and rebuilt by restore(), which moves everything else back as it
+was.
+
+Each batch moves in one transaction, in primary key order, after checking
+again under lock that its matters are still archivable. An interrupted run
+loses nothing, and running it again carries on with the matters still hot.
+
+Archived matters leave the hot paths: overview pages, search, lawyer
+summaries and hours reports count hot matters only. find() and lookup()
+read matters wherever they are.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import DateTimeField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from the_acce.cache import bump
+from the_acce.routers import from_primary
+
+from . import ledger, reminders, summaries
+from .models import (
+    ArchivedMatter,
+    ArchivedPretask,
+    ArchivedTimeEntry,
+    Contact,
+    Matter,
+    Pretask,
+    TimeEntry,
+    TimeRollup,
+)
+
+# Matters moved per transaction, well inside SQLite's variable limit.
+BATCH_SIZE = 500
+
+HotLinks = Contact.matter_key.through
+ArchivedLinks = ArchivedMatter.contacts.through
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+# Columns copied each way: all of the archive tables' but archived_at.
+MATTER_COLUMNS = [name for name in _columns(ArchivedMatter) if name != "archived_at"]
+PRETASK_COLUMNS = _columns(ArchivedPretask)
+TIME_ENTRY_COLUMNS = _columns(ArchivedTimeEntry)
+
+# The tables an unarchived matter has rows in.
+HOT_MODELS = [Matter, Pretask, HotLinks, TimeEntry, TimeRollup]
+
+
+def cutoff(days=None, now=None):
+    """Returns the date inactive matters must be last due before to archive."""
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.localdate(now) - timedelta(days=days)
+
+
+def archivable(before):
+    """Returns the hot matters that are inactive and last due before a date."""
+    return Matter.objects.annotate(last_date=Coalesce("due_date", "start_date")).filter(
+        is_active=False, last_date__lt=before
+    )
+
+
+def archive(before, batch_size=BATCH_SIZE, limit=None):
+    """Moves archivable matters, up to limit, to the archive tables.
+
+    Walks the matters table once, in key order. Yields how many matters
+    each batch moved.
+    """
+    candidates = archivable(before).order_by("key").values_list("key", flat=True)
+    moved, last_key = 0, None
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        batch = candidates if last_key is None else candidates.filter(key__gt=last_key)
+        with from_primary():
+            keys = list(batch[:size])
+        if not keys:
+            return
+        last_key = keys[-1]
+        count = archive_matters(keys, before)
+        moved += count
+        yield count
+
+
+def archive_matters(keys, before):
+    """Moves the matters with keys that are still archivable. Returns how many."""
+    with from_primary(), transaction.atomic():
+        rows = (
+            archivable(before)
+            .filter(pk__in=keys)
+            .select_for_update()
+            .values(*MATTER_COLUMNS)
+        )
+        archived_at = timezone.now()
+        matters = [ArchivedMatter(archived_at=archived_at, **row) for row in rows]
+        if not matters:
+            return 0
+        keys = [matter.pk for matter in matters]
+        ArchivedMatter.objects.bulk_create(matters)
+        ArchivedPretask.objects.bulk_create(
+            ArchivedPretask(**row)
+            for row in Pretask.objects.filter(matter_key__in=keys).values(
+                *PRETASK_COLUMNS
+            )
+        )
+        ArchivedTimeEntry.objects.bulk_create(
+            ArchivedTimeEntry(**row)
+            for row in TimeEntry.objects.filter(matter__in=keys).values(
+                *TIME_ENTRY_COLUMNS
+            )
+        )
+        ArchivedLinks.objects.bulk_create(
+            ArchivedLinks(archivedmatter_id=matter_id, contact_id=contact_id)
+            for matter_id, contact_id in HotLinks.objects.filter(
+                matter__in=keys
+            ).values_list("matter", "contact")
+        )
+        # Deleting through the ORM would send signals row by row, to update
+        # the summaries, counters and caches that are updated once below.
+        for hot_rows in [
+            HotLinks.objects.filter(matter__in=keys),
+            Pretask.objects.filter(matter_key__in=keys),
+            TimeRollup.objects.filter(matter__in=keys),
+            TimeEntry.objects.filter(matter__in=keys),
+            Matter.objects.filter(pk__in=keys),
+        ]:
+            hot_rows._raw_delete(hot_rows.db)
+        summaries.matters_moved(map(summaries.summary_state, matters), -1)
+    bump(*{("lawyer-matters", matter.lawyer_key_id) for matter in matters})
+    return len(matters)
+
+
+def restore(keys, batch_size=BATCH_SIZE):
+    """Moves archived matters back to the hot tables. Returns how many."""
+    keys = list(keys)
+    return sum(
+        restore_matters(keys[start : start + batch_size])
+        for start in range(0, len(keys), batch_size)
+    )
+
+
+def restore_matters(keys):
+    with from_primary(), transaction.atomic():
+        rows = (
+            ArchivedMatter.objects.filter(pk__in=keys)
+            .select_for_update()
+            .values(*MATTER_COLUMNS)
+        )
+        # Pre-tasks add themselves to the counters as they are created.
+        matters = [
+            Matter(**dict(row, pretask_total=0, pretask_completed=0)) for row in rows
+        ]
+        if not matters:
+            return 0
+        keys = [matter.pk for matter in matters]
+        reminders.schedule(matters)
+        Matter.objects.bulk_create(matters)
+        Pretask.objects.bulk_create(
+            [
+                Pretask(**row)
+                for row in ArchivedPretask.objects.filter(matter_key__in=keys).values(
+                    *PRETASK_COLUMNS
+                )
+            ]
+        )
+        entries = [
+            TimeEntry(**row)
+            for row in ArchivedTimeEntry.objects.filter(matter__in=keys).values(
+                *TIME_ENTRY_COLUMNS
+            )
+        ]
+        TimeEntry.objects.bulk_create(entries)
+        ledger.add_to_buckets(entries)
+        HotLinks.objects.bulk_create(
+            HotLinks(matter_id=matter_id, contact_id=contact_id)
+            for matter_id, contact_id in ArchivedLinks.objects.filter(
+                archivedmatter__in=keys
+            ).values_list("archivedmatter", "contact")
+        )
+        ArchivedMatter.objects.filter(pk__in=keys).delete()
+        summaries.matters_moved(map(summaries.summary_state, matters), 1)
+    bump(*{("lawyer-matters", matter.lawyer_key_id) for matter in matters})
+    return len(matters)
+
+
+def find(*fields, **filters):
+    """Returns matters matching filters, hot and archived, as dicts.
+
+    One query over both tables, to order and slice like any other: fields
+    and filters may use the columns they share. Each row has archived_at,
+    which is None for hot matters.
+    """
+    fields = fields or MATTER_COLUMNS
+    hot = (
+        Matter.objects.filter(**filters)
+        .order_by()
+        .values(*fields, archived_at=Value(None, output_field=DateTimeField()))
+    )
+    archived = (
+        ArchivedMatter.objects.filter(**filters)
+        .order_by()
+        .values(*fields, "archived_at")
+    )
+    return hot.union(archived, all=True)
+
+
+def lookup(key):
+    """Returns the Matter with key, else the ArchivedMatter, else None."""
+    return (
+        Matter.objects.filter(pk=key).first()
+        or ArchivedMatter.objects.filter(pk=key).first()
+    )
+
+
+def table_bytes(connection, table):
+    """Returns the size of a table and its indexes, or None if unknown."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+        elif connection.vendor == "sqlite":
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+                    [table],
+                )
+            except DatabaseError:
+                # SQLite built without the dbstat table.
+                return None
+        else:
+            return None
+        return cursor.fetchone()[0]
+
+
+def vacuum(connection):
+    """Gives the space of archived rows back, so the hot tables shrink.
+
+    Deleting rows only frees their space for reuse: the tables and indexes
+    keep their size until they are rewritten. SQLite rewrites the whole
+    database file; PostgreSQL's VACUUM FULL locks each table while it runs.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("VACUUM")
+        elif connection.vendor == "postgresql":
+            for model in HOT_MODELS:
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f"VACUUM FULL ANALYZE {table}")
+
+
+def hot_table_sizes(connection):
+    """Returns {table: (rows, bytes or None)} for the hot tables."""
+    return {
+        model._meta.db_table: (
+            model.objects.using(connection.alias).count(),
+            table_bytes(connection, model._meta.db_table),
+        )
+        for model in HOT_MODELS
+    }
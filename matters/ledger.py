@@ -0,0 +1,318 @@
+"""Append-only ledger of time worked, with daily and weekly rollups.
+
+A TimeEntry is never changed once written; a mistake is put right by
+appending one with negative hours. append() writes entries and, in the same
+transaction, adds their hours to:
+
+* a TimeRollup bucket per matter, lawyer and day or week, with INSERT ...
+  ON CONFLICT DO UPDATE, so concurrent writers add to a bucket without
+  reading it first or racing each other to create it;
+* Matter.logged_hours and the LawyerMatterSummary of the matter's lawyer,
+  by F() deltas.
+
+Period reports read the buckets of a date range in one index range scan
+instead of summing entries. rebuild() recomputes buckets and logged_hours
+from the entries; see the rebuild_time_rollups command.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from the_acce.cache import bump
+
+from . import summaries
+from .models import Matter, TimeEntry, TimeRollup
+
+Periods = TimeRollup.Periods
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+SECONDS_PER_HOUR = Decimal(3600)
+# Matters updated per statement, well inside SQLite's variable limit.
+BATCH_SIZE = 500
+# Note on the entries holding hours logged before the ledger existed.
+OPENING_NOTE = "Hours logged before the time ledger."
+
+BUCKET_FIELDS = ["period", "start", "matter", "lawyer", "hours", "entry_count"]
+
+
+def period_start(period, day):
+    """Returns the first day of the day or week bucket that day falls in."""
+    if period == Periods.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def entry(matter, lawyer, started_at, ended_at, hours=None, note=""):
+    """Returns an unsaved TimeEntry. hours default to the time in between."""
+    if hours is None:
+        hours = Decimal((ended_at - started_at).total_seconds()) / SECONDS_PER_HOUR
+    return TimeEntry(
+        matter=matter,
+        lawyer=lawyer,
+        started_at=started_at,
+        ended_at=ended_at,
+        hours=Decimal(hours).quantize(CENT),
+        note=note,
+    )
+
+
+def log(matter, lawyer, started_at, ended_at, hours=None, note=""):
+    """Appends one entry to the ledger and returns it."""
+    [saved] = append([entry(matter, lawyer, started_at, ended_at, hours, note)])
+    return saved
+
+
+def append(entries, batch_size=1000):
+    """Appends entries to the ledger and adds their hours wherever they count.
+
+    Returns the entries.
+    """
+    entries = list(entries)
+    with transaction.atomic():
+        if len(entries) == 1:
+            # bulk_create() leaves the pk unset on backends that can't return
+            # it (SQLite on Django 3.2); callers of a single entry, such as
+            # the admin, need it.
+            entries[0].save(force_insert=True)
+        else:
+            TimeEntry.objects.bulk_create(entries, batch_size=batch_size)
+        add_to_buckets(entries)
+        add_to_matters(entries)
+    return entries
+
+
+def open_balances(matters, batch_size=1000):
+    """Writes an opening entry for each matter created with hours logged.
+
+    For matters inserted by bulk_create() with logged_hours set: their
+    logged_hours and summaries count those hours already, so only entries
+    and buckets are added. Returns how many entries were written.
+    """
+    today = timezone.localdate()
+    entries = []
+    for matter in matters:
+        if matter.logged_hours:
+            day = min(matter.start_date, today)
+            opened = timezone.make_aware(datetime.combine(day, time()))
+            entries.append(
+                TimeEntry(
+                    matter_id=matter.pk,
+                    lawyer_id=matter.lawyer_key_id,
+                    started_at=opened,
+                    ended_at=opened,
+                    hours=matter.logged_hours,
+                    note=OPENING_NOTE,
+                )
+            )
+    with transaction.atomic():
+        TimeEntry.objects.bulk_create(entries, batch_size=batch_size)
+        add_to_buckets(entries)
+    return len(entries)
+
+
+def add_to_buckets(entries):
+    """Adds the entries' hours to their day and week buckets."""
+    buckets = defaultdict(lambda: [ZERO, 0])
+    for time_entry in entries:
+        day = timezone.localdate(time_entry.started_at)
+        for period in Periods.values:
+            bucket = buckets[
+                period,
+                period_start(period, day),
+                time_entry.matter_id,
+                time_entry.lawyer_id,
+            ]
+            bucket[0] += time_entry.hours
+            bucket[1] += 1
+    upsert_buckets(buckets)
+
+
+def upsert_buckets(buckets):
+    """Adds {(period, start, matter id, lawyer id): (hours, count)} to buckets.
+
+    Creates missing buckets in the same statement, so concurrent writers
+    never read a bucket or race to create it. Buckets are written in key
+    order, so writers that share buckets don't deadlock.
+    """
+    if not buckets:
+        return
+    connection = connections[router.db_for_write(TimeRollup)]
+    quote = connection.ops.quote_name
+    fields = [TimeRollup._meta.get_field(name) for name in BUCKET_FIELDS]
+    table = quote(TimeRollup._meta.db_table)
+    columns = [quote(field.column) for field in fields]
+    hours, count = columns[-2:]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(columns[:-2])}) DO UPDATE SET "
+        f"{hours} = {table}.{hours} + EXCLUDED.{hours}, "
+        f"{count} = {table}.{count} + EXCLUDED.{count}"
+    )
+    params = [
+        [
+            field.get_db_prep_save(value, connection)
+            for field, value in zip(fields, (*key, *totals))
+        ]
+        for key, totals in sorted(buckets.items())
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def add_to_matters(entries):
+    """Adds the entries' hours to their matters' logged_hours and summaries."""
+    matter_hours = defaultdict(Decimal)
+    for time_entry in entries:
+        matter_hours[time_entry.matter_id] += time_entry.hours
+    by_hours = defaultdict(list)
+    for matter_id, hours in matter_hours.items():
+        if hours:
+            by_hours[hours].append(matter_id)
+    lawyers = {}
+    for hours, matter_ids in by_hours.items():
+        for start in range(0, len(matter_ids), BATCH_SIZE):
+            matters = Matter.objects.filter(
+                pk__in=matter_ids[start : start + BATCH_SIZE]
+            )
+            matters.update(logged_hours=F("logged_hours") + hours)
+            lawyers.update(matters.values_list("pk", "lawyer_key_id"))
+    lawyer_hours = defaultdict(Decimal)
+    for matter_id, lawyer_id in lawyers.items():
+        lawyer_hours[lawyer_id] += matter_hours[matter_id]
+    summaries.add_logged_hours(lawyer_hours)
+    bump(
+        *(("matter", matter_id) for matter_id in lawyers),
+        *(("lawyer-matters", lawyer_id) for lawyer_id in lawyer_hours),
+    )
+
+
+def period_hours(period, start, end, lawyer_id=None, matter_id=None):
+    """Returns [(bucket start, hours)] for buckets from start until end.
+
+    end is excluded. Reads the buckets in one range query, optionally only
+    those of one lawyer or matter.
+    """
+    rollups = TimeRollup.objects.filter(
+        period=period, start__gte=start, start__lt=end
+    ).order_by("start")
+    if lawyer_id is not None:
+        rollups = rollups.filter(lawyer_id=lawyer_id)
+    if matter_id is not None:
+        rollups = rollups.filter(matter_id=matter_id)
+    # SQLite sums decimals as floats; round back to the stored precision.
+    return [
+        (day, Decimal(hours).quantize(CENT))
+        for day, hours in rollups.values_list("start").annotate(hours=Sum("hours"))
+    ]
+
+
+def entry_buckets():
+    """Returns the buckets aggregated from the entries, keyed like TimeRollup."""
+    buckets = defaultdict(lambda: [ZERO, 0])
+    days = (
+        TimeEntry.objects.order_by()
+        .annotate(day=TruncDate("started_at"))
+        .values_list("day", "matter", "lawyer")
+        .annotate(hours=Sum("hours"), count=Count("id"))
+    )
+    for day, matter_id, lawyer_id, hours, count in days:
+        for period in Periods.values:
+            bucket = buckets[period, period_start(period, day), matter_id, lawyer_id]
+            bucket[0] += Decimal(hours).quantize(CENT)
+            bucket[1] += count
+    return {key: tuple(totals) for key, totals in buckets.items()}
+
+
+def stored_buckets():
+    return {
+        (period, start, matter_id, lawyer_id): (hours, count)
+        for period, start, matter_id, lawyer_id, hours, count in (
+            TimeRollup.objects.values_list(*BUCKET_FIELDS)
+        )
+    }
+
+
+def entry_hours():
+    """Returns {matter id: hours} summed from the entries."""
+    return {
+        matter_id: Decimal(hours).quantize(CENT)
+        for matter_id, hours in TimeEntry.objects.order_by()
+        .values_list("matter")
+        .annotate(hours=Sum("hours"))
+    }
+
+
+def find_drift():
+    """Returns (bucket keys, matter ids) that differ from the entries."""
+    expected, stored = entry_buckets(), stored_buckets()
+    buckets = [
+        key
+        for key in expected.keys() | stored.keys()
+        if expected.get(key, (ZERO, 0)) != stored.get(key, (ZERO, 0))
+    ]
+    return buckets, _drifted_matters(entry_hours())
+
+
+def _drifted_matters(hours):
+    logged = dict(
+        Matter.objects.exclude(logged_hours=0).values_list("pk", "logged_hours")
+    )
+    return [
+        matter_id
+        for matter_id in logged.keys() | hours.keys()
+        if logged.get(matter_id, ZERO) != hours.get(matter_id, ZERO)
+    ]
+
+
+def rebuild(batch_size=1000):
+    """Recomputes the buckets, and drifted matters' logged_hours, from entries.
+
+    Returns (bucket count, ids of the matters whose logged_hours changed).
+    """
+    buckets = entry_buckets()
+    hours = entry_hours()
+    with transaction.atomic():
+        TimeRollup.objects.all().delete()
+        TimeRollup.objects.bulk_create(
+            (
+                TimeRollup(
+                    period=period,
+                    start=start,
+                    matter_id=matter_id,
+                    lawyer_id=lawyer_id,
+                    hours=bucket_hours,
+                    entry_count=count,
+                )
+                for (period, start, matter_id, lawyer_id), (
+                    bucket_hours,
+                    count,
+                ) in buckets.items()
+            ),
+            batch_size=batch_size,
+        )
+        drifted = _drifted_matters(hours)
+        for matter_id in drifted:
+            Matter.objects.filter(pk=matter_id).update(
+                logged_hours=hours.get(matter_id, ZERO)
+            )
+        lawyer_ids = set()
+        for start in range(0, len(drifted), BATCH_SIZE):
+            lawyer_ids.update(
+                Matter.objects.filter(pk__in=drifted[start : start + BATCH_SIZE])
+                .values_list("lawyer_key_id", flat=True)
+                .distinct()
+            )
+        summaries.refresh_summaries(lawyer_ids)
+    bump(
+        *(("matter", matter_id) for matter_id in drifted),
+        *(("lawyer-matters", lawyer_id) for lawyer_id in lawyer_ids),
+    )
+    return len(buckets), drifted
@@ -0,0 +1,137 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from matters import archive
+from matters.models import Matter
+from matters.pagination import keyset_page
+
+
+def latency_queries(connection):
+    """Returns {name: function} of hot-path reads to time around a run."""
+    matters = Matter.objects.using(connection.alias)
+    lawyer = matters.order_by("lawyer_key").values_list("lawyer_key", flat=True)[:1]
+    lawyer = lawyer[0] if lawyer else None
+    return {
+        "lawyer page": lambda: keyset_page(matters.filter(lawyer_key=lawyer)),
+        "lawyer count": lambda: matters.filter(lawyer_key=lawyer).count(),
+        "title page": lambda: list(matters.order_by("title", "key")[:50]),
+        "count": lambda: matters.count(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves inactive matters last due more than ARCHIVE_AFTER_DAYS ago, "
+        "with their pre-tasks, contact links and time entries, to the archive "
+        "tables, in batches that each commit; run it again to carry on after "
+        "an interruption. Reports the hot tables' size and query latency "
+        "before and after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            metavar="DAYS",
+            help="Archive matters last due more than DAYS ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=archive.BATCH_SIZE)
+        parser.add_argument("--limit", type=int, help="Archive at most this many.")
+        parser.add_argument(
+            "--restore",
+            nargs="+",
+            metavar="KEY",
+            help="Move these archived matters back instead.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report how many matters would be archived.",
+        )
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help="Rewrite the hot tables afterwards, so they shrink on disk.",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--json", action="store_true", help="Print JSON only.")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            count = archive.restore(options["restore"], options["batch_size"])
+            self.stdout.write(f"Restored {count} matters.")
+            return
+        before = archive.cutoff(options["older_than"])
+        if options["check"]:
+            count = archive.archivable(before).count()
+            self.stdout.write(f"{count} matters last due before {before} to archive.")
+            return
+
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        connection = connections[options["database"]]
+        # The same lawyer's matters are timed before and after.
+        queries = latency_queries(connection)
+        report = {"before": self.measure(connection, queries, options["repeat"])}
+        began = time.perf_counter()
+        moved = sum(archive.archive(before, options["batch_size"], options["limit"]))
+        report["archived"] = moved
+        report["seconds"] = time.perf_counter() - began
+        if options["vacuum"]:
+            archive.vacuum(connection)
+        report["after"] = self.measure(connection, queries, options["repeat"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"Archived {moved} matters last due before {before} "
+            f"in {report['seconds']:.1f}s."
+        )
+        self.write_report(report)
+
+    def measure(self, connection, queries, repeat):
+        latency = {}
+        for name, query in queries.items():
+            # Untimed, so the first run's cold cache doesn't count.
+            query()
+            timings = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - began) * 1000)
+            latency[name] = statistics.median(timings)
+        return {
+            "tables": {
+                table: {"rows": rows, "bytes": size}
+                for table, (rows, size) in archive.hot_table_sizes(connection).items()
+            },
+            "latency_ms": latency,
+        }
+
+    def write_report(self, report):
+        before, after = report["before"], report["after"]
+        self.stdout.write(
+            f"{'hot table':<28} {'rows before':>12} {'rows after':>12} "
+            f"{'MB before':>10} {'MB after':>10}"
+        )
+        for table, was in before["tables"].items():
+            now = after["tables"][table]
+            self.stdout.write(
+                f"{table:<28} {was['rows']:>12} {now['rows']:>12} "
+                f"{megabytes(was['bytes']):>10} {megabytes(now['bytes']):>10}"
+            )
+        self.stdout.write(f"{'query (median)':<28} {'ms before':>12} {'ms after':>12}")
+        for name, was in before["latency_ms"].items():
+            self.stdout.write(
+                f"{name:<28} {was:>12.2f} {after['latency_ms'][name]:>12.2f}"
+            )
+
+
+def megabytes(size):
+    return "-" if size is None else f"{size / 2**20:.1f}"
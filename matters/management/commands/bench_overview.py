@@ -0,0 +1,85 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from accounts.parties import create_client, create_lawyer
+from matters.models import Matter
+from matters.pagination import DEFAULT_PAGE_SIZE, keyset_page
+from matters.views import lawyer_overview
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark data once timings are taken."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the lawyer matters overview at increasing page depths. "
+        "All rows it creates are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=1000)
+        parser.add_argument("--size", type=int, default=DEFAULT_PAGE_SIZE)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        pages, size, repeat = options["pages"], options["size"], options["repeat"]
+        try:
+            with transaction.atomic():
+                self.run(pages, size, repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, pages, size, repeat):
+        lawyer = create_lawyer()
+        client = create_client()
+        Matter.objects.bulk_create(
+            (
+                Matter(
+                    title=f"Matter {n:07d}",
+                    description="Benchmark matter",
+                    lawyer_key=lawyer,
+                    client_key=client,
+                )
+                for n in range(pages * size)
+            ),
+            batch_size=1000,
+        )
+        factory = RequestFactory()
+        # A superuser passes the view's permission check without a query, so
+        # only the page's own queries are counted.
+        reader = User(is_active=True, is_superuser=True)
+        path = f"/matters/lawyer/{lawyer.pk}/"
+
+        # Walk every page once to collect the cursor for each depth.
+        cursors = {1: None}
+        matters = Matter.objects.filter(lawyer_key=lawyer)
+        for number in range(2, pages + 1):
+            cursors[number] = keyset_page(
+                matters, after=cursors[number - 1], size=size
+            ).next_cursor
+
+        depths = [n for n in (1, 10, 100, 1000, 10000) if n <= pages]
+        for depth in depths:
+            params = {"size": size}
+            if cursors[depth]:
+                params["after"] = cursors[depth]
+            timings = []
+            for _ in range(repeat):
+                request = factory.get(path, params)
+                request.user = reader
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    lawyer_overview(request, lawyer.pk)
+                    timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"page {depth:>5}: median {statistics.median(timings):7.2f} ms, "
+                f"max {max(timings):7.2f} ms, {len(queries)} queries"
+            )
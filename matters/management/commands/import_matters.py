@@ -0,0 +1,326 @@
+import csv
+import json
+import time
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import Client, Lawyer, Location
+from matters import ledger, reminders
+from matters.models import Contact, Matter, Pretask
+from matters.summaries import refresh_summaries
+from the_acce.cache import bump
+
+# Related columns each model accepts, mapped to the model the id must exist in.
+FOREIGN_KEYS = {
+    Matter: {"lawyer_key": Lawyer, "client_key": Client},
+    Contact: {"address": Location},
+    Pretask: {"matter_key": Matter},
+}
+MODELS = {"matter": Matter, "contact": Contact, "pretask": Pretask}
+# Column listing the matters a contact works on, separated by semicolons.
+CONTACT_MATTERS_COLUMN = "matters"
+# Distinct values whose cleaned form is remembered, per column.
+CLEANED_VALUES_CACHED = 4096
+
+
+class Unparsed(str):
+    """A JSON Lines line that isn't JSON, rejected with the reason why."""
+
+    def __new__(cls, line, error):
+        unparsed = super().__new__(cls, line.rstrip("\n"))
+        unparsed.reason = f"Not valid JSON: {error}"
+        return unparsed
+
+
+def read_rows(path, file_format):
+    """Yields (line number, row) without holding the file in memory.
+
+    Rows are dicts, unless a JSON Lines line holds some other JSON value, or
+    none: then it is yielded as it is, or as an Unparsed string.
+    """
+    with open(path, newline="", encoding="utf-8") as handle:
+        if file_format == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(handle, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError as error:
+                        yield number, Unparsed(line, error)
+
+
+def cleaner(field):
+    """Returns a function that cleans a column's values as field.clean() does.
+
+    Cleaning without a model instance depends on the value alone, and most
+    columns repeat theirs (flags, choices, dates, amounts), so results for
+    scalar values are cached. Cleaned values are immutable, so sharing them
+    between rows is safe.
+    """
+
+    @lru_cache(CLEANED_VALUES_CACHED, typed=True)
+    def clean_scalar(value):
+        return field.clean(value, None)
+
+    def clean(value):
+        if isinstance(value, (str, int, float)):
+            return clean_scalar(value)
+        return field.clean(value, None)
+
+    return clean
+
+
+def chunks(iterable, size):
+    """Yields lists of at most size items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports matters, contacts or pre-tasks from a CSV or JSONL file. "
+        "Columns are model field names; related rows are referenced by id. "
+        "Rows failing validation are written to a reject file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--model", choices=sorted(MODELS), default="matter")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format. Defaults to the file extension.",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--rejects",
+            help="Where to write rejected rows. Defaults to <path>.rejects.jsonl.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("Pass --format csv or --format jsonl.")
+        self.model = MODELS[options["model"]]
+        self.foreign_keys = FOREIGN_KEYS[self.model]
+        self.fields = {field.name: field for field in self.model._meta.concrete_fields}
+        self.cleaners = {
+            name: cleaner(field)
+            for name, field in self.fields.items()
+            if name not in self.foreign_keys
+        }
+        rejects_path = options["rejects"] or f"{path}.rejects.jsonl"
+
+        imported = rejected = 0
+        lawyer_ids = set()
+        start = time.perf_counter()
+        rows = read_rows(path, file_format)
+        with open(rejects_path, "w", encoding="utf-8") as rejects:
+            for chunk in chunks(rows, options["batch_size"]):
+                instances, errors = self.validate(chunk)
+                for line, row, error in errors:
+                    rejects.write(
+                        json.dumps({"line": line, "row": row, "errors": error}) + "\n"
+                    )
+                self.write(instances)
+                if self.model is Matter:
+                    lawyer_ids.update(
+                        instance.lawyer_key_id for instance, _ in instances
+                    )
+                imported += len(instances)
+                rejected += len(errors)
+        if lawyer_ids:
+            # bulk_create skips the signals that keep summaries and cached
+            # overview pages current.
+            refresh_summaries(lawyer_ids)
+            bump(*(("lawyer-matters", lawyer_id) for lawyer_id in lawyer_ids))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Imported {imported} rows, rejected {rejected} "
+            f"in {elapsed:.2f}s ({imported / elapsed if elapsed else 0:.0f} rows/s)."
+        )
+        if rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}.")
+
+    def validate(self, chunk):
+        """Returns ([(instance, related matter keys)], [(line, row, errors)]).
+
+        Rows are checked as dicts: each given column with its field's
+        clean(), as clean_fields() would, and the model's clean() rules with
+        validate_batch() over the whole chunk. Instances are only built for
+        the rows that pass.
+        """
+        related_ids = {name: set() for name in self.foreign_keys}
+        candidates, errors = [], []
+        for line, row in chunk:
+            if isinstance(row, Unparsed):
+                # A JSON Lines line that didn't parse; see read_rows().
+                errors.append((line, row, {NON_FIELD_ERRORS: [row.reason]}))
+                continue
+            if not isinstance(row, dict):
+                errors.append(
+                    (line, row, {NON_FIELD_ERRORS: ["A row must be a JSON object."]})
+                )
+                continue
+            row = dict(row)
+            matter_keys = self.pop_matter_keys(row)
+            # csv.DictReader files surplus values under the None key.
+            unknown = (
+                set(map(str, row))
+                - set(self.fields)
+                - {f"{name}_id" for name in self.foreign_keys}
+            )
+            if unknown:
+                errors.append(
+                    (
+                        line,
+                        row,
+                        {NON_FIELD_ERRORS: [f"Unknown columns: {sorted(unknown)}"]},
+                    )
+                )
+                continue
+            values, field_errors = {}, {}
+            for name, value in row.items():
+                name = name[:-3] if name[:-3] in self.foreign_keys else name
+                field = self.fields[name]
+                try:
+                    if name in self.foreign_keys:
+                        if value in ("", None):
+                            value = None
+                        else:
+                            value = field.target_field.to_python(value)
+                            related_ids[name].add(value)
+                    else:
+                        if value in ("", None) and not field.null:
+                            # The field's default, if it has one, else blank.
+                            value = field.get_default()
+                        value = self.cleaners[name](value)
+                except ValidationError as error:
+                    field_errors[name] = error.messages
+                    continue
+                values[name] = value
+            if field_errors:
+                errors.append((line, row, field_errors))
+                continue
+            # Defaults are valid already, so only given columns are cleaned.
+            for name, field in self.fields.items():
+                if name not in values:
+                    values[name] = (
+                        None if name in self.foreign_keys else field.get_default()
+                    )
+            candidates.append((line, row, values, matter_keys))
+
+        validate_batch = getattr(self.model, "validate_batch", None)
+        if validate_batch is not None and candidates:
+            codes = validate_batch([values for _, _, values, _ in candidates])
+            passed = []
+            for candidate, code in zip(candidates, codes):
+                if code is None:
+                    passed.append(candidate)
+                else:
+                    line, row, *_ = candidate
+                    message = self.model.CLEAN_ERRORS[code]
+                    errors.append((line, row, {NON_FIELD_ERRORS: [message]}))
+            candidates = passed
+
+        pk = self.model._meta.pk.name
+        keys = [values[pk] for _, _, values, _ in candidates]
+        taken = set(self.model.objects.filter(pk__in=keys).values_list("pk", flat=True))
+        existing = {
+            name: set(
+                model.objects.filter(pk__in=related_ids[name]).values_list(
+                    "pk", flat=True
+                )
+            )
+            for name, model in self.foreign_keys.items()
+        }
+        if self.model is Contact:
+            keys = {key for *_, matter_keys in candidates for key in matter_keys}
+            existing[CONTACT_MATTERS_COLUMN] = set(
+                Matter.objects.filter(pk__in=keys).values_list("pk", flat=True)
+            )
+
+        instances = []
+        for line, row, values, matter_keys in candidates:
+            if values[pk] in taken:
+                errors.append((line, row, {"key": ["This key already exists."]}))
+                continue
+            # A key repeated later in the file is rejected like one in the table.
+            taken.add(values[pk])
+            missing = {}
+            for name in self.foreign_keys:
+                field = self.fields[name]
+                value = values[name]
+                if value is None and not field.null:
+                    missing[name] = ["This field cannot be blank."]
+                elif value is not None and value not in existing[name]:
+                    missing[name] = [f"No {name} with id {value}."]
+            unknown_matters = [
+                key
+                for key in matter_keys
+                if key not in existing.get(CONTACT_MATTERS_COLUMN, ())
+            ]
+            if unknown_matters:
+                missing[CONTACT_MATTERS_COLUMN] = [
+                    f"No matters with keys {[str(key) for key in unknown_matters]}."
+                ]
+            if missing:
+                errors.append((line, row, missing))
+            else:
+                # Positional arguments, in field order, take Model.__init__'s
+                # quick path, as rows loaded from the database do.
+                instance = self.model(*(values[name] for name in self.fields))
+                instances.append((instance, matter_keys))
+        errors.sort(key=lambda error: error[0])
+        return instances, errors
+
+    def pop_matter_keys(self, row):
+        """Removes and parses the matters column of a contact row."""
+        if self.model is not Contact:
+            return []
+        value = row.pop(CONTACT_MATTERS_COLUMN, None) or []
+        if isinstance(value, str):
+            value = [key for key in value.split(";") if key.strip()]
+        field = Matter._meta.pk
+        try:
+            return [field.to_python(key.strip()) for key in value]
+        except ValidationError:
+            # Reported as missing matters by validate().
+            return [str(key) for key in value]
+
+    def write(self, instances):
+        """Inserts one chunk of validated rows in a single transaction."""
+        if not instances:
+            return
+        if self.model is Matter:
+            # bulk_create skips the signal that schedules reminders.
+            reminders.schedule(instance for instance, _ in instances)
+        with transaction.atomic():
+            self.model.objects.bulk_create(
+                [instance for instance, _ in instances], batch_size=500
+            )
+            if self.model is Matter:
+                # Imported hours enter the time ledger as opening entries.
+                ledger.open_balances([instance for instance, _ in instances], 500)
+            if self.model is Contact:
+                Through = Contact.matter_key.through
+                Through.objects.bulk_create(
+                    [
+                        Through(contact_id=instance.pk, matter_id=key)
+                        for instance, matter_keys in instances
+                        for key in matter_keys
+                    ],
+                    batch_size=500,
+                )
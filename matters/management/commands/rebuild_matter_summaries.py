@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from matters.summaries import find_drift, rebuild_summaries
+from the_acce.cache import bump
+
+
+class Command(BaseCommand):
+    help = "Rebuilds every LawyerMatterSummary row from the matters table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report lawyers whose summary has drifted; exit non-zero if any.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = find_drift()
+        if options["check"]:
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} lawyer summaries have drifted: "
+                    + ", ".join(str(lawyer_id) for lawyer_id in drifted[:20])
+                )
+            self.stdout.write("All lawyer summaries match their matters.")
+            return
+        count = rebuild_summaries()
+        # Cached overview pages show the summary, so expire the changed ones.
+        bump(*(("lawyer-matters", lawyer_id) for lawyer_id in drifted))
+        self.stdout.write(
+            f"Rebuilt {count} lawyer summaries ({len(drifted)} had drifted)."
+        )
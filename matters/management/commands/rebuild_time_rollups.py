@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from matters.ledger import find_drift, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the day and week time rollups, and matters' logged hours, "
+        "from the time entries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report rollups and matters that have drifted; exit non-zero if any.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            buckets, matters = find_drift()
+            if buckets or matters:
+                raise CommandError(
+                    f"{len(buckets)} time rollups and {len(matters)} matters' "
+                    "logged hours differ from their time entries: "
+                    + ", ".join(str(key) for key in matters[:20])
+                )
+            self.stdout.write("All time rollups and logged hours match their entries.")
+            return
+        count, drifted = rebuild()
+        self.stdout.write(
+            f"Rebuilt {count} time rollups; corrected the logged hours of "
+            f"{len(drifted)} matters."
+        )
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from matters import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the full-text search index of matters, contacts and "
+        "pretasks, installing it first where it is missing. Run it after "
+        "VACUUM on SQLite, which may renumber the rows the index points at."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=[model._meta.model_name for model in search.SEARCH_FIELDS],
+            action="append",
+            help="Only rebuild this model's index; may be repeated.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        models = [
+            model
+            for model in search.SEARCH_FIELDS
+            if not options["model"] or model._meta.model_name in options["model"]
+        ]
+        with transaction.atomic(using=connection.alias):
+            installed = search.ensure_installed(connection)
+            for model in models:
+                if model in installed:
+                    self.stdout.write(f"Installed the {model._meta.model_name} index.")
+                    continue
+                start = time.perf_counter()
+                search.rebuild(connection, [model])
+                self.stdout.write(
+                    f"Rebuilt the {model._meta.model_name} index in "
+                    f"{time.perf_counter() - start:.1f} s."
+                )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from matters.progress import find_drift, repair
+
+
+class Command(BaseCommand):
+    help = "Recounts the pre-task progress of every matter whose counters drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report matters whose counters have drifted; exit non-zero if any.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drifted = find_drift()
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} matters' pre-task counters have drifted: "
+                    + ", ".join(str(key) for key in drifted[:20])
+                )
+            self.stdout.write("All pre-task counters match their pre-tasks.")
+            return
+        repaired = repair()
+        self.stdout.write(f"Recounted pre-task progress of {len(repaired)} matters.")
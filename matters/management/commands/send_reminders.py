@@ -0,0 +1,133 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from matters.models import Matter
+from matters.reminders import claim, deliver, reschedule
+
+
+def aware_datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class Command(BaseCommand):
+    help = (
+        "Emails the due-date reminders that have fallen due, claiming matters "
+        "in batches so several workers can run at once, and reports "
+        "throughput and how long claims took."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Threads claiming and sending batches concurrently.",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Keep sending, waiting this many seconds between rounds.",
+        )
+        parser.add_argument(
+            "--until",
+            type=aware_datetime,
+            help="Send reminders due by this ISO time instead of now, e.g. to "
+            "measure working through a backlog.",
+        )
+        parser.add_argument(
+            "--reschedule",
+            action="store_true",
+            help="Only recompute every matter's next reminder from its due date.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON only.")
+
+    def handle(self, *args, **options):
+        if options["reschedule"]:
+            reschedule(Matter.objects.all())
+            self.stdout.write("Rescheduled the reminders of every matter.")
+            return
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("Batch size and workers must be at least 1.")
+        while True:
+            self.report(self.send_round(options), options)
+            if options["every"] is None:
+                return
+            time.sleep(options["every"])
+
+    def send_round(self, options):
+        """Sends every reminder due, in batches spread over the workers."""
+        began = time.perf_counter()
+        if options["workers"] == 1:
+            results = [self.work(options["batch_size"], options["until"])]
+        else:
+            with ThreadPoolExecutor(options["workers"]) as pool:
+                futures = [
+                    pool.submit(self.work_in_thread, options)
+                    for _ in range(options["workers"])
+                ]
+                results = [future.result() for future in futures]
+        claims = [seconds for result in results for seconds in result[0]]
+        matters = sum(result[1] for result in results)
+        seconds = time.perf_counter() - began
+        return {
+            "matters": matters,
+            "emails": sum(result[2] for result in results),
+            "batches": sum(len(result[0]) - 1 for result in results),
+            "seconds": seconds,
+            "matters_per_second": matters / seconds if seconds else 0,
+            "claim_ms": {
+                "median": statistics.median(claims) * 1000,
+                "p95": sorted(claims)[int(len(claims) * 0.95)] * 1000,
+                "max": max(claims) * 1000,
+            },
+        }
+
+    def work_in_thread(self, options):
+        try:
+            return self.work(options["batch_size"], options["until"])
+        finally:
+            connections.close_all()
+
+    def work(self, batch_size, until):
+        """Claims and sends batches until none are due.
+
+        Returns (seconds each claim took, matters reminded, emails sent); the
+        last claim is the one that found nothing.
+        """
+        claims, matters, emails = [], 0, 0
+        with get_connection() as mail:
+            while True:
+                began = time.perf_counter()
+                claim_id, keys = claim(batch_size, until)
+                claims.append(time.perf_counter() - began)
+                if not keys:
+                    return claims, matters, emails
+                emails += deliver(claim_id, keys, until, mail)
+                matters += len(keys)
+
+    def report(self, stats, options):
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+        if options["every"] is not None and not stats["matters"]:
+            return
+        claim_ms = stats["claim_ms"]
+        self.stdout.write(
+            f"Sent {stats['emails']} emails for {stats['matters']} matters in "
+            f"{stats['batches']} batches in {stats['seconds']:.2f}s "
+            f"({stats['matters_per_second']:.0f} matters/s). Claims took "
+            f"{claim_ms['median']:.2f} ms median, {claim_ms['p95']:.2f} ms p95, "
+            f"{claim_ms['max']:.2f} ms max."
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matters', '0002_add_budget_field'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matter',
+            index=models.Index(fields=['lawyer_key', 'title', 'key'], name='matter_lawyer_title_idx'),
+        ),
+    ]
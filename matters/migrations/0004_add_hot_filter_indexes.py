@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matters', '0003_add_lawyer_title_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matter',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['lawyer_key', 'due_date'], name='matter_active_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pretask',
+            index=models.Index(condition=models.Q(('is_complete', False)), fields=['matter_key'], name='pretask_incomplete_idx'),
+        ),
+    ]
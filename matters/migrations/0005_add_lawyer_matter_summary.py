@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    """Seeds a summary row for every lawyer who already has matters."""
+    Matter = apps.get_model('matters', 'Matter')
+    LawyerMatterSummary = apps.get_model('matters', 'LawyerMatterSummary')
+    rows = Matter.objects.order_by().values('lawyer_key_id').annotate(
+        matter_count=models.Count('key'),
+        total_amount=models.Sum('amount'),
+        total_budget=models.Sum('budget'),
+        total_estimated_hours=models.Sum('estimated_hours'),
+        total_logged_hours=models.Sum('logged_hours'),
+        over_budget_count=models.Count('key', filter=models.Q(amount__gt=models.F('budget'))),
+    )
+    LawyerMatterSummary.objects.bulk_create(
+        (LawyerMatterSummary(lawyer_id=row.pop('lawyer_key_id'), **row) for row in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matters', '0004_add_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LawyerMatterSummary',
+            fields=[
+                ('lawyer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='matter_summary', serialize=False, to='matters.lawyer')),
+                ('matter_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_budget', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_estimated_hours', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_logged_hours', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('over_budget_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
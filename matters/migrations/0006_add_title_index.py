@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matters', '0005_add_lawyer_matter_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matter',
+            index=models.Index(fields=['title', '-key'], name='matter_title_idx'),
+        ),
+    ]
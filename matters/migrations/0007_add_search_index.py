@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# The searchable columns as of this migration. matters.search keeps the live
+# definitions and reinstalls missing indexes after every migrate; this copy
+# stays frozen so the migration doesn't change when that module does.
+SEARCH_COLUMNS = {
+    "matters_matter": ["title", "description"],
+    "matters_contact": ["last_name", "first_name", "company"],
+    "matters_pretask": ["title", "description"],
+}
+
+
+def sqlite_install(table, columns):
+    fts = f"{table}_fts"
+    listed = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({listed}, "
+        f"content='{table}', content_rowid='rowid', "
+        f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+        f"BEGIN INSERT INTO {fts}(rowid, {listed}) VALUES (new.rowid, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, {listed}) "
+        f"VALUES ('delete', old.rowid, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {listed} "
+        f"ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, {listed}) "
+        f"VALUES ('delete', old.rowid, {old}); "
+        f"INSERT INTO {fts}(rowid, {listed}) VALUES (new.rowid, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        f"INSERT INTO {fts}({fts}) VALUES ('optimize')",
+    ]
+
+
+def sqlite_uninstall(table, columns):
+    fts = f"{table}_fts"
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_{trigger}"
+        for trigger in ("insert", "delete", "update")
+    ] + [f"DROP TABLE IF EXISTS {fts}"]
+
+
+def postgresql_install(table, columns):
+    labels = "ABCD"
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce({column}, '')), "
+        f"'{labels[min(rank, 3)]}')"
+        for rank, column in enumerate(columns)
+    )
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} "
+        f"USING gin (search_vector)",
+    ]
+
+
+def postgresql_uninstall(table, columns):
+    return [
+        f"DROP INDEX IF EXISTS {table}_search_idx",
+        f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector",
+    ]
+
+
+STATEMENTS = {
+    "sqlite": (sqlite_install, sqlite_uninstall),
+    "postgresql": (postgresql_install, postgresql_uninstall),
+}
+
+
+def run(schema_editor, which):
+    # Other databases search with icontains and need no index.
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for table, columns in SEARCH_COLUMNS.items():
+        for statement in statements[which](table, columns):
+            schema_editor.execute(statement)
+
+
+def install_search_index(apps, schema_editor):
+    run(schema_editor, 0)
+
+
+def uninstall_search_index(apps, schema_editor):
+    run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matters", "0006_add_title_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
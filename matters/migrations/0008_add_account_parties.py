@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """First of three steps moving matters onto the accounts app's parties.
+
+    The new foreign keys are added beside the old ones here, filled in by
+    0009 and swapped in by 0010. Each step is its own transaction, since
+    PostgreSQL can't alter a table with pending foreign key checks.
+    """
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("matters", "0007_add_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="matter",
+            name="lawyer",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="accounts.lawyer",
+            ),
+        ),
+        migrations.AddField(
+            model_name="matter",
+            name="client",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="accounts.client",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="location",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="accounts.location",
+            ),
+        ),
+    ]
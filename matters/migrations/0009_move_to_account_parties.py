@@ -0,0 +1,73 @@
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.db import migrations
+
+# Account.UserTypes
+LAWYER, CLIENT = 1, 2
+
+
+def adopt(apps, model_name, user_type, old_ids):
+    """Returns {old id: new id}, giving each old party a placeholder account.
+
+    The old rows had no columns, so nothing links them to a real account.
+    Each becomes an account of its own, with an unusable password and a
+    username naming its origin, which an admin can later merge or rename.
+    """
+    User = apps.get_model("auth", "User")
+    Account = apps.get_model("accounts", "Account")
+    Party = apps.get_model("accounts", model_name)
+    prefix = f"matters-{model_name.lower()}-"
+    password = make_password(None)
+    User.objects.bulk_create(
+        (User(username=f"{prefix}{old_id}", password=password) for old_id in old_ids),
+        batch_size=1000,
+    )
+    users = dict(
+        User.objects.filter(username__startswith=prefix).values_list("username", "pk")
+    )
+    Account.objects.bulk_create(
+        (
+            Account(user_id=user_id, key=uuid.uuid4(), user_type=user_type)
+            for user_id in users.values()
+        ),
+        batch_size=1000,
+    )
+    Party.objects.bulk_create(
+        (Party(account_id=user_id) for user_id in users.values()), batch_size=1000
+    )
+    return {int(username[len(prefix) :]): pk for username, pk in users.items()}
+
+
+def move_to_account_parties(apps, schema_editor):
+    Matter = apps.get_model("matters", "Matter")
+    Contact = apps.get_model("matters", "Contact")
+    Lawyer = apps.get_model("matters", "Lawyer")
+    Client = apps.get_model("matters", "Client")
+    Location = apps.get_model("matters", "Location")
+    Summary = apps.get_model("matters", "LawyerMatterSummary")
+    AccountLocation = apps.get_model("accounts", "Location")
+
+    lawyers = adopt(apps, "Lawyer", LAWYER, Lawyer.objects.values_list("pk", flat=True))
+    for old_id, new_id in lawyers.items():
+        Matter.objects.filter(lawyer_key_id=old_id).update(lawyer_id=new_id)
+    clients = adopt(apps, "Client", CLIENT, Client.objects.values_list("pk", flat=True))
+    for old_id, new_id in clients.items():
+        Matter.objects.filter(client_key_id=old_id).update(client_id=new_id)
+    for old_id in Location.objects.values_list("pk", flat=True):
+        new_id = AccountLocation.objects.create().pk
+        Contact.objects.filter(address_id=old_id).update(location_id=new_id)
+    # Summaries are derived from matters; 0010 recounts them once rekeyed.
+    Summary.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("matters", "0008_add_account_parties"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_to_account_parties),
+    ]
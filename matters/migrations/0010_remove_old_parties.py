@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+
+def recount_summaries(apps, schema_editor):
+    """Rebuilds LawyerMatterSummary, as summaries.rebuild_summaries() does."""
+    Matter = apps.get_model("matters", "Matter")
+    Summary = apps.get_model("matters", "LawyerMatterSummary")
+    rows = (
+        Matter.objects.order_by()
+        .values("lawyer_key_id")
+        .annotate(
+            matter_count=Count("key"),
+            total_amount=Coalesce(Sum("amount"), ZERO),
+            total_budget=Coalesce(Sum("budget"), ZERO),
+            total_estimated_hours=Coalesce(Sum("estimated_hours"), ZERO),
+            total_logged_hours=Coalesce(Sum("logged_hours"), ZERO),
+            over_budget_count=Count("key", filter=Q(amount__gt=F("budget"))),
+        )
+    )
+    Summary.objects.bulk_create(
+        (
+            Summary(
+                lawyer_id=row.pop("lawyer_key_id"),
+                **{
+                    column: (
+                        Decimal(value).quantize(CENT)
+                        if column.startswith("total_")
+                        else value
+                    )
+                    for column, value in row.items()
+                },
+            )
+            for row in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matters", "0009_move_to_account_parties"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="matter",
+            name="matter_lawyer_title_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="matter",
+            name="matter_active_due_idx",
+        ),
+        migrations.RemoveField(
+            model_name="matter",
+            name="lawyer_key",
+        ),
+        migrations.RemoveField(
+            model_name="matter",
+            name="client_key",
+        ),
+        migrations.RemoveField(
+            model_name="contact",
+            name="address",
+        ),
+        migrations.RenameField(
+            model_name="matter",
+            old_name="lawyer",
+            new_name="lawyer_key",
+        ),
+        migrations.RenameField(
+            model_name="matter",
+            old_name="client",
+            new_name="client_key",
+        ),
+        migrations.RenameField(
+            model_name="contact",
+            old_name="location",
+            new_name="address",
+        ),
+        migrations.AlterField(
+            model_name="matter",
+            name="lawyer_key",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="matters",
+                to="accounts.lawyer",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="matter",
+            name="client_key",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="matters",
+                to="accounts.client",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="contact",
+            name="address",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="accounts.location",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="matter",
+            index=models.Index(
+                fields=["lawyer_key", "title", "key"], name="matter_lawyer_title_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="matter",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["lawyer_key", "due_date"],
+                name="matter_active_due_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="lawyermattersummary",
+            name="lawyer",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                primary_key=True,
+                related_name="matter_summary",
+                serialize=False,
+                to="accounts.lawyer",
+            ),
+        ),
+        migrations.DeleteModel(
+            name="Client",
+        ),
+        migrations.DeleteModel(
+            name="Lawyer",
+        ),
+        migrations.DeleteModel(
+            name="Location",
+        ),
+        migrations.RunPython(recount_summaries),
+    ]
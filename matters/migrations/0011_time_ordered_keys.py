@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:54
+
+from django.db import migrations, models
+import the_acce.uuids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matters", "0010_remove_old_parties"),
+    ]
+
+    # Defaults live in Python, not the schema, so there is nothing to do in
+    # the database: existing rows keep their version 4 keys and new rows get
+    # time-ordered ones. Altering the fields would rebuild SQLite tables.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="contact",
+                    name="key",
+                    field=models.UUIDField(
+                        default=the_acce.uuids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="matter",
+                    name="key",
+                    field=models.UUIDField(
+                        default=the_acce.uuids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="pretask",
+                    name="key",
+                    field=models.UUIDField(
+                        default=the_acce.uuids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+            ],
+        ),
+    ]
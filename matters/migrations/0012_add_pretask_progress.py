@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:01
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_pretasks(apps, schema_editor):
+    """Sets the counters of every matter that already has pre-tasks."""
+    Matter = apps.get_model("matters", "Matter")
+    Pretask = apps.get_model("matters", "Pretask")
+    active = (
+        Pretask.objects.filter(matter_key=models.OuterRef("pk"), is_active=True)
+        .order_by()
+        .values("matter_key")
+    )
+    Matter.objects.filter(
+        models.Exists(Pretask.objects.filter(matter_key=models.OuterRef("pk")))
+    ).update(
+        pretask_total=Coalesce(
+            models.Subquery(active.annotate(count=models.Count("pk")).values("count")),
+            0,
+        ),
+        pretask_completed=Coalesce(
+            models.Subquery(
+                active.filter(is_complete=True)
+                .annotate(count=models.Count("pk"))
+                .values("count")
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matters", "0011_time_ordered_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="matter",
+            name="pretask_completed",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="matter",
+            name="pretask_total",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_pretasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,178 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:12
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def open_balances(apps, schema_editor):
+    """Turns each matter's logged_hours into an opening entry and buckets."""
+    Matter = apps.get_model("matters", "Matter")
+    TimeEntry = apps.get_model("matters", "TimeEntry")
+    TimeRollup = apps.get_model("matters", "TimeRollup")
+    today = django.utils.timezone.localdate()
+    buckets = defaultdict(lambda: [Decimal(0), 0])
+    entries = []
+    matters = (
+        Matter.objects.exclude(logged_hours=0)
+        .order_by()
+        .values_list("key", "lawyer_key_id", "start_date", "logged_hours")
+    )
+    for key, lawyer_id, start_date, hours in matters.iterator(chunk_size=2000):
+        day = min(start_date, today)
+        opened = django.utils.timezone.make_aware(datetime.combine(day, time()))
+        entries.append(
+            TimeEntry(
+                matter_id=key,
+                lawyer_id=lawyer_id,
+                started_at=opened,
+                ended_at=opened,
+                hours=hours,
+                note="Hours logged before the time ledger.",
+            )
+        )
+        for period, start in (("D", day), ("W", day - timedelta(days=day.weekday()))):
+            bucket = buckets[period, start, key, lawyer_id]
+            bucket[0] += hours
+            bucket[1] += 1
+        if len(entries) == 2000:
+            TimeEntry.objects.bulk_create(entries)
+            entries = []
+    TimeEntry.objects.bulk_create(entries)
+    TimeRollup.objects.bulk_create(
+        (
+            TimeRollup(
+                period=period,
+                start=start,
+                matter_id=key,
+                lawyer_id=lawyer_id,
+                hours=hours,
+                entry_count=count,
+            )
+            for (period, start, key, lawyer_id), (hours, count) in buckets.items()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_unique_key"),
+        ("matters", "0012_add_pretask_progress"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="matter",
+            name="logged_hours",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                editable=False,
+                help_text="Approximate how many hours you have worked. This can not exceed estimated hours without your client's permission.",
+                max_digits=6,
+                validators=[
+                    django.core.validators.MinValueValidator(Decimal("0.00")),
+                    django.core.validators.MaxValueValidator(Decimal("9999.99")),
+                ],
+            ),
+        ),
+        migrations.CreateModel(
+            name="TimeRollup",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("D", "Day"), ("W", "Week")], max_length=1
+                    ),
+                ),
+                ("start", models.DateField()),
+                (
+                    "hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("entry_count", models.IntegerField(default=0)),
+                (
+                    "lawyer",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_rollups",
+                        to="accounts.lawyer",
+                    ),
+                ),
+                (
+                    "matter",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_rollups",
+                        to="matters.matter",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TimeEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("started_at", models.DateTimeField()),
+                ("ended_at", models.DateTimeField()),
+                ("hours", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("note", models.CharField(blank=True, max_length=256)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "lawyer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_entries",
+                        to="accounts.lawyer",
+                    ),
+                ),
+                (
+                    "matter",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_entries",
+                        to="matters.matter",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "time entries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="timerollup",
+            index=models.Index(
+                fields=["lawyer", "period", "start"], name="time_rollup_lawyer_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timerollup",
+            index=models.Index(
+                fields=["matter", "period", "start"], name="time_rollup_matter_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="timerollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "start", "matter", "lawyer"),
+                name="time_rollup_bucket",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timeentry",
+            index=models.Index(
+                fields=["matter", "started_at"], name="time_entry_matter_idx"
+            ),
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
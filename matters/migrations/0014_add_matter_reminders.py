@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:23
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_reminders(apps, schema_editor):
+    """Sets the next reminder of every active matter not yet past due."""
+    Matter = apps.get_model("matters", "Matter")
+    now = timezone.now()
+    pending = Matter.objects.filter(
+        is_active=True, due_date__gte=timezone.localdate(now)
+    )
+    due_dates = sorted(pending.order_by().values_list("due_date", flat=True).distinct())
+    for start in range(0, len(due_dates), 500):
+        chunk = due_dates[start : start + 500]
+        whens = []
+        for due_date in chunk:
+            times = sorted(
+                timezone.make_aware(
+                    datetime.combine(
+                        due_date - timedelta(days=days), time(settings.REMINDER_HOUR)
+                    )
+                )
+                for days in set(settings.REMINDER_DAYS_BEFORE)
+            )
+            at = next((at for at in times if at > now), None)
+            whens.append(models.When(due_date=due_date, then=models.Value(at)))
+        pending.filter(due_date__in=chunk).update(
+            next_reminder_at=models.Case(
+                *whens, default=None, output_field=models.DateTimeField()
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matters", "0013_add_time_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="matter",
+            name="next_reminder_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="matter",
+            name="reminder_claim",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="matter",
+            index=models.Index(
+                condition=models.Q(("next_reminder_at__isnull", False)),
+                fields=["next_reminder_at"],
+                name="matter_reminder_idx",
+            ),
+        ),
+        migrations.RunPython(schedule_reminders, migrations.RunPython.noop),
+    ]
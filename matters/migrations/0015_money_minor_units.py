@@ -0,0 +1,88 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:34
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Round
+
+import the_acce.money
+
+# Money columns, by model, that held whole units and now hold cents.
+MONEY_FIELDS = {
+    "matter": ["amount", "budget"],
+    "lawyermattersummary": ["total_amount", "total_budget"],
+}
+
+
+def times(field, factor):
+    return models.F(field) * models.Value(
+        Decimal(factor), output_field=models.DecimalField()
+    )
+
+
+def to_minor_units(apps, schema_editor):
+    """Turns amounts into whole cents, rounding away SQLite's float error."""
+    for model_name, fields in MONEY_FIELDS.items():
+        Model = apps.get_model("matters", model_name)
+        Model.objects.update(**{field: Round(times(field, 100)) for field in fields})
+
+
+def to_whole_units(apps, schema_editor):
+    for model_name, fields in MONEY_FIELDS.items():
+        Model = apps.get_model("matters", model_name)
+        Model.objects.update(**{field: times(field, "0.01") for field in fields})
+
+
+def widen(model_name, name):
+    """Makes room for an amount in cents while the column is still decimal."""
+    return migrations.AlterField(
+        model_name=model_name,
+        name=name,
+        field=models.DecimalField(decimal_places=2, default=0, max_digits=20),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matters", "0014_add_matter_reminders"),
+    ]
+
+    # Each column is widened, scaled to cents, then altered to a BIGINT, so
+    # no amount is truncated on the way on PostgreSQL or SQLite.
+    operations = [
+        *(
+            widen(model_name, name)
+            for model_name, fields in MONEY_FIELDS.items()
+            for name in fields
+        ),
+        migrations.RunPython(to_minor_units, to_whole_units),
+        migrations.AlterField(
+            model_name="lawyermattersummary",
+            name="total_amount",
+            field=the_acce.money.MoneyField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="lawyermattersummary",
+            name="total_budget",
+            field=the_acce.money.MoneyField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="matter",
+            name="amount",
+            field=the_acce.money.MoneyField(
+                default=0,
+                help_text="Include all costs related to the matter.",
+                validators=[the_acce.money.validate_not_negative],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="matter",
+            name="budget",
+            field=the_acce.money.MoneyField(
+                default=100,
+                help_text="Set the limit for spending on this matter.",
+                validators=[the_acce.money.validate_not_negative],
+            ),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import the_acce.money
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_unique_key"),
+        ("matters", "0015_money_minor_units"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedMatter",
+            fields=[
+                (
+                    "key",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("title", models.CharField(max_length=64)),
+                ("description", models.CharField(max_length=512)),
+                (
+                    "cost_type",
+                    models.CharField(
+                        choices=[("P", "Price"), ("R", "Rate")], max_length=1
+                    ),
+                ),
+                ("amount", the_acce.money.MoneyField()),
+                ("budget", the_acce.money.MoneyField()),
+                (
+                    "estimated_hours",
+                    models.DecimalField(decimal_places=2, max_digits=6),
+                ),
+                ("logged_hours", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("start_date", models.DateField()),
+                ("due_date", models.DateField(blank=True, null=True)),
+                ("has_client_permission", models.BooleanField()),
+                ("has_external_services", models.BooleanField()),
+                ("has_client_pre_tasks", models.BooleanField()),
+                ("has_related_articles", models.BooleanField()),
+                ("is_changeable", models.BooleanField()),
+                ("is_active", models.BooleanField()),
+                ("pretask_total", models.IntegerField()),
+                ("pretask_completed", models.IntegerField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "client_key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_matters",
+                        to="accounts.client",
+                    ),
+                ),
+                (
+                    "contacts",
+                    models.ManyToManyField(
+                        related_name="archived_matters", to="matters.Contact"
+                    ),
+                ),
+                (
+                    "lawyer_key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_matters",
+                        to="accounts.lawyer",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["title"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedTimeEntry",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("started_at", models.DateTimeField()),
+                ("ended_at", models.DateTimeField()),
+                ("hours", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("note", models.CharField(blank=True, max_length=256)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "lawyer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_time_entries",
+                        to="accounts.lawyer",
+                    ),
+                ),
+                (
+                    "matter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_entries",
+                        to="matters.archivedmatter",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "archived time entries",
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedPretask",
+            fields=[
+                (
+                    "key",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("title", models.CharField(max_length=32)),
+                ("description", models.CharField(max_length=256)),
+                ("is_complete", models.BooleanField()),
+                ("is_active", models.BooleanField()),
+                (
+                    "matter_key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pretasks",
+                        to="matters.archivedmatter",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matters', '0016_add_matter_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['email'], name='contact_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['last_name'], name='contact_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matter',
+            index=models.Index(fields=['due_date'], name='matter_due_idx'),
+        ),
+    ]
@@ -1,19 +1,60 @@
-import uuid
 from datetime import date
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from the_acce.money import MoneyField, validate_not_negative
+from the_acce.uuids import uuid7
+from the_acce.validation import columns
+
 # Human-readable limits for positive integers.
 POSITIVE_DECIMAL_VALIDATORS = [
     MinValueValidator(Decimal("0.00")),
     MaxValueValidator(Decimal("9999.99")),
 ]
 
+# Matter fields maintained by progress.py, ledger.py and reminders.py rather
+# than by saving a Matter.
+MAINTAINED_FIELDS = [
+    "pretask_total",
+    "pretask_completed",
+    "logged_hours",
+    "next_reminder_at",
+    "reminder_claim",
+]
+
+
+class PretaskQuerySet(models.QuerySet):
+    """Bulk operations that keep the matters' pre-task counters current.
+
+    Saving or deleting a single pretask is handled by signals; these cover
+    the bulk methods that skip them. delete() sends the signals itself, and
+    bulk_update() goes through update().
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import progress
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        progress.pretasks_created(objs)
+        return objs
+
+    def update(self, **kwargs):
+        from . import progress
+
+        if not progress.COUNTED_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            old = progress.locked_states(self)
+            rows = super().update(**kwargs)
+            progress.pretasks_updated(old, kwargs)
+        return rows
+
 
 class Matter(models.Model):
     """Model representing a matter: a transaction between lawyer and client and/or the task a lawyer must carry out for the client."""
@@ -23,7 +64,7 @@ class Matter(models.Model):
         PRICE = "P", _("Price")
         RATE = "R", _("Rate")
 
-    key = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(
         max_length=64, help_text="Enter the title of the matter. Keep it short."
     )
@@ -36,17 +77,13 @@ class Matter(models.Model):
         default=CostTypes.PRICE,
         help_text=("Select the type of cost you will charge."),
     )
-    amount = models.DecimalField(
-        max_digits=6,
-        decimal_places=2,
-        validators=POSITIVE_DECIMAL_VALIDATORS,
+    amount = MoneyField(
+        validators=[validate_not_negative],
         default=0,
         help_text="Include all costs related to the matter.",
     )
-    budget = models.DecimalField(
-        max_digits=6,
-        decimal_places=2,
-        validators=POSITIVE_DECIMAL_VALIDATORS,
+    budget = MoneyField(
+        validators=[validate_not_negative],
         default=100,
         help_text="Set the limit for spending on this matter.",
     )
@@ -57,11 +94,13 @@ class Matter(models.Model):
         default=5,
         help_text=("Approximate how many hours you will work."),
     )
+    # The sum of the matter's time entries, kept by ledger.py.
     logged_hours = models.DecimalField(
         max_digits=6,
         decimal_places=2,
         validators=POSITIVE_DECIMAL_VALIDATORS,
         default=0,
+        editable=False,
         help_text=(
             "Approximate how many hours you have worked. "
             "This can not exceed estimated hours without your client's permission."
@@ -89,23 +128,85 @@ class Matter(models.Model):
         "Do you want to change the cost in the future?", default=False
     )
     is_active = models.BooleanField(default=True)
+    # Active pre-tasks, and how many of them are complete; see progress.py.
+    pretask_total = models.IntegerField(default=0, editable=False)
+    pretask_completed = models.IntegerField(default=0, editable=False)
+    # When the next due-date reminder is to be sent, or while a worker holds
+    # a claim on it, until when the claim lasts; see reminders.py.
+    next_reminder_at = models.DateTimeField(blank=True, null=True, editable=False)
+    reminder_claim = models.UUIDField(blank=True, null=True, editable=False)
     lawyer_key = models.ForeignKey(
-        "Lawyer",
+        "accounts.Lawyer",
         models.CASCADE,
+        related_name="matters",
     )
     client_key = models.ForeignKey(
-        "Client",
+        "accounts.Client",
         models.CASCADE,
+        related_name="matters",
     )
 
+    # Messages of the errors clean() raises, by code.
+    CLEAN_ERRORS = {
+        "pretasks_need_permission": (
+            "You must check in with your client if they have tasks to do before you can start!"
+        ),
+        "services_need_permission": (
+            "You must check in with your client before sharing their information with external services!"
+        ),
+        "work_needs_permission": (
+            "You can not have started without your client's permission. "
+            "Any work done without permission can not be logged nor charged!"
+        ),
+    }
+
     class Meta:
         # Order alphabetically by title
         ordering = ["title"]
+        indexes = [
+            # Serves keyset pages of a lawyer's matters in title order.
+            models.Index(
+                fields=["lawyer_key", "title", "key"], name="matter_lawyer_title_idx"
+            ),
+            # Active matters for a lawyer, soonest due first.
+            models.Index(
+                fields=["lawyer_key", "due_date"],
+                name="matter_active_due_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # The admin changelist's order: title, then -pk as a tiebreaker.
+            models.Index(fields=["title", "-key"], name="matter_title_idx"),
+            # The admin's due date filter, across all lawyers.
+            models.Index(fields=["due_date"], name="matter_due_idx"),
+            # Reminders in the order they fall due. Matters without one are
+            # left out, so the index holds only the pending ones.
+            models.Index(
+                fields=["next_reminder_at"],
+                name="matter_reminder_idx",
+                condition=models.Q(next_reminder_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         """Returns human-readable reference to model instance."""
         return self.title
 
+    def save(
+        self, force_insert=False, force_update=False, using=None, update_fields=None
+    ):
+        """Saves the matter, leaving MAINTAINED_FIELDS to their modules.
+
+        Those move by F() updates while the instance is in memory, so
+        writing back the values it was loaded with would undo them.
+        """
+        if update_fields is None and not force_insert and not self._state.adding:
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in MAINTAINED_FIELDS
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
     def get_absolute_url(self):
         """Returns the url to access a particular instance of the model."""
         return reverse("view", args=[str(self.key)])
@@ -115,25 +216,60 @@ class Matter(models.Model):
         if not self.has_client_permission:
             # Don't allow matters to begin without client permission to share involve external services or carry out pre-tasks.
             if self.has_client_pre_tasks:
-                raise ValidationError(
-                    "You must check in with your client if they have tasks to do before you can start!"
-                )
+                code = "pretasks_need_permission"
             elif self.has_external_services:
-                raise ValidationError(
-                    "You must check in with your client before sharing their information with external services!"
-                )
+                code = "services_need_permission"
             # Don't allow client to be charged for work that they haven't permitted.
             elif self.logged_hours or (self.start_date < date.today()):
-                raise ValidationError(
-                    "You can not have started without your client's permission. "
-                    "Any work done without permission can not be logged nor charged!"
-                )
+                code = "work_needs_permission"
+            else:
+                return
+            raise ValidationError(self.CLEAN_ERRORS[code], code=code)
+
+    @classmethod
+    def validate_batch(cls, data, today=None):
+        """Applies the rules of clean() to columns of values.
+
+        data is anything the_acce.validation.columns() takes. Returns, for
+        each row, the code of the error clean() would raise, or None. today
+        is the date to apply the rules on, by default date.today().
+        """
+        if today is None:
+            today = date.today()
+
+        def error(permission, pre_tasks, services, logged_hours, start_date):
+            # The branches of clean(), in the same order.
+            if permission:
+                return None
+            if pre_tasks:
+                return "pretasks_need_permission"
+            if services:
+                return "services_need_permission"
+            if logged_hours or start_date < today:
+                return "work_needs_permission"
+            return None
+
+        return list(
+            map(
+                error,
+                *columns(
+                    data,
+                    [
+                        "has_client_permission",
+                        "has_client_pre_tasks",
+                        "has_external_services",
+                        "logged_hours",
+                        "start_date",
+                    ],
+                ),
+            )
+        )
 
 
 class Contact(models.Model):
     """Model representing external services."""
 
-    key = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     first_name = models.CharField(max_length=32)
     last_name = models.CharField(max_length=32)
     company = models.CharField(max_length=64, blank=True, null=True)
@@ -141,7 +277,7 @@ class Contact(models.Model):
     phone = models.CharField(max_length=64, blank=True, null=True)
     website = models.CharField(max_length=128, blank=True, null=True)
     address = models.ForeignKey(
-        "Location",
+        "accounts.Location",
         models.SET_NULL,
         blank=True,
         null=True,
@@ -152,6 +288,20 @@ class Contact(models.Model):
         related_query_name="external_contacts",
     )
 
+    # Messages of the errors clean() raises, by code.
+    CLEAN_ERRORS = {
+        "contact_details_missing": (
+            "The client needs to know how to contact the external service!"
+        ),
+    }
+
+    class Meta:
+        indexes = [
+            # The admin's exact email and last name prefix searches.
+            models.Index(fields=["email"], name="contact_email_idx"),
+            models.Index(fields=["last_name"], name="contact_last_name_idx"),
+        ]
+
     def __str__(self):
         """Returns human-readable reference to model instance."""
         if self.company:
@@ -167,15 +317,31 @@ class Contact(models.Model):
         """Validates various fields of this model."""
         if not (self.email and self.phone and self.website and self.address):
             # Don't allow already due matters.
-            raise ValidationError(
-                "The client needs to know how to contact the external service!"
+            code = "contact_details_missing"
+            raise ValidationError(self.CLEAN_ERRORS[code], code=code)
+
+    @classmethod
+    def validate_batch(cls, data):
+        """Applies the rules of clean() to columns of values.
+
+        As Matter.validate_batch(); the address column holds Location ids.
+        """
+        return [
+            (
+                None
+                if email and phone and website and address is not None
+                else "contact_details_missing"
             )
+            for email, phone, website, address in zip(
+                *columns(data, ["email", "phone", "website", "address"])
+            )
+        ]
 
 
 class Pretask(models.Model):
     """Model representing pre-tasks that client must complete."""
 
-    key = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(max_length=32)
     description = models.CharField(max_length=256)
     is_complete = models.BooleanField(default=False)
@@ -187,6 +353,18 @@ class Pretask(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = PretaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Incomplete pre-tasks for a matter.
+            models.Index(
+                fields=["matter_key"],
+                name="pretask_incomplete_idx",
+                condition=models.Q(is_complete=False),
+            ),
+        ]
+
     def __str__(self):
         """Returns human-readable reference to model instance."""
         return self.title
@@ -196,13 +374,193 @@ class Pretask(models.Model):
         return reverse("pretasks/view", args=[str(self.key)])
 
 
-class Location(models.Model):
-    pass
+class LawyerMatterSummary(models.Model):
+    """Model holding running totals of a lawyer's matters.
+
+    Rows are kept current by the handlers in matters.signals, so a dashboard
+    reads one row instead of aggregating every matter. Bulk queryset updates
+    skip those handlers; run the rebuild_matter_summaries command after them.
+    """
+
+    lawyer = models.OneToOneField(
+        "accounts.Lawyer",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="matter_summary",
+    )
+    matter_count = models.IntegerField(default=0)
+    total_amount = MoneyField(default=0)
+    total_budget = MoneyField(default=0)
+    total_estimated_hours = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    total_logged_hours = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    over_budget_count = models.IntegerField(default=0)
+
+    @property
+    def budget_remaining(self):
+        """Returns how much of the combined budget is left."""
+        return self.total_budget - self.total_amount
+
+
+class TimeEntry(models.Model):
+    """Time a lawyer worked on a matter, in an append-only ledger.
+
+    Entries are never changed or deleted on their own: a mistake is put
+    right by appending an entry with negative hours. Append them through
+    ledger.py, which keeps TimeRollup and Matter.logged_hours in step.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    # Indexed by the (matter, started_at) index below, which leads with it.
+    matter = models.ForeignKey(
+        "Matter", models.CASCADE, related_name="time_entries", db_index=False
+    )
+    lawyer = models.ForeignKey(
+        "accounts.Lawyer", models.CASCADE, related_name="time_entries"
+    )
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    hours = models.DecimalField(max_digits=6, decimal_places=2)
+    note = models.CharField(max_length=256, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "time entries"
+        indexes = [
+            # A matter's entries in the order they were worked.
+            models.Index(fields=["matter", "started_at"], name="time_entry_matter_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.hours} hours on {self.started_at:%Y-%m-%d}"
+
+
+class TimeRollup(models.Model):
+    """Hours logged on a matter by a lawyer in one day or week.
+
+    Kept by ledger.py as entries are appended, so period reports read a
+    range of buckets instead of summing entries. Days and weeks are those
+    of TIME_ZONE, and entries count towards the day they started on.
+    """
+
+    class Periods(models.TextChoices):
+        DAY = "D", _("Day")
+        WEEK = "W", _("Week")
+
+    id = models.BigAutoField(primary_key=True)
+    period = models.CharField(max_length=1, choices=Periods.choices)
+    # The day, or the Monday the week starts on.
+    start = models.DateField()
+    matter = models.ForeignKey(
+        "Matter", models.CASCADE, related_name="time_rollups", db_index=False
+    )
+    lawyer = models.ForeignKey(
+        "accounts.Lawyer", models.CASCADE, related_name="time_rollups", db_index=False
+    )
+    hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    entry_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # One bucket per period; also serves reports across all matters.
+            models.UniqueConstraint(
+                fields=["period", "start", "matter", "lawyer"],
+                name="time_rollup_bucket",
+            ),
+        ]
+        indexes = [
+            # A lawyer's buckets in date order.
+            models.Index(
+                fields=["lawyer", "period", "start"], name="time_rollup_lawyer_idx"
+            ),
+            # A matter's buckets in date order.
+            models.Index(
+                fields=["matter", "period", "start"], name="time_rollup_matter_idx"
+            ),
+        ]
 
 
-class Lawyer(models.Model):
-    pass
+class ArchivedMatter(models.Model):
+    """An inactive matter moved out of the hot tables by archive.py.
 
+    Holds the columns of Matter but its reminder schedule, which inactive
+    matters have none of, and the contacts it was linked to. Archived rows
+    are read-only: restore a matter to change it.
+    """
+
+    key = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=64)
+    description = models.CharField(max_length=512)
+    cost_type = models.CharField(max_length=1, choices=Matter.CostTypes.choices)
+    amount = MoneyField()
+    budget = MoneyField()
+    estimated_hours = models.DecimalField(max_digits=6, decimal_places=2)
+    logged_hours = models.DecimalField(max_digits=6, decimal_places=2)
+    start_date = models.DateField()
+    due_date = models.DateField(blank=True, null=True)
+    has_client_permission = models.BooleanField()
+    has_external_services = models.BooleanField()
+    has_client_pre_tasks = models.BooleanField()
+    has_related_articles = models.BooleanField()
+    is_changeable = models.BooleanField()
+    is_active = models.BooleanField()
+    pretask_total = models.IntegerField()
+    pretask_completed = models.IntegerField()
+    lawyer_key = models.ForeignKey(
+        "accounts.Lawyer",
+        models.CASCADE,
+        related_name="archived_matters",
+    )
+    client_key = models.ForeignKey(
+        "accounts.Client",
+        models.CASCADE,
+        related_name="archived_matters",
+    )
+    contacts = models.ManyToManyField("Contact", related_name="archived_matters")
+    archived_at = models.DateTimeField(default=timezone.now)
 
-class Client(models.Model):
-    pass
+    class Meta:
+        ordering = ["title"]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedPretask(models.Model):
+    """A pre-task of an archived matter."""
+
+    key = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=32)
+    description = models.CharField(max_length=256)
+    is_complete = models.BooleanField()
+    is_active = models.BooleanField()
+    matter_key = models.ForeignKey(
+        "ArchivedMatter", models.CASCADE, related_name="pretasks"
+    )
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedTimeEntry(models.Model):
+    """A time entry of an archived matter, keeping its ledger id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    matter = models.ForeignKey(
+        "ArchivedMatter", models.CASCADE, related_name="time_entries"
+    )
+    lawyer = models.ForeignKey(
+        "accounts.Lawyer", models.CASCADE, related_name="archived_time_entries"
+    )
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    hours = models.DecimalField(max_digits=6, decimal_places=2)
+    note = models.CharField(max_length=256, blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "archived time entries"
+
+    def __str__(self):
+        return f"{self.hours} hours on {self.started_at:%Y-%m-%d}"
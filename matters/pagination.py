@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.db.models import Q
+
+# Number of rows shown per page unless the request asks for something else.
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    """Returns an opaque, URL-safe token for the last row of a page."""
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, fields=None):
+    """Returns the values stored in a token made by encode_cursor.
+
+    Given the model fields the values belong to, they are converted with
+    each field's to_python(), so a token holding, say, a key that isn't a
+    UUID is refused here rather than failing in the query.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise BadRequest("Invalid page cursor.")
+    if not (
+        isinstance(values, list)
+        and len(values) == 2
+        and all(isinstance(value, str) for value in values)
+    ):
+        raise BadRequest("Invalid page cursor.")
+    if fields is None:
+        return values
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except ValidationError:
+        raise BadRequest("Invalid page cursor.")
+
+
+def clamp_page_size(size):
+    """Returns a usable page size from untrusted input."""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+class KeysetPage:
+    """One page of rows and the cursor that seeks to the next one."""
+
+    def __init__(self, object_list, next_cursor, size):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.size = size
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_page(queryset, after=None, size=DEFAULT_PAGE_SIZE, fields=("title", "key")):
+    """Returns the page of queryset that follows the cursor, in one query.
+
+    Rows are ordered on a pair of fields whose combination is unique. Rather
+    than an OFFSET, which makes the database walk past every earlier row, the
+    cursor holds the last row's values and the query seeks straight to them,
+    so page 1000 costs the same as page 1 given an index on those fields.
+    """
+    first, second = fields
+    size = clamp_page_size(size)
+    queryset = queryset.order_by(first, second)
+    if after:
+        opts = queryset.model._meta
+        first_value, second_value = decode_cursor(
+            after, [opts.get_field(first), opts.get_field(second)]
+        )
+        # The redundant ">=" bounds the index range; the OR alone would make
+        # the database scan from the start of the index and filter.
+        queryset = queryset.filter(**{f"{first}__gte": first_value}).filter(
+            Q(**{f"{first}__gt": first_value}) | Q(**{f"{second}__gt": second_value})
+        )
+    # Fetching one extra row tells us whether a next page exists without COUNT.
+    rows = list(queryset[: size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, first), getattr(last, second)])
+    return KeysetPage(rows, next_cursor, size)
@@ -0,0 +1,199 @@
+"""Pre-task progress counters kept on Matter.
+
+Matter.pretask_total counts a matter's active pre-tasks and
+pretask_completed the active ones that are done, so a list of matters can
+show "3 of 7 pre-tasks done" from the matter rows alone. Changes move the
+counters by F() deltas, so concurrent writers never lose each other's
+updates: signals in matters.signals handle saving and deleting a pretask,
+and PretaskQuerySet the bulk methods that skip signals. Anything else, such
+as raw SQL, is put right by recounting; see repair_pretask_progress.
+"""
+
+from collections import defaultdict
+
+from django.db.models import DEFERRED, Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from the_acce.cache import bump
+
+from .models import Matter, Pretask
+
+# Pretask values the counters depend on, in the order they appear in a state.
+STATE_ATTNAMES = ("matter_key_id", "is_active", "is_complete")
+# Fields whose change through update() moves the counters.
+COUNTED_FIELDS = {"matter_key", "matter_key_id", "is_active", "is_complete"}
+# Matters per statement, well inside SQLite's variable limit.
+BATCH_SIZE = 500
+
+
+def progress_state(pretask, old_state=None):
+    """Returns the values of a pretask that the counters depend on.
+
+    Values not loaded on the instance are taken from old_state, or are
+    DEFERRED if there is none.
+    """
+    values = pretask.__dict__
+    if old_state is None:
+        old_state = (DEFERRED,) * len(STATE_ATTNAMES)
+    return tuple(
+        values.get(attname, old) for attname, old in zip(STATE_ATTNAMES, old_state)
+    )
+
+
+def deltas(removed, added):
+    """Returns {matter id: (total, completed)} moving pretasks between states.
+
+    removed are the states pretasks leave and added the states they enter.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for sign, states in ((-1, removed), (1, added)):
+        for matter_id, is_active, is_complete in states:
+            totals[matter_id][0] += sign * int(is_active)
+            totals[matter_id][1] += sign * int(is_active and is_complete)
+    return {matter_id: tuple(delta) for matter_id, delta in totals.items()}
+
+
+def apply(changes):
+    """Adds {matter id: (total, completed)} deltas to the matters' counters.
+
+    Matters moving by the same delta are updated together, so a bulk change
+    costs one statement per distinct delta and batch, not one per matter.
+    """
+    by_delta = defaultdict(list)
+    for matter_id, delta in changes.items():
+        if any(delta):
+            by_delta[delta].append(matter_id)
+    for (total, completed), matter_ids in by_delta.items():
+        for start in range(0, len(matter_ids), BATCH_SIZE):
+            Matter.objects.filter(pk__in=matter_ids[start : start + BATCH_SIZE]).update(
+                pretask_total=F("pretask_total") + total,
+                pretask_completed=F("pretask_completed") + completed,
+            )
+    expire([matter_id for ids in by_delta.values() for matter_id in ids])
+
+
+def recount(matter_ids):
+    """Sets the matters' counters from their pretasks."""
+    matter_ids = list(matter_ids)
+    active = (
+        Pretask.objects.filter(matter_key=OuterRef("pk"), is_active=True)
+        .order_by()
+        .values("matter_key")
+    )
+    total = Subquery(active.annotate(count=Count("pk")).values("count"))
+    completed = Subquery(
+        active.filter(is_complete=True).annotate(count=Count("pk")).values("count")
+    )
+    for start in range(0, len(matter_ids), BATCH_SIZE):
+        Matter.objects.filter(pk__in=matter_ids[start : start + BATCH_SIZE]).update(
+            pretask_total=Coalesce(total, 0),
+            pretask_completed=Coalesce(completed, 0),
+        )
+    expire(matter_ids)
+
+
+def expire(matter_ids):
+    """Expires cached pages showing the matters' progress."""
+    lawyer_ids = set()
+    for start in range(0, len(matter_ids), BATCH_SIZE):
+        lawyer_ids.update(
+            Matter.objects.filter(pk__in=matter_ids[start : start + BATCH_SIZE])
+            .values_list("lawyer_key_id", flat=True)
+            .distinct()
+        )
+    bump(
+        *(("matter", matter_id) for matter_id in matter_ids),
+        *(("lawyer-matters", lawyer_id) for lawyer_id in lawyer_ids),
+    )
+
+
+def locked_states(queryset):
+    """Returns {pk: state} of the pretasks in queryset, locking them.
+
+    The locks keep the states current until the caller's transaction ends.
+    """
+    return {
+        pk: tuple(state)
+        for pk, *state in queryset.select_for_update()
+        .order_by()
+        .values_list("pk", "matter_key", "is_active", "is_complete")
+    }
+
+
+def pretask_saved(pretask, old_state, created):
+    """Moves a saved pretask's contribution from its old state to its new one."""
+    if created:
+        apply(deltas([], [progress_state(pretask)]))
+        return
+    new_state = progress_state(pretask, old_state)
+    if DEFERRED in old_state or DEFERRED in new_state:
+        # Loaded with only() or defer(), so there is no delta to apply;
+        # recount the matters it was and is in instead.
+        recount({old_state[0], new_state[0], pretask.matter_key_id} - {DEFERRED})
+        return
+    apply(deltas([old_state], [new_state]))
+
+
+def pretask_deleted(pretask, old_state):
+    if DEFERRED in old_state:
+        recount([pretask.matter_key_id])
+    else:
+        apply(deltas([old_state], []))
+
+
+def pretasks_created(pretasks):
+    """Adds pretasks made by bulk_create() to their matters' counters."""
+    apply(deltas([], [progress_state(pretask) for pretask in pretasks]))
+
+
+def pretasks_updated(old_states, values):
+    """Updates counters after queryset.update(**values) of pretasks."""
+    if any(hasattr(value, "resolve_expression") for value in values.values()):
+        # Values computed in the database: recount the matters the pretasks
+        # were in and the ones they are in now.
+        matter_ids = {state[0] for state in old_states.values()}
+        pks = list(old_states)
+        for start in range(0, len(pks), BATCH_SIZE):
+            matter_ids.update(
+                Pretask.objects.filter(pk__in=pks[start : start + BATCH_SIZE])
+                .values_list("matter_key", flat=True)
+                .distinct()
+            )
+        recount(matter_ids)
+        return
+    values = dict(values)
+    if "matter_key" in values:
+        values["matter_key_id"] = getattr(
+            values["matter_key"], "pk", values["matter_key"]
+        )
+    new = [
+        tuple(values.get(attname, old) for attname, old in zip(STATE_ATTNAMES, state))
+        for state in old_states.values()
+    ]
+    apply(deltas(list(old_states.values()), new))
+
+
+def find_drift():
+    """Returns the keys of matters whose counters differ from their pretasks."""
+    return list(
+        Matter.objects.order_by()
+        .annotate(
+            actual_total=Count("pretasks", filter=Q(pretasks__is_active=True)),
+            actual_completed=Count(
+                "pretasks",
+                filter=Q(pretasks__is_active=True, pretasks__is_complete=True),
+            ),
+        )
+        .filter(
+            ~Q(pretask_total=F("actual_total"))
+            | ~Q(pretask_completed=F("actual_completed"))
+        )
+        .values_list("pk", flat=True)
+    )
+
+
+def repair():
+    """Recounts every matter whose counters drifted. Returns their keys."""
+    drifted = find_drift()
+    recount(drifted)
+    return drifted
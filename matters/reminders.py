@@ -0,0 +1,244 @@
+"""Due-date reminders of matters, sent by email.
+
+An active matter with a due date has next_reminder_at set to when its next
+reminder falls due: settings.REMINDER_DAYS_BEFORE its due date, at
+REMINDER_HOUR. Reminders whose time has already passed when a matter is
+scheduled are skipped. A partial index holds only the matters with one
+pending, so finding the due ones is a short range scan however many
+matters there are.
+
+Workers claim due matters in batches. Where the database has SELECT ... FOR
+UPDATE SKIP LOCKED (PostgreSQL, MySQL 8, Oracle) each worker locks a batch
+the others skip instead of waiting for. SQLite has no row locks but runs
+one writer at a time, so one UPDATE ... WHERE key IN (SELECT ... LIMIT n)
+claims a batch atomically. A claim tags the batch with a claim id and moves
+next_reminder_at to the end of a lease, and emails are sent after the
+claiming transaction commits: if a worker dies, its lease runs out and the
+batch is claimed again, so a reminder is sent at least once. Sending moves
+each matter on to its following reminder, or clears it.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, router, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from the_acce.routers import from_primary
+
+from .models import Matter, Pretask
+
+# Due dates per statement when rescheduling: each takes two parameters.
+BATCH_SIZE = 500
+
+
+def reminder_times(due_date):
+    """Returns when a matter due on due_date is reminded of, earliest first."""
+    return sorted(
+        timezone.make_aware(
+            datetime.combine(
+                due_date - timedelta(days=days), time(settings.REMINDER_HOUR)
+            )
+        )
+        for days in set(settings.REMINDER_DAYS_BEFORE)
+    )
+
+
+def next_reminder_at(due_date, is_active=True, after=None):
+    """Returns when the next reminder after a time (now) is due, or None."""
+    if due_date is None or not is_active:
+        return None
+    after = after or timezone.now()
+    return next((at for at in reminder_times(due_date) if at > after), None)
+
+
+def schedule(matters, now=None):
+    """Sets next_reminder_at on unsaved matters, for bulk_create()."""
+    for matter in matters:
+        matter.next_reminder_at = next_reminder_at(
+            matter.due_date, matter.is_active, now
+        )
+
+
+def _next_reminders(due_dates, now):
+    """Returns an expression for next_reminder_at of matters due on due_dates."""
+    return Case(
+        *(
+            When(
+                is_active=True,
+                due_date=due_date,
+                then=Value(next_reminder_at(due_date, after=now)),
+            )
+            for due_date in due_dates
+        ),
+        default=Value(None),
+        output_field=DateTimeField(),
+    )
+
+
+def reschedule(matters, now=None):
+    """Sets next_reminder_at of a queryset of matters from their due dates.
+
+    For changes that skip Matter.save(), such as queryset.update(). Costs one
+    statement per BATCH_SIZE distinct due dates, and drops any claims.
+    """
+    now = now or timezone.now()
+    with from_primary(), transaction.atomic():
+        matters.filter(due_date__isnull=True).update(
+            next_reminder_at=None, reminder_claim=None
+        )
+        due_dates = sorted(
+            matters.filter(due_date__isnull=False)
+            .order_by()
+            .values_list("due_date", flat=True)
+            .distinct()
+        )
+        for start in range(0, len(due_dates), BATCH_SIZE):
+            chunk = due_dates[start : start + BATCH_SIZE]
+            matters.filter(due_date__in=chunk).update(
+                next_reminder_at=_next_reminders(chunk, now), reminder_claim=None
+            )
+
+
+def matter_saved(matter, old_state):
+    """Reschedules a saved matter whose due date or activity changed."""
+    if old_state == (matter.due_date, matter.is_active):
+        return
+    Matter.objects.filter(pk=matter.pk).update(
+        next_reminder_at=next_reminder_at(matter.due_date, matter.is_active),
+        reminder_claim=None,
+    )
+
+
+def claim(batch_size, now=None):
+    """Claims up to batch_size matters whose reminders are due by now.
+
+    Returns (claim id, matter keys).
+    """
+    now = now or timezone.now()
+    claim_id = uuid.uuid4()
+    lease_until = now + timedelta(seconds=settings.REMINDER_LEASE_SECONDS)
+    due = Matter.objects.filter(next_reminder_at__lte=now).order_by("next_reminder_at")
+    with from_primary(), transaction.atomic():
+        connection = connections[router.db_for_write(Matter)]
+        if connection.features.has_select_for_update_skip_locked:
+            keys = list(
+                due.select_for_update(skip_locked=True).values_list("pk", flat=True)[
+                    :batch_size
+                ]
+            )
+            Matter.objects.filter(pk__in=keys).update(
+                next_reminder_at=lease_until, reminder_claim=claim_id
+            )
+        else:
+            Matter.objects.filter(pk__in=due.values("pk")[:batch_size]).update(
+                next_reminder_at=lease_until, reminder_claim=claim_id
+            )
+            # Equality on next_reminder_at reads the claim back by index.
+            keys = list(
+                Matter.objects.filter(
+                    next_reminder_at=lease_until, reminder_claim=claim_id
+                ).values_list("pk", flat=True)
+            )
+    return claim_id, keys
+
+
+def email_address(party):
+    """Returns the address to remind a lawyer or client at, or None."""
+    return party.account.email or party.account.user.email or None
+
+
+def due_in(days):
+    if days < 0:
+        return f"{-days} days overdue" if days < -1 else "1 day overdue"
+    return {0: "today", 1: "tomorrow"}.get(days, f"in {days} days")
+
+
+def lawyer_message(address, matters, outstanding, today):
+    lines = []
+    for matter in matters:
+        when = due_in((matter.due_date - today).days)
+        line = f"- {matter.title}: due {matter.due_date:%a %d %b %Y} ({when})"
+        if matter.pretask_total:
+            line += (
+                f", {matter.pretask_completed} of {matter.pretask_total} "
+                "pre-tasks done"
+            )
+        lines.append(line)
+    subject = (
+        f"{matters[0].title} is due soon"
+        if len(matters) == 1
+        else f"{len(matters)} matters are due soon"
+    )
+    return EmailMessage(subject, "\n".join(lines) + "\n", to=[address])
+
+
+def client_message(address, matters, outstanding, today):
+    lines = []
+    for matter in matters:
+        lines.append(f"{matter.title}, due {matter.due_date:%a %d %b %Y}:")
+        lines.extend(f"- {title}" for title in outstanding[matter.pk])
+    return EmailMessage(
+        "Pre-tasks to complete before your matters are due",
+        "\n".join(lines) + "\n",
+        to=[address],
+    )
+
+
+def deliver(claim_id, keys, now=None, connection=None):
+    """Emails the reminders of claimed matters and moves them on.
+
+    Lawyers get one email listing their matters, and clients with pre-tasks
+    left one listing those. Returns how many emails were sent.
+    """
+    now = now or timezone.now()
+    with from_primary():
+        matters = list(
+            Matter.objects.filter(pk__in=keys, reminder_claim=claim_id)
+            .select_related("lawyer_key__account__user", "client_key__account__user")
+            .order_by("due_date", "title")
+        )
+        matters = [matter for matter in matters if matter.is_active and matter.due_date]
+        outstanding = defaultdict(list)
+        pending = [
+            matter.pk
+            for matter in matters
+            if matter.pretask_completed < matter.pretask_total
+        ]
+        if pending:
+            for matter_id, title in (
+                Pretask.objects.filter(
+                    matter_key__in=pending, is_active=True, is_complete=False
+                )
+                .order_by("title")
+                .values_list("matter_key", "title")
+            ):
+                outstanding[matter_id].append(title)
+
+    by_lawyer, by_client = defaultdict(list), defaultdict(list)
+    for matter in matters:
+        by_lawyer[email_address(matter.lawyer_key)].append(matter)
+        if outstanding[matter.pk]:
+            by_client[email_address(matter.client_key)].append(matter)
+    today = timezone.localdate(now)
+    messages = [
+        make_message(address, recipients_matters, outstanding, today)
+        for make_message, grouped in (
+            (lawyer_message, by_lawyer),
+            (client_message, by_client),
+        )
+        for address, recipients_matters in grouped.items()
+        if address
+    ]
+    sent = (connection or get_connection()).send_messages(messages) or 0
+
+    # Matters rescheduled since the claim carry a new schedule; leave them.
+    due_dates = sorted({matter.due_date for matter in matters})
+    Matter.objects.filter(pk__in=keys, reminder_claim=claim_id).update(
+        next_reminder_at=_next_reminders(due_dates, now), reminder_claim=None
+    )
+    return sent
@@ -0,0 +1,279 @@
+"""Ranked full-text search over matters, contacts and pretasks.
+
+Each database vendor has a backend that owns the search index:
+
+- SQLite: an FTS5 table per model, holding the indexed columns of the
+  model's table by rowid and kept current by triggers, so bulk_create() and
+  raw SQL writes are indexed too.
+- PostgreSQL: a stored, generated tsvector column per model with a GIN index.
+- Anything else: icontains filters without ranking, the old behaviour.
+
+search() takes any queryset of a searchable model, so callers filter it
+(e.g. to one lawyer) with the ORM as usual, and returns it ranked best first
+with the score in a "rank" column.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Contact, Matter, Pretask
+
+# Indexed columns per model with their relative weights, most important first.
+SEARCH_FIELDS = {
+    Matter: {"title": 10.0, "description": 1.0},
+    Contact: {"last_name": 10.0, "first_name": 5.0, "company": 5.0},
+    Pretask: {"title": 10.0, "description": 1.0},
+}
+
+WORD = re.compile(r"\w+")
+
+# Scoring every match of a query as broad as "lease" takes hundreds of
+# milliseconds over a million rows. Past this many matches in the whole
+# table, results come newest first instead, scored only for the page shown.
+RANK_LIMIT = 10000
+
+
+def no_matches(queryset):
+    """Returns an empty queryset shaped like a search's results."""
+    return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+class SearchBackend:
+    """Fallback for databases without full-text indexes: unranked icontains."""
+
+    def install(self, connection, model):
+        pass
+
+    def uninstall(self, connection, model):
+        pass
+
+    def is_installed(self, connection, model):
+        return True
+
+    def rebuild(self, connection, model):
+        pass
+
+    def search(self, queryset, query):
+        condition = Q()
+        for word in WORD.findall(query):
+            condition &= Q(
+                *[
+                    Q(**{f"{field}__icontains": word})
+                    for field in SEARCH_FIELDS[queryset.model]
+                ],
+                _connector=Q.OR,
+            )
+        return (
+            queryset.filter(condition)
+            .annotate(rank=Value(0.0, output_field=FloatField()))
+            .order_by("pk")
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 tables mirroring each model's table by rowid, synced by triggers.
+
+    The triggers are dropped whenever the migration framework remakes the
+    table, and VACUUM may renumber rowids, so ensure_installed() runs after
+    every migrate and reindex_search rebuilds the tables from scratch.
+    """
+
+    def names(self, model):
+        table = model._meta.db_table
+        return table, f"{table}_fts", list(SEARCH_FIELDS[model])
+
+    def install(self, connection, model):
+        table, fts, columns = self.names(model)
+        listed = ", ".join(columns)
+        new = ", ".join(f"new.{column}" for column in columns)
+        old = ", ".join(f"old.{column}" for column in columns)
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({listed}, "
+            f"content='{table}', content_rowid='rowid', "
+            f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+            f"BEGIN INSERT INTO {fts}(rowid, {listed}) VALUES (new.rowid, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+            f"BEGIN INSERT INTO {fts}({fts}, rowid, {listed}) "
+            f"VALUES ('delete', old.rowid, {old}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {listed} "
+            f"ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, {listed}) "
+            f"VALUES ('delete', old.rowid, {old}); "
+            f"INSERT INTO {fts}(rowid, {listed}) VALUES (new.rowid, {new}); END",
+        ]
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        self.rebuild(connection, model)
+
+    def uninstall(self, connection, model):
+        _, fts, _ = self.names(model)
+        with connection.cursor() as cursor:
+            for trigger in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+            cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+    def is_installed(self, connection, model):
+        _, fts, _ = self.names(model)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                [fts, f"{fts}_insert", f"{fts}_delete", f"{fts}_update"],
+            )
+            return cursor.fetchone()[0] == 4
+
+    def rebuild(self, connection, model):
+        _, fts, _ = self.names(model)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+
+    def match_expression(self, query):
+        """Returns query as an FTS5 expression: every word, the last as a prefix.
+
+        Words are quoted, so FTS5 operators and syntax in user input are inert.
+        """
+        words = [f'"{word}"' for word in WORD.findall(query)]
+        if words:
+            words[-1] += "*"
+        return " ".join(words)
+
+    def search(self, queryset, query):
+        table, fts, columns = self.names(queryset.model)
+        expression = self.match_expression(query)
+        if not expression:
+            return no_matches(queryset)
+        weights = ", ".join(str(SEARCH_FIELDS[queryset.model][c]) for c in columns)
+        matches = queryset.extra(
+            # bm25() is lower for better matches, so negate it to rank.
+            select={"rank": f"-bm25({fts}, {weights})"},
+            tables=[fts],
+            where=[f"{fts}.rowid = {table}.rowid", f"{fts} MATCH %s"],
+            params=[expression],
+        )
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM (SELECT rowid FROM {fts} "
+                f"WHERE {fts} MATCH %s LIMIT %s)",
+                [expression, RANK_LIMIT + 1],
+            )
+            broad = cursor.fetchone()[0] > RANK_LIMIT
+        if broad:
+            # FTS5 reads its index in rowid order without sorting.
+            return matches.extra(order_by=[f"-{fts}.rowid"])
+        return matches.order_by("-rank", "pk")
+
+
+class PostgresSearchBackend(SearchBackend):
+    """A generated tsvector column, search_vector, with a GIN index per model."""
+
+    config = "english"
+
+    def names(self, model):
+        table = model._meta.db_table
+        return table, f"{table}_search_idx"
+
+    def vector(self, model):
+        """Returns the SQL of the weighted tsvector over the model's columns."""
+        labels = "ABCD"
+        return " || ".join(
+            f"setweight(to_tsvector('{self.config}', coalesce({column}, '')), "
+            f"'{labels[min(rank, 3)]}')"
+            for rank, column in enumerate(SEARCH_FIELDS[model])
+        )
+
+    def install(self, connection, model):
+        table, index = self.names(model)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({self.vector(model)}) STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {table} USING gin (search_vector)"
+            )
+
+    def uninstall(self, connection, model):
+        table, index = self.names(model)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+    def is_installed(self, connection, model):
+        table, index = self.names(model)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [index])
+            return cursor.fetchone()[0]
+
+    def rebuild(self, connection, model):
+        # The column is generated, so only the index itself can go stale.
+        _, index = self.names(model)
+        with connection.cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {index}")
+
+    def search(self, queryset, query):
+        table, _ = self.names(queryset.model)
+        if not WORD.search(query):
+            return no_matches(queryset)
+        tsquery = f"websearch_to_tsquery('{self.config}', %s)"
+        matching = RawSQL(
+            f"{table}.search_vector @@ {tsquery}", [query], BooleanField()
+        )
+        matches = queryset.filter(matching).annotate(
+            rank=RawSQL(f"ts_rank({table}.search_vector, {tsquery})", [query])
+        )
+        everywhere = queryset.model._base_manager.using(queryset.db).filter(matching)
+        if everywhere.order_by()[: RANK_LIMIT + 1].count() > RANK_LIMIT:
+            # Keys are time-ordered (the_acce.uuids), so this is newest first
+            # for rows created since, like the FTS5 rowid order on SQLite.
+            return matches.order_by("-pk")
+        return matches.order_by("-rank", "pk")
+
+
+BACKENDS = {
+    "sqlite": SQLiteSearchBackend(),
+    "postgresql": PostgresSearchBackend(),
+}
+
+
+def get_backend(connection):
+    return BACKENDS.get(connection.vendor, SearchBackend())
+
+
+def search(queryset, query):
+    """Returns queryset narrowed to rows matching query, best match first."""
+    return get_backend(connections[queryset.db]).search(queryset, query)
+
+
+def install(connection):
+    for model in SEARCH_FIELDS:
+        get_backend(connection).install(connection, model)
+
+
+def uninstall(connection):
+    for model in SEARCH_FIELDS:
+        get_backend(connection).uninstall(connection, model)
+
+
+def ensure_installed(connection):
+    """Installs any missing index, e.g. after a migration remade a table.
+
+    Returns the models whose index had to be installed.
+    """
+    backend = get_backend(connection)
+    missing = [
+        model for model in SEARCH_FIELDS if not backend.is_installed(connection, model)
+    ]
+    for model in missing:
+        backend.install(connection, model)
+    return missing
+
+
+def rebuild(connection, models=None):
+    """Rebuilds the search index of models, all searchable ones by default."""
+    backend = get_backend(connection)
+    for model in models or SEARCH_FIELDS:
+        backend.rebuild(connection, model)
@@ -0,0 +1,101 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from the_acce.cache import bump
+
+from . import progress, reminders, search, summaries
+from .models import Matter, Pretask
+
+
+@receiver(post_init, sender=Matter)
+def remember_summary_state(sender, instance, **kwargs):
+    """Keeps the values a matter was loaded with, to diff against on save."""
+    instance._summary_state = summaries.summary_state(instance)
+
+
+# Connected before the summary handlers, which replace _summary_state.
+@receiver(post_save, sender=Matter)
+@receiver(post_delete, sender=Matter)
+def invalidate_fragments(sender, instance, **kwargs):
+    """Expires cached pages showing the matter, including its previous lawyer's."""
+    lawyer_ids = {instance.lawyer_key_id}
+    if instance._summary_state is not None:
+        lawyer_ids.add(instance._summary_state[0])
+    bump(
+        ("matter", instance.pk),
+        *(("lawyer-matters", lawyer_id) for lawyer_id in lawyer_ids),
+    )
+
+
+@receiver(post_save, sender=Matter)
+def update_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixture loading: the rebuild command is the way to catch up.
+        return
+    summaries.matter_saved(instance, instance._summary_state, created)
+    instance._summary_state = summaries.summary_state(instance)
+
+
+@receiver(post_delete, sender=Matter)
+def update_summary_on_delete(sender, instance, **kwargs):
+    summaries.matter_deleted(instance, instance._summary_state)
+
+
+@receiver(post_init, sender=Matter)
+def remember_reminder_state(sender, instance, **kwargs):
+    values = instance.__dict__
+    instance._reminder_state = (
+        (values["due_date"], values["is_active"])
+        if "due_date" in values and "is_active" in values
+        else None
+    )
+
+
+@receiver(pre_save, sender=Matter)
+def schedule_reminder(sender, instance, raw=False, **kwargs):
+    """Sets a new matter's next reminder, so its insert writes it."""
+    if instance._state.adding and not raw:
+        reminders.schedule([instance])
+
+
+@receiver(post_save, sender=Matter)
+def reschedule_reminder(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    reminders.matter_saved(instance, instance._reminder_state)
+    instance._reminder_state = (instance.due_date, instance.is_active)
+
+
+@receiver(post_init, sender=Pretask)
+def remember_progress_state(sender, instance, **kwargs):
+    """Keeps the values a pretask was loaded with, to diff against on save."""
+    instance._progress_state = progress.progress_state(instance)
+
+
+@receiver(post_save, sender=Pretask)
+def update_progress_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixture loading: the repair command is the way to catch up.
+        return
+    progress.pretask_saved(instance, instance._progress_state, created)
+    instance._progress_state = progress.progress_state(
+        instance, instance._progress_state
+    )
+
+
+@receiver(post_delete, sender=Pretask)
+def update_progress_on_delete(sender, instance, **kwargs):
+    progress.pretask_deleted(instance, instance._progress_state)
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """Reinstalls search triggers that a migration's table rebuild dropped.
+
+    Connected to post_migrate in MattersConfig.ready().
+    """
+    connection = connections[using]
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("matters", "0007_add_search_index") in applied:
+        search.ensure_installed(connection)
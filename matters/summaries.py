@@ -0,0 +1,228 @@
+"""Incremental maintenance of LawyerMatterSummary rows.
+
+Each saved or deleted matter changes its lawyer's totals by a small delta,
+which is applied with F() expressions so concurrent writers never lose each
+other's updates. Anything the handlers can't see (queryset.update(), raw SQL)
+is repaired by rebuilding from the matters table.
+
+Amounts are Money (see the_acce/money.py), summed as integer cents; hours
+are decimals. Archived matters (see archive.py) are not counted.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import Lawyer
+from the_acce.money import Money
+
+from .models import LawyerMatterSummary, Matter
+
+# Matter fields that feed the totals, in the order they appear in a state.
+SUMMARY_FIELDS = ("amount", "budget", "estimated_hours", "logged_hours")
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+
+def summary_state(matter):
+    """Returns the values of a matter that the summary depends on.
+
+    Returns None if any of them were deferred, since reading a deferred field
+    would cost a query for every instance loaded.
+    """
+    values = matter.__dict__
+    attnames = ("lawyer_key_id",) + SUMMARY_FIELDS
+    if any(attname not in values for attname in attnames):
+        return None
+    return tuple(values[attname] for attname in attnames)
+
+
+def _totals(state, sign):
+    """Returns update expressions adding (sign=1) or removing (sign=-1) a state."""
+    amount, budget = (value or Money(0) for value in state[1:3])
+    estimated_hours, logged_hours = (Decimal(value or 0) for value in state[3:])
+    return {
+        "matter_count": sign,
+        "total_amount": sign * amount,
+        "total_budget": sign * budget,
+        "total_estimated_hours": sign * estimated_hours,
+        "total_logged_hours": sign * logged_hours,
+        "over_budget_count": sign * int(amount > budget),
+    }
+
+
+def _apply(lawyer_id, deltas):
+    """Adds deltas to a lawyer's summary row. Returns whether the row existed."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return True
+    return bool(
+        LawyerMatterSummary.objects.filter(lawyer_id=lawyer_id).update(
+            **{
+                field: F(field)
+                + Value(delta, output_field=LawyerMatterSummary._meta.get_field(field))
+                for field, delta in deltas.items()
+            }
+        )
+    )
+
+
+def matter_saved(matter, old_state, created):
+    """Moves a saved matter's contribution from its old state to its new one."""
+    new_state = summary_state(matter)
+    if created:
+        old_state = None
+    if new_state is None or (old_state is None and not created):
+        # Without both states there is no delta; recount the lawyers involved.
+        lawyer_ids = {matter.lawyer_key_id}
+        if old_state is not None:
+            lawyer_ids.add(old_state[0])
+        for lawyer_id in lawyer_ids:
+            refresh_summary(lawyer_id)
+        return
+    deltas = _totals(new_state, 1)
+    if old_state is not None:
+        if old_state[0] == new_state[0]:
+            removed = _totals(old_state, -1)
+            deltas = {field: deltas[field] + removed[field] for field in deltas}
+        else:
+            _apply(old_state[0], _totals(old_state, -1))
+    if not _apply(new_state[0], deltas):
+        # First matter seen for this lawyer: seed the row from the table.
+        refresh_summary(new_state[0])
+
+
+def matter_deleted(matter, old_state):
+    """Removes a deleted matter from its lawyer's summary.
+
+    A missing row is never created here: the lawyer may be mid-cascade, and
+    the rebuild command will recreate the row if not.
+    """
+    if old_state is None:
+        refresh_summary(matter.lawyer_key_id, create=False)
+    else:
+        _apply(old_state[0], _totals(old_state, -1))
+
+
+def matters_moved(states, sign):
+    """Adds (sign=1) or removes (sign=-1) many matters' states at once.
+
+    For matters moved in bulk, as archive.py does: costs one update per
+    lawyer rather than one per matter.
+    """
+    by_lawyer = {}
+    for state in states:
+        totals = _totals(state, sign)
+        lawyer_totals = by_lawyer.setdefault(state[0], totals)
+        if lawyer_totals is not totals:
+            for field, delta in totals.items():
+                lawyer_totals[field] += delta
+    for lawyer_id, deltas in by_lawyer.items():
+        if not _apply(lawyer_id, deltas) and sign > 0:
+            refresh_summary(lawyer_id)
+
+
+def add_logged_hours(lawyer_hours):
+    """Adds {lawyer id: hours} to the lawyers' logged hours, for ledger.py."""
+    for lawyer_id, hours in lawyer_hours.items():
+        if not _apply(lawyer_id, {"total_logged_hours": hours}):
+            refresh_summary(lawyer_id)
+
+
+def aggregate_summaries(lawyer_ids=None):
+    """Returns freshly aggregated totals keyed by lawyer id, in one query."""
+    money = Matter._meta.get_field("amount")
+    matters = Matter.objects.order_by()
+    if lawyer_ids is not None:
+        matters = matters.filter(lawyer_key_id__in=lawyer_ids)
+    rows = matters.values("lawyer_key_id").annotate(
+        matter_count=Count("key"),
+        total_amount=Coalesce(Sum("amount"), Value(Money(0), output_field=money)),
+        total_budget=Coalesce(Sum("budget"), Value(Money(0), output_field=money)),
+        total_estimated_hours=Coalesce(Sum("estimated_hours"), ZERO),
+        total_logged_hours=Coalesce(Sum("logged_hours"), ZERO),
+        over_budget_count=Count("key", filter=Q(amount__gt=F("budget"))),
+    )
+    # SQLite sums decimal hours as floats; round back to the stored precision.
+    return {
+        row.pop("lawyer_key_id"): {
+            column: value.quantize(CENT) if isinstance(value, Decimal) else value
+            for column, value in row.items()
+        }
+        for row in rows
+    }
+
+
+def refresh_summary(lawyer_id, create=True):
+    """Recomputes one lawyer's summary row from their matters."""
+    totals = aggregate_summaries([lawyer_id]).get(lawyer_id)
+    if totals is None:
+        totals = _empty_totals()
+    updated = LawyerMatterSummary.objects.filter(lawyer_id=lawyer_id).update(**totals)
+    if not updated and create and Lawyer.objects.filter(pk=lawyer_id).exists():
+        LawyerMatterSummary.objects.create(lawyer_id=lawyer_id, **totals)
+
+
+def refresh_summaries(lawyer_ids):
+    """Recomputes the summary rows of several lawyers, e.g. after bulk_create."""
+    lawyer_ids = list(lawyer_ids)
+    totals = aggregate_summaries(lawyer_ids)
+    empty = _empty_totals()
+    existing = set(
+        Lawyer.objects.filter(pk__in=lawyer_ids).values_list("pk", flat=True)
+    )
+    with transaction.atomic():
+        for lawyer_id in existing:
+            LawyerMatterSummary.objects.update_or_create(
+                lawyer_id=lawyer_id, defaults=totals.get(lawyer_id, empty)
+            )
+
+
+def find_drift():
+    """Returns ids of lawyers whose stored summary differs from the matters table."""
+    expected = aggregate_summaries()
+    stored = {
+        row.pop("lawyer_id"): row
+        for row in LawyerMatterSummary.objects.values("lawyer_id", *_summary_columns())
+    }
+    empty = _empty_totals()
+    return sorted(
+        lawyer_id
+        for lawyer_id in expected.keys() | stored.keys()
+        if expected.get(lawyer_id, empty) != stored.get(lawyer_id, empty)
+    )
+
+
+def rebuild_summaries(batch_size=1000):
+    """Replaces every summary row with totals aggregated from scratch."""
+    totals = aggregate_summaries()
+    with transaction.atomic():
+        LawyerMatterSummary.objects.all().delete()
+        LawyerMatterSummary.objects.bulk_create(
+            (
+                LawyerMatterSummary(lawyer_id=lawyer_id, **row)
+                for lawyer_id, row in totals.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(totals)
+
+
+def _summary_columns():
+    return [
+        field.attname
+        for field in LawyerMatterSummary._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def _empty_totals():
+    """Returns the totals of a lawyer without matters."""
+    return {
+        field.attname: field.to_python(0)
+        for field in LawyerMatterSummary._meta.concrete_fields
+        if not field.primary_key
+    }
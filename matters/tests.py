@@ -1,3 +1,1227 @@
-from django.test import TestCase
+import csv
+import json
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import Permission, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import Location
+from accounts.parties import create_client, create_lawyer
+
+from .models import (
+    ArchivedMatter,
+    ArchivedPretask,
+    ArchivedTimeEntry,
+    Contact,
+    LawyerMatterSummary,
+    Matter,
+    Pretask,
+    TimeEntry,
+    TimeRollup,
+)
+from the_acce.admin import EstimatedCountPaginator
+from the_acce.asgi import application
+from the_acce.cache import current_versions, stats
+from the_acce.money import Money
+from the_acce.validation import clean_error
+
+from . import archive, ledger, progress, reminders, summaries
+from .summaries import find_drift
+from .pagination import decode_cursor, encode_cursor, keyset_page
+
+# Noon on a Sunday, so an hour either side stays on the same day.
+NOON = timezone.make_aware(datetime(2026, 3, 8, 12))
+
+
+def make_matter(lawyer, client, title, **fields):
+    """Creates a matter with sensible defaults for the required fields."""
+    fields.setdefault("description", "Test matter")
+    return Matter.objects.create(
+        title=title,
+        lawyer_key=lawyer,
+        client_key=client,
+        **fields,
+    )
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.other_lawyer = create_lawyer()
+        cls.client_ = create_client()
+        # Duplicate titles make sure the key breaks ties between pages.
+        cls.matters = [
+            make_matter(cls.lawyer, cls.client_, f"Matter {n // 2:02d}")
+            for n in range(23)
+        ]
+        make_matter(cls.other_lawyer, cls.client_, "Someone else's matter")
+        cls.reader = User.objects.create_user("reader")
+        cls.reader.user_permissions.add(Permission.objects.get(codename="view_matter"))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_cursor_round_trip(self):
+        values = ["Matter 01", "0b6a1c64-2f0e-4a52-9a3c-b47c59b0f8a1"]
+        self.assertEqual(decode_cursor(encode_cursor(values)), values)
+
+    def test_pages_cover_every_matter_once_in_order(self):
+        seen = []
+        cursor = None
+        while True:
+            page = keyset_page(
+                Matter.objects.filter(lawyer_key=self.lawyer), after=cursor, size=5
+            )
+            seen.extend(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        expected = sorted(
+            self.matters, key=lambda matter: (matter.title, matter.key.hex)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_overview_query_count_is_fixed(self):
+        url = f"/matters/lawyer/{self.lawyer.pk}/"
+        # Four for the session, user and permissions, one for the page and one
+        # for the lawyer's summary row.
+        with self.assertNumQueries(6):
+            response = self.client.get(url, {"size": 5})
+        cursor = response.context["page"].next_cursor
+        for _ in range(3):
+            with self.assertNumQueries(6):
+                response = self.client.get(url, {"size": 5, "after": cursor})
+            cursor = response.context["page"].next_cursor
+        self.assertContains(response, "Matter 09")
+        self.assertNotContains(response, "Someone else's matter")
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(
+            f"/matters/lawyer/{self.lawyer.pk}/", {"after": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, 400)
+        # Well formed, but the key isn't a UUID.
+        response = self.client.get(
+            f"/matters/lawyer/{self.lawyer.pk}/",
+            {"after": encode_cursor(["Matter 01", "zzz"])},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_overview_requires_permission(self):
+        self.client.force_login(User.objects.create_user("nobody"))
+        url = f"/matters/lawyer/{self.lawyer.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked on SQLite.")
+class HotFilterIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.matter = make_matter(cls.lawyer, cls.client_, "Indexed")
+        Pretask.objects.create(
+            title="Sign", description="Sign the letter", matter_key=cls.matter
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_active_matters_for_lawyer_by_due_date(self):
+        self.assertUsesIndex(
+            Matter.objects.filter(lawyer_key=self.lawyer, is_active=True).order_by(
+                "due_date"
+            ),
+            "matter_active_due_idx",
+        )
+
+    def test_incomplete_pretasks_for_matter(self):
+        self.assertUsesIndex(
+            Pretask.objects.filter(matter_key=self.matter, is_complete=False),
+            "pretask_incomplete_idx",
+        )
+
+
+class LawyerMatterSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.other_lawyer = create_lawyer()
+        cls.client_ = create_client()
+
+    def summary(self, lawyer):
+        return LawyerMatterSummary.objects.get(lawyer=lawyer)
+
+    def test_create_update_and_delete_apply_deltas(self):
+        matter = make_matter(
+            self.lawyer, self.client_, "Lease", amount=Decimal("50"), budget=100
+        )
+        make_matter(
+            self.lawyer, self.client_, "Will", amount=Decimal("120"), budget=100
+        )
+        summary = self.summary(self.lawyer)
+        self.assertEqual(summary.matter_count, 2)
+        self.assertEqual(summary.total_amount, Money.of("170"))
+        self.assertEqual(summary.over_budget_count, 1)
+
+        matter.amount = Decimal("150")
+        matter.save()
+        ledger.log(matter, self.lawyer, NOON, NOON, Decimal("2.5"))
+        summary = self.summary(self.lawyer)
+        self.assertEqual(summary.total_amount, Money.of("270"))
+        self.assertEqual(summary.total_logged_hours, Decimal("2.5"))
+        self.assertEqual(summary.over_budget_count, 2)
+
+        Matter.objects.get(pk=matter.pk).delete()
+        summary = self.summary(self.lawyer)
+        self.assertEqual(summary.matter_count, 1)
+        self.assertEqual(summary.total_amount, Money.of("120"))
+        self.assertEqual(summary.over_budget_count, 1)
+        self.assertEqual(find_drift(), [])
+
+    def test_moving_a_matter_between_lawyers(self):
+        matter = make_matter(self.lawyer, self.client_, "Lease", amount=Decimal("10"))
+        make_matter(self.other_lawyer, self.client_, "Will")
+        matter = Matter.objects.get(pk=matter.pk)
+        matter.lawyer_key = self.other_lawyer
+        matter.save()
+        self.assertEqual(self.summary(self.lawyer).matter_count, 0)
+        self.assertEqual(self.summary(self.lawyer).total_amount, Money(0))
+        self.assertEqual(self.summary(self.other_lawyer).matter_count, 2)
+        self.assertEqual(find_drift(), [])
+
+    def test_rebuild_repairs_bulk_update_drift(self):
+        make_matter(self.lawyer, self.client_, "Lease")
+        Matter.objects.update(amount=Decimal("500"))
+        self.assertEqual(find_drift(), [self.lawyer.pk])
+        with self.assertRaises(CommandError):
+            call_command("rebuild_matter_summaries", "--check", stdout=StringIO())
+        call_command("rebuild_matter_summaries", stdout=StringIO())
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(self.summary(self.lawyer).over_budget_count, 1)
+
+    def test_deleting_a_lawyer_cascades_cleanly(self):
+        make_matter(self.lawyer, self.client_, "Lease")
+        self.lawyer.delete()
+        self.assertFalse(LawyerMatterSummary.objects.exists())
+
+
+class PretaskProgressTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+
+    def setUp(self):
+        cache.clear()
+        self.matter = make_matter(self.lawyer, self.client_, "Lease")
+        # A superuser's permission check costs no query of its own.
+        self.client.force_login(User.objects.create_user("reader", is_superuser=True))
+
+    def progress(self, matter=None):
+        matter = Matter.objects.get(pk=(matter or self.matter).pk)
+        return matter.pretask_completed, matter.pretask_total
+
+    def make_pretask(self, title, matter=None, **fields):
+        return Pretask.objects.create(
+            title=title, description="", matter_key=matter or self.matter, **fields
+        )
+
+    def test_single_pretasks_move_the_counters(self):
+        sign = self.make_pretask("Sign")
+        pay = self.make_pretask("Pay")
+        self.make_pretask("Old", is_active=False, is_complete=True)
+        self.assertEqual(self.progress(), (0, 2))
+
+        sign.is_complete = True
+        sign.save()
+        self.assertEqual(self.progress(), (1, 2))
+        # Saving again without a change leaves them alone.
+        sign.save()
+        self.assertEqual(self.progress(), (1, 2))
+
+        sign = Pretask.objects.get(pk=sign.pk)
+        sign.is_active = False
+        sign.save()
+        self.assertEqual(self.progress(), (0, 1))
+
+        Pretask.objects.get(pk=pay.pk).delete()
+        self.assertEqual(self.progress(), (0, 0))
+        self.assertEqual(progress.find_drift(), [])
+
+    def test_moving_a_pretask_between_matters(self):
+        other = make_matter(self.lawyer, self.client_, "Will")
+        pretask = self.make_pretask("Sign", is_complete=True)
+        pretask = Pretask.objects.only("title", "matter_key").get(pk=pretask.pk)
+        pretask.matter_key = other
+        pretask.save()
+        self.assertEqual(self.progress(), (0, 0))
+        self.assertEqual(self.progress(other), (1, 1))
+        self.assertEqual(progress.find_drift(), [])
+
+    def test_bulk_operations_move_the_counters(self):
+        other = make_matter(self.lawyer, self.client_, "Will")
+        pretasks = Pretask.objects.bulk_create(
+            Pretask(title=f"Step {n}", description="", matter_key=self.matter)
+            for n in range(4)
+        )
+        self.assertEqual(self.progress(), (0, 4))
+
+        Pretask.objects.filter(title__in=["Step 0", "Step 1"]).update(is_complete=True)
+        self.assertEqual(self.progress(), (2, 4))
+
+        pretasks[2].matter_key = other
+        pretasks[3].is_active = False
+        Pretask.objects.bulk_update(pretasks[2:], ["matter_key", "is_active"])
+        self.assertEqual(self.progress(), (2, 2))
+        self.assertEqual(self.progress(other), (0, 1))
+
+        Pretask.objects.filter(title="Step 0").delete()
+        self.assertEqual(self.progress(), (1, 1))
+        self.assertEqual(progress.find_drift(), [])
+
+    def test_expression_updates_are_recounted(self):
+        self.make_pretask("Sign")
+        Pretask.objects.update(is_complete=F("is_active"))
+        self.assertEqual(self.progress(), (1, 1))
+        self.assertEqual(progress.find_drift(), [])
+
+    def test_saving_a_stale_matter_keeps_the_counters(self):
+        matter = Matter.objects.get(pk=self.matter.pk)
+        self.make_pretask("Sign")
+        matter.title = "New lease"
+        matter.save()
+        self.assertEqual(self.progress(), (0, 1))
+
+    def test_repair_command_fixes_drift(self):
+        self.make_pretask("Sign", is_complete=True)
+        Matter.objects.update(pretask_total=5)
+        self.assertEqual(progress.find_drift(), [self.matter.pk])
+        with self.assertRaises(CommandError):
+            call_command("repair_pretask_progress", "--check", stdout=StringIO())
+        call_command("repair_pretask_progress", stdout=StringIO())
+        self.assertEqual(progress.find_drift(), [])
+        self.assertEqual(self.progress(), (1, 1))
+
+    def test_overview_shows_progress_without_extra_queries(self):
+        url = f"/matters/lawyer/{self.lawyer.pk}/"
+        self.make_pretask("Sign", is_complete=True)
+        self.make_pretask("Pay")
+        # The session, the user, the page and the summary.
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertContains(response, "<td>1 of 2</td>", html=True)
+        # Completing a pre-task expires the cached page.
+        with self.captureOnCommitCallbacks(execute=True):
+            Pretask.objects.update(is_complete=True)
+        self.assertContains(self.client.get(url), "<td>2 of 2</td>", html=True)
+
+
+class TimeLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+
+    def setUp(self):
+        cache.clear()
+        self.matter = make_matter(self.lawyer, self.client_, "Lease")
+
+    def buckets(self, period):
+        return list(
+            TimeRollup.objects.filter(period=period)
+            .order_by("start")
+            .values_list("start", "hours", "entry_count")
+        )
+
+    def logged_hours(self):
+        return Matter.objects.get(pk=self.matter.pk).logged_hours
+
+    def assert_no_drift(self):
+        self.assertEqual(ledger.find_drift(), ([], []))
+
+    def test_entries_add_to_buckets_matter_and_summary(self):
+        versions = current_versions([("matter", self.matter.pk)])
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.log(
+                self.matter,
+                self.lawyer,
+                NOON,
+                NOON + timedelta(minutes=90),
+                note="Call",
+            )
+            ledger.log(self.matter, self.lawyer, NOON, NOON, Decimal("0.25"))
+        self.assertEqual(self.logged_hours(), Decimal("1.75"))
+        self.assertEqual(self.lawyer.matter_summary.total_logged_hours, Decimal("1.75"))
+        self.assertEqual(
+            self.buckets(TimeRollup.Periods.DAY),
+            [(date(2026, 3, 8), Decimal("1.75"), 2)],
+        )
+        self.assertNotEqual(current_versions([("matter", self.matter.pk)]), versions)
+        self.assert_no_drift()
+
+    def test_corrections_are_negative_entries(self):
+        ledger.log(self.matter, self.lawyer, NOON, NOON, Decimal("3"))
+        ledger.log(self.matter, self.lawyer, NOON, NOON, Decimal("-1"), "Typo")
+        self.assertEqual(TimeEntry.objects.count(), 2)
+        self.assertEqual(self.logged_hours(), Decimal("2"))
+        self.assertEqual(
+            self.buckets(TimeRollup.Periods.DAY), [(date(2026, 3, 8), Decimal("2"), 2)]
+        )
+        self.assert_no_drift()
+
+    def test_weeks_start_on_monday(self):
+        monday = NOON + timedelta(days=1)
+        ledger.append(
+            [
+                ledger.entry(self.matter, self.lawyer, NOON, NOON, 1),
+                ledger.entry(self.matter, self.lawyer, monday, monday, 2),
+                ledger.entry(self.matter, self.lawyer, monday, monday, 4),
+            ]
+        )
+        self.assertEqual(
+            self.buckets(TimeRollup.Periods.WEEK),
+            [(date(2026, 3, 2), Decimal("1"), 1), (date(2026, 3, 9), Decimal("6"), 2)],
+        )
+        self.assertEqual(
+            ledger.period_hours(
+                TimeRollup.Periods.DAY, date(2026, 3, 8), date(2026, 3, 10)
+            ),
+            [(date(2026, 3, 8), Decimal("1")), (date(2026, 3, 9), Decimal("6"))],
+        )
+
+    def test_period_reports_are_one_query(self):
+        other = make_matter(self.lawyer, self.client_, "Will")
+        ledger.append(
+            ledger.entry(matter, self.lawyer, NOON, NOON, 1)
+            for matter in (self.matter, other, other)
+        )
+        with self.assertNumQueries(1):
+            hours = ledger.period_hours(
+                TimeRollup.Periods.WEEK,
+                date(2026, 1, 5),
+                date(2026, 4, 6),
+                lawyer_id=self.lawyer.pk,
+            )
+        self.assertEqual(hours, [(date(2026, 3, 2), Decimal("3"))])
+
+    def test_hours_view(self):
+        user = User.objects.create_user("clerk")
+        user.user_permissions.add(Permission.objects.get(codename="view_matter"))
+        self.client.force_login(user)
+        ledger.log(self.matter, self.lawyer, NOON, NOON, Decimal("1.5"))
+        response = self.client.get(
+            "/matters/hours/",
+            {"period": "week", "from": "2026-03-04", "to": "2026-03-10"},
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "period": "week",
+                "from": "2026-03-02",
+                "to": "2026-03-10",
+                "buckets": [{"start": "2026-03-02", "hours": "1.50"}],
+                "total": "1.50",
+            },
+        )
+        response = self.client.get("/matters/hours/", {"matter": str(self.matter.pk)})
+        self.assertEqual(response.status_code, 200)
+        for params in ({"period": "month"}, {"from": "March"}, {"lawyer": "x"}):
+            response = self.client.get("/matters/hours/", params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_opening_balances_for_bulk_created_matters(self):
+        matters = Matter.objects.bulk_create(
+            [
+                Matter(
+                    title=title,
+                    description="",
+                    lawyer_key=self.lawyer,
+                    client_key=self.client_,
+                    start_date=date(2026, 1, 1),
+                    logged_hours=hours,
+                )
+                for title, hours in (("Will", Decimal("4.5")), ("Deed", 0))
+            ]
+        )
+        self.assertEqual(ledger.open_balances(matters), 1)
+        entry = TimeEntry.objects.get()
+        self.assertEqual(entry.note, ledger.OPENING_NOTE)
+        self.assertEqual(timezone.localdate(entry.started_at), date(2026, 1, 1))
+        self.assert_no_drift()
+
+    def test_saving_a_stale_matter_keeps_its_hours(self):
+        stale = Matter.objects.get(pk=self.matter.pk)
+        ledger.log(self.matter, self.lawyer, NOON, NOON, 2)
+        stale.title = "Lease renewal"
+        stale.save()
+        self.assertEqual(self.logged_hours(), Decimal("2"))
+
+    def test_rebuild_repairs_drift(self):
+        ledger.log(self.matter, self.lawyer, NOON, NOON, 2)
+        TimeRollup.objects.update(hours=5)
+        Matter.objects.update(logged_hours=7)
+        buckets, matters = ledger.find_drift()
+        self.assertEqual((len(buckets), matters), (2, [self.matter.pk]))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_time_rollups", "--check", stdout=StringIO())
+        call_command("rebuild_time_rollups", stdout=StringIO())
+        self.assert_no_drift()
+        self.assertEqual(self.logged_hours(), Decimal("2"))
+        self.assertEqual(self.lawyer.matter_summary.total_logged_hours, Decimal("2"))
+
+
+def eight_am(day):
+    return timezone.make_aware(datetime.combine(day, time(8)))
+
+
+@override_settings(
+    REMINDER_DAYS_BEFORE=[7, 1, 0], REMINDER_HOUR=8, REMINDER_LEASE_SECONDS=300
+)
+class ReminderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer(email="lawyer@example.com")
+        cls.client_ = create_client(email="client@example.com")
+
+    def reminder_at(self, matter):
+        return Matter.objects.get(pk=matter.pk).next_reminder_at
+
+    def test_matters_are_scheduled_from_their_due_date(self):
+        due = timezone.localdate() + timedelta(days=30)
+        matter = make_matter(self.lawyer, self.client_, "Lease", due_date=due)
+        self.assertEqual(self.reminder_at(matter), eight_am(due - timedelta(days=7)))
+        stale = Matter.objects.get(pk=matter.pk)
+
+        matter.due_date += timedelta(days=10)
+        matter.save()
+        self.assertEqual(self.reminder_at(matter), eight_am(due + timedelta(days=3)))
+        matter.is_active = False
+        matter.save()
+        self.assertIsNone(self.reminder_at(matter))
+        # Saving a copy loaded earlier doesn't bring the reminder back.
+        stale.title = "Lease renewal"
+        stale.save()
+        self.assertIsNone(self.reminder_at(matter))
+        self.assertIsNone(
+            self.reminder_at(make_matter(self.lawyer, self.client_, "Will"))
+        )
+
+    def test_due_reminders_are_emailed_and_moved_on(self):
+        due = date(2026, 3, 20)
+        lease = make_matter(self.lawyer, self.client_, "Lease", due_date=due)
+        Pretask.objects.create(title="Sign", description="", matter_key=lease)
+        Pretask.objects.create(
+            title="Pay", description="", matter_key=lease, is_complete=True
+        )
+        will = make_matter(
+            self.lawyer, self.client_, "Will", due_date=due + timedelta(days=1)
+        )
+        make_matter(self.lawyer, self.client_, "Deed", due_date=due.replace(month=4))
+        reminders.reschedule(Matter.objects.all(), eight_am(date(2026, 3, 10)))
+
+        now = eight_am(date(2026, 3, 14)) + timedelta(hours=1)
+        claim_id, keys = reminders.claim(10, now)
+        self.assertCountEqual(keys, [lease.pk, will.pk])
+        # Claimed matters are not claimed again while the lease lasts.
+        self.assertEqual(reminders.claim(10, now)[1], [])
+
+        self.assertEqual(reminders.deliver(claim_id, keys, now), 2)
+        to_lawyer, to_client = mail.outbox
+        self.assertEqual(to_lawyer.to, ["lawyer@example.com"])
+        self.assertEqual(to_lawyer.subject, "2 matters are due soon")
+        self.assertIn(
+            "Lease: due Fri 20 Mar 2026 (in 6 days), 1 of 2 pre-tasks done",
+            to_lawyer.body,
+        )
+        self.assertEqual(to_client.to, ["client@example.com"])
+        self.assertEqual(to_client.body, "Lease, due Fri 20 Mar 2026:\n- Sign\n")
+        self.assertEqual(self.reminder_at(lease), eight_am(date(2026, 3, 19)))
+        self.assertEqual(self.reminder_at(will), eight_am(date(2026, 3, 20)))
+
+    def test_expired_claims_are_claimed_again(self):
+        matter = make_matter(self.lawyer, self.client_, "Lease")
+        now = timezone.now()
+        Matter.objects.update(due_date=timezone.localdate(), next_reminder_at=now)
+        first_claim, keys = reminders.claim(10, now)
+        self.assertEqual(keys, [matter.pk])
+        later = now + timedelta(seconds=301)
+        second_claim, keys = reminders.claim(10, later)
+        self.assertEqual(keys, [matter.pk])
+        # The first worker lost its claim, so it leaves the matter alone.
+        self.assertEqual(reminders.deliver(first_claim, keys, later), 0)
+        self.assertEqual(reminders.deliver(second_claim, keys, later), 1)
+
+    def test_claims_skip_locked_rows_where_supported(self):
+        matter = make_matter(self.lawyer, self.client_, "Lease")
+        now = timezone.now()
+        Matter.objects.update(next_reminder_at=now)
+        with mock.patch.object(
+            connection.features, "has_select_for_update_skip_locked", True
+        ):
+            claim_id, keys = reminders.claim(10, now)
+        self.assertEqual(keys, [matter.pk])
+        self.assertEqual(Matter.objects.get().reminder_claim, claim_id)
+
+    def test_command_reschedules_and_sends(self):
+        today = timezone.localdate()
+        matter = make_matter(
+            self.lawyer, self.client_, "Lease", due_date=today + timedelta(days=30)
+        )
+        Matter.objects.update(due_date=today + timedelta(days=2))
+        call_command("send_reminders", "--reschedule", stdout=StringIO())
+        tomorrow = eight_am(today + timedelta(days=1))
+        self.assertEqual(self.reminder_at(matter), tomorrow)
+
+        out = StringIO()
+        call_command(
+            "send_reminders",
+            "--until",
+            tomorrow.isoformat(),
+            "--workers",
+            "1",
+            stdout=out,
+        )
+        self.assertIn("Sent 1 emails for 1 matters in 1 batches", out.getvalue())
+        self.assertEqual(mail.outbox[0].subject, "Lease is due soon")
+
+
+class BatchValidationTests(TestCase):
+    """validate_batch() must agree with clean() on every row.
+
+    Rows are drawn at random, from a fixed seed, out of values that reach
+    every branch of the rules and both sides of each comparison.
+    """
+
+    EXAMPLES = 2000
+
+    def random_matter(self, rng, today):
+        return {
+            "has_client_permission": rng.random() < 0.3,
+            "has_client_pre_tasks": rng.random() < 0.3,
+            "has_external_services": rng.random() < 0.3,
+            "logged_hours": rng.choice(
+                [Decimal("0"), Decimal("0.00"), Decimal("0.01"), Decimal("9999.99")]
+            ),
+            "start_date": today + timedelta(days=rng.choice([-365, -1, 0, 1, 365])),
+        }
+
+    def assertAgrees(self, model, rows, **kwargs):
+        expected = [clean_error(model(**row)) for row in rows]
+        columns = {name: [row[name] for row in rows] for name in rows[0]}
+        if "address" in columns:
+            columns["address"] = [a and a.pk for a in columns["address"]]
+        self.assertEqual(model.validate_batch(columns, **kwargs), expected)
+        return expected
+
+    def test_matters_agree_with_clean(self):
+        rng = random.Random(18)
+        today = date.today()
+        rows = [self.random_matter(rng, today) for _ in range(self.EXAMPLES)]
+        codes = self.assertAgrees(Matter, rows, today=today)
+        # Every outcome was reached.
+        self.assertEqual(set(codes), {None, *Matter.CLEAN_ERRORS})
+
+    def test_contacts_agree_with_clean(self):
+        rng = random.Random(19)
+        location = Location.objects.create()
+        rows = [
+            {
+                "email": rng.choice([None, "", "a@example.com"]),
+                "phone": rng.choice([None, "", "555 0100"]),
+                "website": rng.choice([None, "", "example.com"]),
+                "address": rng.choice([None, location]),
+            }
+            for _ in range(self.EXAMPLES)
+        ]
+        codes = self.assertAgrees(Contact, rows)
+        self.assertEqual(set(codes), {None, "contact_details_missing"})
+
+    def test_values_and_querysets_are_accepted(self):
+        lawyer, client = create_lawyer(), create_client()
+        rng = random.Random(20)
+        today = date.today()
+        Matter.objects.bulk_create(
+            Matter(
+                title=f"Matter {n}",
+                description="",
+                lawyer_key=lawyer,
+                client_key=client,
+                **self.random_matter(rng, today),
+            )
+            for n in range(50)
+        )
+        matters = Matter.objects.order_by("pk")
+        expected = [clean_error(matter) for matter in matters]
+        self.assertEqual(Matter.validate_batch(matters), expected)
+        self.assertEqual(Matter.validate_batch(matters.values()), expected)
+        self.assertEqual(Matter.validate_batch(Matter.objects.none()), [])
+
+    def test_clean_raises_the_coded_message(self):
+        matter = Matter(has_client_pre_tasks=True)
+        with self.assertRaisesMessage(
+            ValidationError, Matter.CLEAN_ERRORS["pretasks_need_permission"]
+        ):
+            matter.clean()
+
+    def test_columns_must_line_up(self):
+        with self.assertRaises(ValueError):
+            Contact.validate_batch(
+                {"email": ["a"], "phone": ["b"], "website": ["c"], "address": []}
+            )
+
+
+class ImportMattersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.address = Location.objects.create()
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def run_import(self, name, content, *args):
+        path = self.directory / name
+        path.write_text(content)
+        call_command("import_matters", str(path), *args, stdout=StringIO())
+        rejects = Path(f"{path}.rejects.jsonl").read_text().splitlines()
+        return [json.loads(line) for line in rejects]
+
+    def test_csv_matters_are_validated_and_imported(self):
+        rejects = self.run_import(
+            "matters.csv",
+            "title,description,amount,lawyer_key,client_key,has_client_pre_tasks\n"
+            f"Lease,Review lease,50,{self.lawyer.pk},{self.client_.pk},\n"
+            f"Will,Draft will,abc,{self.lawyer.pk},{self.client_.pk},\n"
+            f"Trust,Set up trust,10,{self.lawyer.pk},{self.client_.pk},True\n"
+            f",No title,10,{self.lawyer.pk},{self.client_.pk},\n"
+            f"Deed,Check deed,10,999,{self.client_.pk},\n",
+        )
+        self.assertEqual(
+            list(Matter.objects.values_list("title", flat=True)), ["Lease"]
+        )
+        self.assertEqual([reject["line"] for reject in rejects], [3, 4, 5, 6])
+        self.assertIn("amount", rejects[0]["errors"])
+        # Matter.clean: pre-tasks need the client's permission.
+        self.assertIn("__all__", rejects[1]["errors"])
+        self.assertIn("title", rejects[2]["errors"])
+        self.assertIn("lawyer_key", rejects[3]["errors"])
+        self.assertEqual(self.lawyer.matter_summary.matter_count, 1)
+
+    def test_jsonl_contacts_and_pretasks(self):
+        matter = make_matter(self.lawyer, self.client_, "Lease")
+        contact = {
+            "first_name": "Ada",
+            "last_name": "Byron",
+            "email": "ada@example.com",
+            "phone": "0123",
+            "website": "example.com",
+            "address": self.address.pk,
+            "matters": str(matter.pk),
+        }
+        rejects = self.run_import(
+            "contacts.jsonl",
+            json.dumps(contact) + "\n" + json.dumps(dict(contact, email="")) + "\n",
+            "--model",
+            "contact",
+        )
+        self.assertEqual(len(rejects), 1)
+        self.assertEqual(list(matter.external_contact.all()), [Contact.objects.get()])
+
+        rejects = self.run_import(
+            "pretasks.jsonl",
+            json.dumps(
+                {"title": "Sign", "description": "Sign", "matter_key": str(matter.pk)}
+            )
+            + "\n",
+            "--model",
+            "pretask",
+        )
+        self.assertEqual(rejects, [])
+        self.assertEqual(matter.pretask.get().title, "Sign")
+
+    def test_lines_that_are_not_json_objects_are_rejected(self):
+        pretask = {"title": "Sign", "description": "Sign", "matter_key": "x"}
+        rejects = self.run_import(
+            "pretasks.jsonl",
+            '{"title": "Sign",\n["x"]\n"Sign"\n' + json.dumps(pretask) + "\n",
+            "--model",
+            "pretask",
+        )
+        self.assertEqual([reject["line"] for reject in rejects], [1, 2, 3, 4])
+        self.assertEqual(rejects[0]["row"], '{"title": "Sign",')
+        self.assertIn("Not valid JSON", rejects[0]["errors"]["__all__"][0])
+        self.assertEqual(rejects[1]["row"], ["x"])
+        self.assertEqual(
+            rejects[2]["errors"], {"__all__": ["A row must be a JSON object."]}
+        )
+        self.assertIn("matter_key", rejects[3]["errors"])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.matters = [
+            make_matter(cls.lawyer, cls.client_, title) for title in ("Lease", "Will")
+        ]
+        make_matter(create_lawyer(), cls.client_, "Other lawyer's matter")
+        cls.user = User.objects.create_user("auditor")
+        cls.user.user_permissions.add(Permission.objects.get(codename="view_matter"))
+
+    def test_export_requires_permission(self):
+        self.client.force_login(User.objects.create_user("nobody"))
+        self.assertEqual(self.client.get("/matters/export/").status_code, 403)
+
+    def test_csv_export_streams_one_lawyer(self):
+        self.client.force_login(self.user)
+        response = self.client.get("/matters/export/", {"lawyer": self.lawyer.pk})
+        self.assertTrue(response.streaming)
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(rows[0][:2], ["key", "title"])
+        self.assertEqual(
+            sorted(row[1] for row in rows[1:]),
+            [matter.title for matter in self.matters],
+        )
+
+    def test_jsonl_export(self):
+        self.client.force_login(self.user)
+        response = self.client.get("/matters/export/", {"format": "jsonl"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(
+            json.loads(lines[0])["key"], {str(m.key) for m in Matter.objects.all()}
+        )
+
+    async def test_export_streams_under_asgi(self):
+        await sync_to_async(self.client.force_login)(self.user)
+        cookie = self.client.cookies[settings.SESSION_COOKIE_NAME]
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "asgi": {"version": "3"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/matters/export/",
+                "raw_path": b"/matters/export/",
+                "query_string": b"format=jsonl",
+                "root_path": "",
+                "headers": [
+                    (b"host", b"testserver"),
+                    (b"cookie", f"{cookie.key}={cookie.value}".encode()),
+                ],
+                "client": ("127.0.0.1", 50000),
+                "server": ("testserver", 80),
+            },
+        )
+        await communicator.send_input({"type": "http.request"})
+        start = await communicator.receive_output(5)
+        self.assertEqual(start["status"], 200)
+        body = b""
+        while True:
+            message = await communicator.receive_output(5)
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        self.assertEqual(len(body.decode().splitlines()), 3)
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.matter = make_matter(
+            cls.lawyer, cls.client_, "Lease", amount=Decimal("12.34")
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = f"/matters/lawyer/{self.lawyer.pk}/"
+        # A superuser's permission check costs no query of its own.
+        self.client.force_login(User.objects.create_user("reader", is_superuser=True))
+
+    def test_repeat_views_are_served_from_cache(self):
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        # Only the session and the user are loaded.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertContains(response, "12.34")
+        # One page and one row missed, then the page hit.
+        self.assertEqual(stats(), {"hits": 1, "misses": 2, "hit_ratio": 0.3333})
+
+    def test_saving_a_matter_expires_its_pages(self):
+        self.client.get(self.url)
+        self.matter.amount = Decimal("56.78")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.matter.save()
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertContains(response, "56.78")
+        self.assertNotContains(response, "12.34")
+
+    def test_moving_a_matter_expires_the_old_lawyers_pages(self):
+        self.client.get(self.url)
+        matter = Matter.objects.get(pk=self.matter.pk)
+        matter.lawyer_key = create_lawyer()
+        with self.captureOnCommitCallbacks(execute=True):
+            matter.save()
+        self.assertNotContains(self.client.get(self.url), "Lease")
+
+    def test_versions_move_when_the_write_commits(self):
+        scopes = [("matter", self.matter.pk)]
+        versions = current_versions(scopes)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.matter.save()
+            # A reader before the commit still caches under the old version.
+            self.assertEqual(current_versions(scopes), versions)
+        self.assertNotEqual(current_versions(scopes), versions)
+
+
+class MatterAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.admin = User.objects.create_superuser("admin")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/admin/matters/matter/")
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        make_matter(self.lawyer, self.client_, "Lease")
+        few = self.changelist_queries()
+        for number in range(20):
+            make_matter(create_lawyer(), create_client(), f"M{number}")
+        self.assertEqual(self.changelist_queries(), few)
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite has no planner estimate.")
+    def test_counts_past_the_limit_without_an_estimate_are_exact(self):
+        for number in range(4):
+            make_matter(self.lawyer, self.client_, f"Matter {number}")
+        paginator = EstimatedCountPaginator(Matter.objects.all(), 2)
+        paginator.limit = 3
+        # Every page stays reachable.
+        self.assertEqual(paginator.count, 4)
+        self.assertEqual(paginator.num_pages, 2)
+        paginator = EstimatedCountPaginator(Matter.objects.filter(title="Matter 1"), 2)
+        self.assertEqual(paginator.count, 1)
+
+    def search(self, term):
+        response = self.client.get("/admin/matters/matter/", {"q": term})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context["cl"].result_list)
+
+    def test_search_matches_keys_and_title_prefixes(self):
+        lease = make_matter(self.lawyer, self.client_, "Lease")
+        make_matter(self.lawyer, self.client_, "Release")
+        self.assertEqual(self.search("Lea"), [lease])
+        self.assertEqual(self.search(str(lease.pk)), [lease])
+        # Prefixes are case-sensitive, so an index can serve them.
+        self.assertEqual(self.search("lea"), [])
+        self.assertEqual(self.search("not-a-key"), [])
+
+    @skipUnless(connection.vendor == "sqlite", "Reads SQLite's query plan.")
+    def test_searches_and_filters_use_indexes(self):
+        for path, term, indexes in [
+            ("matters.Matter", "Lea", ["matter_title_idx"]),
+            ("matters.Contact", "Sm", ["contact_email_idx", "contact_last_name_idx"]),
+        ]:
+            model_admin = admin.site._registry[apps.get_model(path)]
+            queryset, _ = model_admin.get_search_results(
+                None, model_admin.model.objects.all(), term
+            )
+            plan = queryset.explain()
+            for index in indexes:
+                self.assertIn(f"USING INDEX {index}", plan)
+            self.assertNotIn("SCAN", plan)
+        plan = Matter.objects.filter(
+            due_date__gte=date(2026, 3, 1), due_date__lt=date(2026, 4, 1)
+        ).explain()
+        self.assertIn("USING INDEX matter_due_idx", plan)
+
+    def test_added_time_entries_are_logged_with_their_pk(self):
+        matter = make_matter(self.lawyer, self.client_, "Lease")
+        response = self.client.post(
+            "/admin/matters/timeentry/add/",
+            {
+                "matter": matter.pk,
+                "lawyer": self.lawyer.pk,
+                "started_at_0": "2026-03-08",
+                "started_at_1": "12:00:00",
+                "ended_at_0": "2026-03-08",
+                "ended_at_1": "13:30:00",
+                "hours": "1.5",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        entry = TimeEntry.objects.get()
+        self.assertEqual(LogEntry.objects.get().object_id, str(entry.pk))
+        self.assertEqual(Matter.objects.get(pk=matter.pk).logged_hours, Decimal("1.5"))
+
+    def test_change_form_has_no_related_dropdowns(self):
+        matter = make_matter(self.lawyer, self.client_, "Lease")
+        response = self.client.get(f"/admin/matters/matter/{matter.pk}/change/")
+        self.assertContains(response, 'class="vForeignKeyRawIdAdminField"', count=2)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.lease = make_matter(
+            cls.lawyer,
+            cls.client_,
+            "Lease renewal",
+            description="Commercial lease for the Leeds office",
+        )
+        cls.merger = make_matter(
+            cls.lawyer,
+            cls.client_,
+            "Merger review",
+            description="Check the lease obligations of the target",
+        )
+        make_matter(create_lawyer(), cls.client_, "Leasing dispute")
+        Pretask.objects.create(
+            title="Sign lease", description="Signed copy", matter_key=cls.lease
+        )
+        contact = Contact.objects.create(
+            first_name="Mei", last_name="Chen", company="Leeds Surveyors"
+        )
+        contact.matter_key.add(cls.merger)
+        cls.user = User.objects.create_user("searcher")
+        cls.user.user_permissions.add(Permission.objects.get(codename="view_matter"))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def results(self, **params):
+        response = self.client.get("/matters/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_title_matches_rank_above_description_matches(self):
+        titles = [row["title"] for row in self.results(q="lease")["results"]]
+        # "Leasing" matches too, as both stem to "leas".
+        self.assertEqual(set(titles[:2]), {"Lease renewal", "Leasing dispute"})
+        self.assertEqual(titles[-1], "Merger review")
+
+    def test_lawyer_filter_and_pages(self):
+        first = self.results(q="lease", lawyer=self.lawyer.pk, size=1)
+        self.assertEqual(first["results"][0]["title"], "Lease renewal")
+        self.assertEqual(first["next_page"], 2)
+        second = self.results(q="lease", lawyer=self.lawyer.pk, size=1, page=2)
+        self.assertEqual(second["results"][0]["title"], "Merger review")
+        self.assertIsNone(second["next_page"])
+
+    def test_contacts_and_pretasks(self):
+        contacts = self.results(q="leeds surv", type="contact", lawyer=self.lawyer.pk)
+        self.assertEqual([row["last_name"] for row in contacts["results"]], ["Chen"])
+        pretasks = self.results(q="sign", type="pretask")
+        self.assertEqual([row["title"] for row in pretasks["results"]], ["Sign lease"])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.lease.title = "Tenancy renewal"
+        self.lease.description = "Residential"
+        self.lease.save()
+        self.merger.delete()
+        titles = [row["title"] for row in self.results(q="lease")["results"]]
+        self.assertEqual(titles, ["Leasing dispute"])
+        self.assertEqual(len(self.results(q="tenancy")["results"]), 1)
+
+    @skipUnless(connection.vendor == "sqlite", "Insertion order is SQLite's rowid.")
+    def test_broad_queries_come_newest_first(self):
+        with mock.patch("matters.search.RANK_LIMIT", 1):
+            titles = [row["title"] for row in self.results(q="lease")["results"]]
+        self.assertEqual(titles, ["Leasing dispute", "Merger review", "Lease renewal"])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(
+            self.results(q='lease* ("renew')["results"][0]["title"], "Lease renewal"
+        )
+        self.assertEqual(self.results(q="  ")["results"], [])
+
+    @skipUnless(connection.vendor == "sqlite", "Triggers are specific to SQLite.")
+    def test_reindex_command_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER matters_matter_fts_insert")
+        call_command("reindex_search", stdout=StringIO())
+        make_matter(self.lawyer, self.client_, "Probate advice")
+        self.assertEqual(len(self.results(q="probate")["results"]), 1)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+
+    def setUp(self):
+        cache.clear()
+        self.old = make_matter(
+            self.lawyer,
+            self.client_,
+            "Closed lease",
+            amount=Decimal("150"),
+            start_date=date(2020, 1, 1),
+            due_date=date(2020, 6, 1),
+            is_active=False,
+        )
+        Pretask.objects.create(
+            title="Sign", description="", matter_key=self.old, is_complete=True
+        )
+        self.contact = Contact.objects.create(
+            first_name="Ada", last_name="Byron", email="ada@example.com"
+        )
+        self.contact.matter_key.add(self.old)
+        ledger.log(self.old, self.lawyer, NOON, NOON, Decimal("2"))
+        self.old.refresh_from_db()
+        self.before = archive.cutoff(365, NOON)
+
+    def assert_no_drift(self):
+        self.assertEqual(summaries.find_drift(), [])
+        self.assertEqual(ledger.find_drift(), ([], []))
+        self.assertEqual(progress.find_drift(), [])
+
+    def test_archive_moves_a_matter_and_its_rows(self):
+        open_ = make_matter(
+            self.lawyer, self.client_, "Open", start_date=date(2020, 1, 1)
+        )
+        recent = make_matter(
+            self.lawyer, self.client_, "Recent", due_date=date(2026, 1, 1)
+        )
+        recent.is_active = False
+        recent.save()
+
+        self.assertEqual(list(archive.archive(self.before)), [1])
+        self.assertEqual(
+            set(Matter.objects.values_list("pk", flat=True)), {open_.pk, recent.pk}
+        )
+        self.assertFalse(Pretask.objects.filter(matter_key=self.old.pk).exists())
+        self.assertFalse(TimeEntry.objects.filter(matter=self.old.pk).exists())
+        self.assertFalse(TimeRollup.objects.filter(matter=self.old.pk).exists())
+        archived = ArchivedMatter.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.amount, Money.of("150"))
+        self.assertEqual(archived.logged_hours, Decimal("2"))
+        self.assertEqual((archived.pretask_total, archived.pretask_completed), (1, 1))
+        self.assertEqual(list(archived.contacts.all()), [self.contact])
+        self.assertEqual(ArchivedPretask.objects.get().title, "Sign")
+        self.assertEqual(ArchivedTimeEntry.objects.get().hours, Decimal("2"))
+        self.assertEqual(self.lawyer.matter_summary.matter_count, 2)
+        self.assert_no_drift()
+        # Nothing is left to move on a second run.
+        self.assertEqual(list(archive.archive(self.before)), [])
+
+    def test_find_and_lookup_read_both_tables(self):
+        hot = make_matter(self.lawyer, self.client_, "Hot")
+        archive.archive_matters([self.old.pk], self.before)
+        rows = archive.find("key", "title", lawyer_key=self.lawyer).order_by("title")
+        self.assertEqual(
+            [(row["title"], row["archived_at"] is None) for row in rows],
+            [("Closed lease", False), ("Hot", True)],
+        )
+        self.assertIsInstance(archive.lookup(self.old.pk), ArchivedMatter)
+        self.assertEqual(archive.lookup(hot.pk), hot)
+
+    def test_restore_puts_everything_back(self):
+        fields = Matter.objects.filter(pk=self.old.pk).values(*archive.MATTER_COLUMNS)
+        was = fields.get()
+        rollups = list(TimeRollup.objects.values_list("period", "start", "hours"))
+        archive.archive_matters([self.old.pk], self.before)
+
+        self.assertEqual(archive.restore([self.old.pk]), 1)
+        self.assertEqual(fields.get(), was)
+        self.assertFalse(ArchivedMatter.objects.exists())
+        self.assertEqual(Pretask.objects.get(matter_key=self.old.pk).title, "Sign")
+        self.assertEqual(list(self.contact.matter_key.all()), [self.old])
+        self.assertEqual(
+            list(TimeRollup.objects.values_list("period", "start", "hours")), rollups
+        )
+        self.assertEqual(self.lawyer.matter_summary.total_amount, Money.of("150"))
+        self.assert_no_drift()
+
+    def test_archived_matters_are_rechecked(self):
+        self.old.is_active = True
+        self.old.save()
+        self.assertEqual(archive.archive_matters([self.old.pk], self.before), 0)
+        self.assertTrue(Matter.objects.filter(pk=self.old.pk).exists())
+
+    def test_archive_copies_every_matter_field(self):
+        # Reminder bookkeeping is rebuilt on restore rather than kept.
+        self.assertEqual(
+            set(field.attname for field in Matter._meta.concrete_fields)
+            - set(archive.MATTER_COLUMNS),
+            {"next_reminder_at", "reminder_claim"},
+        )
+
+    def test_command_reports_tables_and_latency(self):
+        out = StringIO()
+        call_command(
+            "archive_matters", "--older-than=365", "--repeat=1", "--json", stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["archived"], 1)
+        table = Matter._meta.db_table
+        self.assertEqual(report["before"]["tables"][table]["rows"], 1)
+        self.assertEqual(report["after"]["tables"][table]["rows"], 0)
+        self.assertEqual(
+            set(report["after"]["latency_ms"]),
+            {"lawyer page", "lawyer count", "title page", "count"},
+        )
+        call_command("archive_matters", "--restore", str(self.old.pk), stdout=out)
+        self.assertTrue(Matter.objects.filter(pk=self.old.pk).exists())
+
+    def test_admin_restores_archived_matters(self):
+        archive.archive_matters([self.old.pk], self.before)
+        self.client.force_login(User.objects.create_superuser("admin"))
+        response = self.client.get(
+            f"/admin/matters/archivedmatter/{self.old.pk}/change/"
+        )
+        self.assertContains(response, "Sign")
+        self.client.post(
+            "/admin/matters/archivedmatter/",
+            {"action": "restore_matters", "_selected_action": [self.old.pk]},
+        )
+        self.assertTrue(Matter.objects.filter(pk=self.old.pk).exists())
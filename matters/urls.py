@@ -4,4 +4,8 @@ from . import views
 
 urlpatterns = [
     path("", views.index, name="Matters"),
+    path("lawyer/<int:lawyer_id>/", views.lawyer_overview, name="Lawyer matters"),
+    path("export/", views.export, name="Export matters"),
+    path("search/", views.search, name="Search matters"),
+    path("hours/", views.hours, name="Matter hours"),
 ]
@@ -1,9 +1,204 @@
+from datetime import date, timedelta
+from functools import partial
+from uuid import UUID
+
+from django.contrib.auth.decorators import permission_required
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
 from django.views import generic
 
+from the_acce.cache import cached_fragment
+from the_acce.exports import export_response
+
+from . import ledger
+from .models import Contact, LawyerMatterSummary, Matter, Pretask, TimeRollup
+from .pagination import clamp_page_size, keyset_page
+from .search import SEARCH_FIELDS
+from .search import search as full_text_search
+
 
 def index(request):
     return render(
         request,
         "matters_overview.html",
     )
+
+
+def render_lawyer_matters(lawyer_id, after=None, size=None):
+    """Returns the HTML for one page of a lawyer's matters and their totals.
+
+    The page is cached until any of the lawyer's matters change and each row
+    until its own matter changes, so a cache hit costs no queries.
+    """
+    size = clamp_page_size(size)
+
+    def render_row(matter):
+        return render_to_string("matters/matter_row.html", {"matter": matter})
+
+    def render_page():
+        matters = Matter.objects.filter(lawyer_key_id=lawyer_id).select_related(
+            "client_key", "lawyer_key"
+        )
+        page = keyset_page(matters, after=after, size=size)
+        summary = LawyerMatterSummary.objects.filter(lawyer_id=lawyer_id).first()
+        rows = [
+            mark_safe(
+                cached_fragment(
+                    "matter-row",
+                    [matter.pk],
+                    [("matter", matter.pk)],
+                    partial(render_row, matter),
+                )
+            )
+            for matter in page
+        ]
+        return render_to_string(
+            "matters/lawyer_matters.html",
+            {"page": page, "summary": summary, "rows": rows},
+        )
+
+    return mark_safe(
+        cached_fragment(
+            "lawyer-matters",
+            [lawyer_id, after, size],
+            [("lawyer-matters", lawyer_id)],
+            render_page,
+        )
+    )
+
+
+@permission_required("matters.view_matter", raise_exception=True)
+def lawyer_overview(request, lawyer_id):
+    """Lists a lawyer's matters one keyset page at a time."""
+    return render(
+        request,
+        "matters_overview.html",
+        {
+            "matters": render_lawyer_matters(
+                lawyer_id, request.GET.get("after"), request.GET.get("size")
+            )
+        },
+    )
+
+
+@permission_required("matters.view_matter", raise_exception=True)
+def export(request):
+    """Streams matters as CSV or JSONL, optionally for one lawyer or client."""
+    matters = Matter.objects.all()
+    try:
+        if "lawyer" in request.GET:
+            matters = matters.filter(lawyer_key_id=int(request.GET["lawyer"]))
+        if "client" in request.GET:
+            matters = matters.filter(client_key_id=int(request.GET["client"]))
+    except ValueError:
+        raise BadRequest("Lawyer and client must be ids.")
+    return export_response(matters, "matters", request.GET.get("format", "csv"))
+
+
+# Searchable types by name, and the lookup restricting each to one lawyer.
+SEARCH_TYPES = {
+    "matter": (Matter, lambda lawyer: Q(lawyer_key_id=lawyer)),
+    "contact": (
+        Contact,
+        lambda lawyer: Q(
+            pk__in=Contact.matter_key.through.objects.filter(
+                matter__lawyer_key_id=lawyer
+            ).values("contact_id")
+        ),
+    ),
+    "pretask": (Pretask, lambda lawyer: Q(matter_key__lawyer_key_id=lawyer)),
+}
+
+
+@permission_required("matters.view_matter", raise_exception=True)
+def search(request):
+    """Returns a page of ranked full-text matches as JSON.
+
+    Takes the words in ?q=, a ?type= of matter (the default), contact or
+    pretask, and optionally ?lawyer=, ?page= and ?size=.
+    """
+    query = request.GET.get("q", "")
+    kind = request.GET.get("type", "matter")
+    if kind not in SEARCH_TYPES:
+        raise BadRequest(f"Type must be one of {', '.join(SEARCH_TYPES)}.")
+    model, for_lawyer = SEARCH_TYPES[kind]
+    try:
+        page = int(request.GET.get("page", 1))
+        lawyer = int(request.GET["lawyer"]) if "lawyer" in request.GET else None
+    except ValueError:
+        raise BadRequest("Page and lawyer must be numbers.")
+    if page < 1:
+        raise BadRequest("Pages start at 1.")
+    size = clamp_page_size(request.GET.get("size"))
+
+    queryset = model.objects.all()
+    if lawyer is not None:
+        queryset = queryset.filter(for_lawyer(lawyer))
+    start = (page - 1) * size
+    # One extra row tells whether there is a next page, without a count.
+    rows = list(
+        full_text_search(queryset, query).values("key", *SEARCH_FIELDS[model], "rank")[
+            start : start + size + 1
+        ]
+    )
+    return JsonResponse(
+        {
+            "query": query,
+            "type": kind,
+            "page": page,
+            "results": rows[:size],
+            "next_page": page + 1 if len(rows) > size else None,
+        }
+    )
+
+
+# Periods by the name ?period= takes, and how far back a report goes by default.
+REPORT_PERIODS = {
+    "day": (TimeRollup.Periods.DAY, timedelta(days=31)),
+    "week": (TimeRollup.Periods.WEEK, timedelta(weeks=12)),
+}
+
+
+@permission_required("matters.view_matter", raise_exception=True)
+def hours(request):
+    """Returns hours logged per day or week as JSON, read from the rollups.
+
+    Takes a ?period= of day (the default) or week, ?from= and ?to= ISO dates
+    (to excluded; by default the last 31 days or 12 weeks), and optionally
+    ?lawyer= and ?matter=.
+    """
+    name = request.GET.get("period", "day")
+    if name not in REPORT_PERIODS:
+        raise BadRequest(f"Period must be one of {', '.join(REPORT_PERIODS)}.")
+    period, default_span = REPORT_PERIODS[name]
+    try:
+        end = date.fromisoformat(
+            request.GET.get("to", str(timezone.localdate() + timedelta(days=1)))
+        )
+        start = date.fromisoformat(request.GET.get("from", str(end - default_span)))
+    except ValueError:
+        raise BadRequest("From and to must be ISO dates.")
+    if start >= end:
+        raise BadRequest("From must be before to.")
+    try:
+        lawyer = int(request.GET["lawyer"]) if "lawyer" in request.GET else None
+        matter = UUID(request.GET["matter"]) if "matter" in request.GET else None
+    except ValueError:
+        raise BadRequest("Lawyer must be a number and matter a key.")
+    # A week that starts before from is reported whole.
+    start = ledger.period_start(period, start)
+    buckets = ledger.period_hours(period, start, end, lawyer, matter)
+    return JsonResponse(
+        {
+            "period": name,
+            "from": start,
+            "to": end,
+            "buckets": [{"start": day, "hours": hours} for day, hours in buckets],
+            "total": sum((hours for _, hours in buckets), ledger.ZERO),
+        }
+    )
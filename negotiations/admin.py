@@ -1,7 +1,124 @@
+from django import forms
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db import transaction
 
-from .models import Negotiation, Client, Lawyer
+from the_acce.admin import ScalableModelAdmin
+from the_acce.exports import export_action
 
-admin.site.register(Negotiation)
-admin.site.register(Lawyer)
-admin.site.register(Client)
+from . import events
+from .models import Negotiation, NegotiationEvent
+
+Kinds = NegotiationEvent.Kinds
+
+
+class NegotiationEventInline(admin.TabularInline):
+    """The negotiation's offer trail. Events are only added by events.record()."""
+
+    model = NegotiationEvent
+    fields = readonly_fields = [
+        "sequence",
+        "kind",
+        "party",
+        "amount",
+        "initial_amount",
+        "budget",
+        "created_at",
+    ]
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class NegotiationForm(forms.ModelForm):
+    """Edits a negotiation; new terms or an acceptance become events.
+
+    Saved negotiations change their terms through the event log: changed
+    terms are recorded as a counter-offer and ticking is_accepted as an
+    acceptance, both by party.
+    """
+
+    party = forms.TypedChoiceField(
+        choices=[("", "---------"), *NegotiationEvent.Parties.choices],
+        coerce=int,
+        empty_value=None,
+        required=False,
+        help_text="Who made the counter-offer or accepted, when the terms change.",
+    )
+
+    class Meta:
+        model = Negotiation
+        fields = "__all__"
+
+    def changes(self):
+        """Returns the (kind, terms) events the changed fields amount to."""
+        if self.instance._state.adding:
+            return []
+        changed = [term for term in events.TERMS if term in self.changed_data]
+        changes = []
+        if changed:
+            changes.append(
+                (Kinds.COUNTER, {term: self.cleaned_data[term] for term in changed})
+            )
+        if "is_accepted" in self.changed_data:
+            changes.append((Kinds.ACCEPT, {}))
+        return changes
+
+    def clean(self):
+        cleaned_data = super().clean()
+        changes = self.changes()
+        if not changes:
+            return cleaned_data
+        if cleaned_data.get("party") is None:
+            raise ValidationError("Say which party changed the terms.")
+        if "is_accepted" in self.changed_data and not cleaned_data["is_accepted"]:
+            raise ValidationError("An accepted negotiation can't be reopened.")
+        # Tried on the recorded state, so the rules are events.apply()'s.
+        state = self.instance._recorded_state
+        for kind, terms in changes:
+            event = NegotiationEvent(
+                sequence=state["version"] + 1,
+                kind=kind,
+                **terms,
+            )
+            state = events.apply(state, event)
+        return cleaned_data
+
+
+@admin.register(Negotiation)
+class NegotiationAdmin(ScalableModelAdmin):
+    form = NegotiationForm
+    actions = [export_action("Export selected negotiations as CSV")]
+    list_display = [
+        "title",
+        "lawyer_key",
+        "client_key",
+        "cost_type",
+        "amount",
+        "is_accepted",
+    ]
+    list_select_related = ["lawyer_key", "client_key"]
+    list_filter = ["is_accepted"]
+    search_fields = ["=key", "^title"]
+    raw_id_fields = ["lawyer_key", "client_key"]
+    inlines = [NegotiationEventInline]
+
+    def get_fields(self, request, obj=None):
+        fields = super().get_fields(request, obj)
+        # Who changed the terms only means something for saved negotiations.
+        return fields if obj else [field for field in fields if field != "party"]
+
+    def save_model(self, request, obj, form, change):
+        changes = form.changes()
+        if not changes:
+            return super().save_model(request, obj, form, change)
+        # The other fields save as usual, and the terms through the log.
+        for field, value in obj._recorded_state.items():
+            setattr(obj, field, value)
+        party = form.cleaned_data["party"]
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            for kind, terms in changes:
+                events.record(obj.pk, kind, party, **terms)
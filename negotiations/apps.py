@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NegotiationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'negotiations'
+
+    def ready(self):
+        # Connects the handlers that expire cached overview fragments and
+        # start the event log of new negotiations.
+        from . import signals  # noqa: F401
@@ -0,0 +1,171 @@
+"""Event sourcing for negotiations.
+
+Every change to a negotiation's terms is appended as a NegotiationEvent, and
+the Negotiation row is updated in the same transaction to hold the result
+of applying all of them: a snapshot. Reading the current terms is therefore
+a primary key lookup, reading the trail is one range scan of the
+(negotiation, sequence) index, and replay() can rebuild the snapshot from
+the trail at any time.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from the_acce.money import Money
+
+from .models import Negotiation, NegotiationEvent
+
+Kinds = NegotiationEvent.Kinds
+
+# Snapshot fields that events set; the terms are also event columns.
+TERMS = ["amount", "initial_amount", "budget"]
+STATE_FIELDS = TERMS + ["is_accepted", "is_withdrawn", "version"]
+
+
+def initial_state():
+    """Returns the state of a negotiation before its first event."""
+    return {
+        "amount": Money(0),
+        "initial_amount": Money(0),
+        "budget": Money(0),
+        "is_accepted": False,
+        "is_withdrawn": False,
+        "version": 0,
+    }
+
+
+def snapshot_state(negotiation):
+    return {field: getattr(negotiation, field) for field in STATE_FIELDS}
+
+
+def apply(state, event):
+    """Returns state with event applied, or raises ValidationError.
+
+    The one place the rules live: recording a new event and replaying old
+    ones both go through it.
+    """
+    if event.sequence != state["version"] + 1:
+        raise ValidationError(
+            f"Event {event.sequence} does not follow version {state['version']}."
+        )
+    if state["is_accepted"] or state["is_withdrawn"]:
+        raise ValidationError("This negotiation is closed.")
+    state = dict(state, version=event.sequence)
+    if event.kind in (Kinds.OFFER, Kinds.COUNTER):
+        if event.kind == Kinds.OFFER and event.sequence != 1:
+            raise ValidationError("Only the first event can be the offer.")
+        if event.kind == Kinds.COUNTER and event.sequence == 1:
+            raise ValidationError("There is no offer to counter yet.")
+        for term in TERMS:
+            value = getattr(event, term)
+            if value is not None:
+                state[term] = value
+        if state["initial_amount"] > state["amount"]:
+            raise ValidationError("The client can't pay more than your base rate!")
+    elif event.kind == Kinds.ACCEPT:
+        if event.sequence == 1:
+            raise ValidationError("There is no offer to accept yet.")
+        state["is_accepted"] = True
+    elif event.kind == Kinds.WITHDRAW:
+        state["is_withdrawn"] = True
+    return state
+
+
+def record(negotiation_id, kind, party, amount=None, initial_amount=None, budget=None):
+    """Appends an event and updates the negotiation's snapshot atomically.
+
+    Amounts are Money or decimals; leave a term as None to keep its current value.
+    Returns the saved event. Concurrent writers are serialised on the
+    negotiation row, so sequences never collide.
+    """
+    with transaction.atomic():
+        negotiation = Negotiation.objects.select_for_update().get(pk=negotiation_id)
+        event = NegotiationEvent(
+            negotiation=negotiation,
+            sequence=negotiation.version + 1,
+            kind=kind,
+            party=party,
+            amount=amount,
+            initial_amount=initial_amount,
+            budget=budget,
+        )
+        state = apply(snapshot_state(negotiation), event)
+        event.save()
+        for field, value in state.items():
+            setattr(negotiation, field, value)
+        negotiation._recorded_state = state
+        negotiation.save(update_fields=STATE_FIELDS)
+    return event
+
+
+def opening_events(negotiation):
+    """Returns unsaved events leading to a negotiation's current terms.
+
+    For negotiations created or edited directly rather than through record():
+    an OFFER of the current terms, then an ACCEPT or WITHDRAW if closed.
+    """
+    events = [
+        NegotiationEvent(
+            negotiation=negotiation,
+            sequence=1,
+            kind=Kinds.OFFER,
+            party=NegotiationEvent.Parties.LAWYER,
+            **{term: getattr(negotiation, term) for term in TERMS},
+        )
+    ]
+    if negotiation.is_accepted:
+        events.append(
+            NegotiationEvent(
+                negotiation=negotiation,
+                sequence=2,
+                kind=Kinds.ACCEPT,
+                party=NegotiationEvent.Parties.CLIENT,
+            )
+        )
+    elif negotiation.is_withdrawn:
+        events.append(
+            NegotiationEvent(
+                negotiation=negotiation,
+                sequence=2,
+                kind=Kinds.WITHDRAW,
+                party=NegotiationEvent.Parties.LAWYER,
+            )
+        )
+    return events
+
+
+def begin(negotiations, batch_size=1000):
+    """Writes the opening events of negotiations that have none yet.
+
+    Takes saved negotiations at version 0, e.g. straight after bulk_create(),
+    and sets their version to match.
+    """
+    events = []
+    with transaction.atomic():
+        for negotiation in negotiations:
+            opening = opening_events(negotiation)
+            events.extend(opening)
+            negotiation.version = len(opening)
+            negotiation._recorded_state = snapshot_state(negotiation)
+        NegotiationEvent.objects.bulk_create(events, batch_size=batch_size)
+        for version in (1, 2):
+            keys = [n.pk for n in negotiations if n.version == version]
+            for start in range(0, len(keys), batch_size):
+                Negotiation.objects.filter(
+                    pk__in=keys[start : start + batch_size]
+                ).update(version=version)
+
+
+def history(negotiation_id):
+    """Returns a negotiation's events in order, from one index range scan."""
+    return NegotiationEvent.objects.filter(negotiation_id=negotiation_id).order_by(
+        "sequence"
+    )
+
+
+def replay(events):
+    """Returns the state reached by applying events, in order, from scratch."""
+    state = initial_state()
+    for event in events:
+        state = apply(state, event)
+    return state
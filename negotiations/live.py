@@ -0,0 +1,67 @@
+"""Live updates of negotiations for the parties to them.
+
+Saving a negotiation publishes its terms, once the transaction commits, on
+the channels of its lawyer and client. Their overview pages follow those
+channels' event streams, served by the_acce/sse.py from the_acce/asgi.py,
+instead of reloading to see the other side's changes.
+"""
+
+import json
+import re
+
+from django.db import transaction
+
+from accounts.models import Client, Lawyer
+from the_acce import sse
+
+PARTIES = {"client": Client, "lawyer": Lawyer}
+
+
+def is_party(user, match):
+    """Returns whether user is the lawyer or client whose stream match names."""
+    if not user.is_authenticated:
+        return False
+    model = PARTIES[match["party"]]
+    return model.objects.filter(pk=match["party_id"], account_id=user.pk).exists()
+
+
+# Stream paths next to the overview pages, the channels they follow, and
+# who may follow them: only the party itself.
+ROUTES = [
+    (
+        re.compile(r"^/negotiations/(?P<party>client|lawyer)/(?P<party_id>\d+)/live/$"),
+        lambda match: [channel(match["party"], int(match["party_id"]))],
+        is_party,
+    ),
+]
+
+
+def channel(party, party_id):
+    """Returns the channel of a "lawyer" or "client"."""
+    return f"negotiations:{party}:{party_id}"
+
+
+def terms(negotiation):
+    """Returns what the overview pages show of a negotiation, as JSON values."""
+    return {
+        "negotiation": str(negotiation.pk),
+        "version": negotiation.version,
+        "amount": str(negotiation.amount),
+        "initial_amount": str(negotiation.initial_amount),
+        "budget": str(negotiation.budget),
+        "is_accepted": negotiation.is_accepted,
+        "is_withdrawn": negotiation.is_withdrawn,
+    }
+
+
+def negotiation_saved(negotiation, client_ids):
+    """Publishes a saved negotiation's terms when its transaction commits.
+
+    client_ids are the clients it belongs to now and before the save.
+    """
+    data = json.dumps(terms(negotiation))
+    event_id = f"{negotiation.pk}:{negotiation.version}"
+    channels = [channel("lawyer", negotiation.lawyer_key_id)] + [
+        channel("client", client_id) for client_id in client_ids
+    ]
+    transaction.on_commit(lambda: sse.publish(channels, data, "negotiation", event_id))
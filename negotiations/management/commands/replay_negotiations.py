@@ -0,0 +1,87 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from negotiations.events import STATE_FIELDS, begin, replay
+from negotiations.models import Negotiation, NegotiationEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays every negotiation's event log and rebuilds the snapshot held "
+        "on the Negotiation row where it differs. Negotiations without events "
+        "get opening events for their current terms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report snapshots that differ from their log; exit non-zero if any.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted, unlogged, broken = [], [], []
+        checked = 0
+        for negotiations, logs in self.batches(options["batch_size"]):
+            for negotiation in negotiations:
+                checked += 1
+                events = logs.get(negotiation.pk)
+                if not events:
+                    unlogged.append(negotiation)
+                    continue
+                try:
+                    state = replay(events)
+                except ValidationError as error:
+                    broken.append(f"{negotiation.pk}: {error.messages[0]}")
+                    continue
+                if any(getattr(negotiation, f) != state[f] for f in STATE_FIELDS):
+                    drifted.append((negotiation, state))
+
+        if options["check"]:
+            if drifted or unlogged or broken:
+                raise CommandError(
+                    f"{len(drifted)} snapshots differ from their log, "
+                    f"{len(unlogged)} negotiations have no log and "
+                    f"{len(broken)} logs do not replay."
+                )
+            self.stdout.write(f"All {checked} negotiation snapshots match their logs.")
+            return
+
+        with transaction.atomic():
+            for negotiation, state in drifted:
+                for field, value in state.items():
+                    setattr(negotiation, field, value)
+                negotiation._recorded_state = state
+                negotiation.save(update_fields=STATE_FIELDS)
+            begin(unlogged, options["batch_size"])
+        self.stdout.write(
+            f"Replayed {checked} negotiations: rebuilt {len(drifted)} snapshots "
+            f"and started {len(unlogged)} logs."
+        )
+        if broken:
+            raise CommandError(
+                f"{len(broken)} logs do not replay:\n" + "\n".join(broken[:20])
+            )
+
+    def batches(self, size):
+        """Yields (negotiations, {key: events}) a batch of negotiations at a time.
+
+        Events come from one query per batch, read along the
+        (negotiation, sequence) index.
+        """
+        negotiations = Negotiation.objects.order_by("pk").only("pk", *STATE_FIELDS)
+        last = None
+        while True:
+            batch = negotiations.filter(pk__gt=last) if last else negotiations
+            batch = list(batch[:size])
+            if not batch:
+                return
+            logs = {}
+            for event in NegotiationEvent.objects.filter(
+                negotiation__in=batch
+            ).order_by("negotiation", "sequence"):
+                logs.setdefault(event.negotiation_id, []).append(event)
+            yield batch, logs
+            last = batch[-1].pk
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('negotiations', '0002_add_budget_field'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='negotiation',
+            index=models.Index(condition=models.Q(('is_accepted', False)), fields=['client_key', 'title'], name='negotiation_open_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('negotiations', '0003_add_open_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='negotiation',
+            index=models.Index(fields=['client_key', 'title', 'key'], name='negotiation_client_title_idx'),
+        ),
+    ]
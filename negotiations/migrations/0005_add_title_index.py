@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('negotiations', '0004_add_client_title_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='negotiation',
+            index=models.Index(fields=['title', '-key'], name='negotiation_title_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def record_opening_events(apps, schema_editor):
+    """Gives each existing negotiation an offer of its terms, then any accept."""
+    Negotiation = apps.get_model('negotiations', 'Negotiation')
+    NegotiationEvent = apps.get_model('negotiations', 'NegotiationEvent')
+    events = []
+    for negotiation in Negotiation.objects.iterator():
+        events.append(NegotiationEvent(
+            negotiation=negotiation,
+            sequence=1,
+            kind=1,
+            party=1,
+            amount=int(negotiation.amount * 100),
+            initial_amount=int(negotiation.initial_amount * 100),
+            budget=int(negotiation.budget * 100),
+        ))
+        if negotiation.is_accepted:
+            events.append(NegotiationEvent(
+                negotiation=negotiation, sequence=2, kind=3, party=2,
+            ))
+    NegotiationEvent.objects.bulk_create(events, batch_size=1000)
+    Negotiation.objects.update(version=1)
+    Negotiation.objects.filter(is_accepted=True).update(version=2)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('negotiations', '0005_add_title_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='negotiation',
+            name='is_withdrawn',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='negotiation',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='NegotiationEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sequence', models.PositiveIntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Offer'), (2, 'Counter-offer'), (3, 'Accept'), (4, 'Withdraw')])),
+                ('party', models.PositiveSmallIntegerField(choices=[(1, 'Lawyer'), (2, 'Client')])),
+                ('amount', models.PositiveIntegerField(blank=True, null=True)),
+                ('initial_amount', models.PositiveIntegerField(blank=True, null=True)),
+                ('budget', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('negotiation', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='negotiations.negotiation')),
+            ],
+            options={
+                'ordering': ['negotiation', 'sequence'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='negotiationevent',
+            constraint=models.UniqueConstraint(fields=('negotiation', 'sequence'), name='negotiation_event_sequence_uniq'),
+        ),
+        migrations.RunPython(record_opening_events, migrations.RunPython.noop),
+    ]
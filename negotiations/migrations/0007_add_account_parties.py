@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """First of three steps moving negotiations onto the accounts app's parties.
+
+    See matters.migrations.0008_add_account_parties.
+    """
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('negotiations', '0006_add_negotiation_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='negotiation',
+            name='lawyer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.lawyer'),
+        ),
+        migrations.AddField(
+            model_name='negotiation',
+            name='client',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.client'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('negotiations', '0008_move_to_account_parties'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='negotiation',
+            name='negotiation_open_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='negotiation',
+            name='negotiation_client_title_idx',
+        ),
+        migrations.RemoveField(
+            model_name='negotiation',
+            name='lawyer_key',
+        ),
+        migrations.RemoveField(
+            model_name='negotiation',
+            name='client_key',
+        ),
+        migrations.RenameField(
+            model_name='negotiation',
+            old_name='lawyer',
+            new_name='lawyer_key',
+        ),
+        migrations.RenameField(
+            model_name='negotiation',
+            old_name='client',
+            new_name='client_key',
+        ),
+        migrations.AlterField(
+            model_name='negotiation',
+            name='lawyer_key',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='negotiations', to='accounts.lawyer'),
+        ),
+        migrations.AlterField(
+            model_name='negotiation',
+            name='client_key',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='negotiations', to='accounts.client'),
+        ),
+        migrations.AddIndex(
+            model_name='negotiation',
+            index=models.Index(fields=['client_key', 'title', 'key'], name='negotiation_client_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='negotiation',
+            index=models.Index(condition=models.Q(('is_accepted', False)), fields=['client_key', 'title'], name='negotiation_open_idx'),
+        ),
+        migrations.DeleteModel(
+            name='Client',
+        ),
+        migrations.DeleteModel(
+            name='Lawyer',
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:34
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Round
+import the_acce.money
+
+# Negotiation terms that held whole units and now hold cents. Events' terms
+# held cents already, in integer columns, and are only widened.
+TERMS = ['amount', 'initial_amount', 'budget']
+
+
+def times(field, factor):
+    return models.F(field) * models.Value(Decimal(factor), output_field=models.DecimalField())
+
+
+def to_minor_units(apps, schema_editor):
+    """Turns terms into whole cents, rounding away SQLite's float error."""
+    Negotiation = apps.get_model('negotiations', 'Negotiation')
+    Negotiation.objects.update(**{term: Round(times(term, 100)) for term in TERMS})
+
+
+def to_whole_units(apps, schema_editor):
+    Negotiation = apps.get_model('negotiations', 'Negotiation')
+    Negotiation.objects.update(**{term: times(term, '0.01') for term in TERMS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('negotiations', '0010_time_ordered_keys'),
+    ]
+
+    # Each column is widened, scaled to cents, then altered to a BIGINT, so
+    # no amount is truncated on the way on PostgreSQL or SQLite.
+    operations = [
+        *(
+            migrations.AlterField(
+                model_name='negotiation',
+                name=term,
+                field=models.DecimalField(decimal_places=2, default=0, max_digits=20),
+            )
+            for term in TERMS
+        ),
+        migrations.RunPython(to_minor_units, to_whole_units),
+        migrations.AlterField(
+            model_name='negotiation',
+            name='amount',
+            field=the_acce.money.MoneyField(default=0, help_text='Include the base cost for hiring you.', validators=[the_acce.money.validate_not_negative]),
+        ),
+        migrations.AlterField(
+            model_name='negotiation',
+            name='budget',
+            field=the_acce.money.MoneyField(default=100, help_text='Set the limit for spending on the base cost.', validators=[the_acce.money.validate_not_negative]),
+        ),
+        migrations.AlterField(
+            model_name='negotiation',
+            name='initial_amount',
+            field=the_acce.money.MoneyField(default=0, help_text='How much of the base cost must be paid before you begin work?.', validators=[the_acce.money.validate_not_negative]),
+        ),
+        *(
+            migrations.AlterField(
+                model_name='negotiationevent',
+                name=term,
+                field=the_acce.money.MoneyField(blank=True, null=True, validators=[the_acce.money.validate_not_negative]),
+            )
+            for term in TERMS
+        ),
+    ]
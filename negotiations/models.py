@@ -1,18 +1,14 @@
-import uuid
 from datetime import date
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-# Human-readable limits for positive integers.
-POSITIVE_DECIMAL_VALIDATORS = [
-    MinValueValidator(Decimal("0.00")),
-    MaxValueValidator(Decimal("9999.99")),
-]
+from the_acce.money import MoneyField, validate_not_negative
+from the_acce.uuids import uuid7
+from the_acce.validation import columns
 
 
 class Negotiation(models.Model):
@@ -23,7 +19,7 @@ class Negotiation(models.Model):
         PRICE = "P", _("Price")
         RATE = "R", _("Rate")
 
-    key = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(
         max_length=64, help_text="Enter a short, memorable title."
     )
@@ -33,24 +29,18 @@ class Negotiation(models.Model):
         default=CostTypes.PRICE,
         help_text=("Select the type of cost you will charge."),
     )
-    amount = models.DecimalField(
-        max_digits=6,
-        decimal_places=2,
-        validators=POSITIVE_DECIMAL_VALIDATORS,
+    amount = MoneyField(
+        validators=[validate_not_negative],
         default=0,
         help_text="Include the base cost for hiring you.",
     )
-    initial_amount = models.DecimalField(
-        max_digits=6,
-        decimal_places=2,
-        validators=POSITIVE_DECIMAL_VALIDATORS,
+    initial_amount = MoneyField(
+        validators=[validate_not_negative],
         default=0,
         help_text="How much of the base cost must be paid before you begin work?.",
     )
-    budget = models.DecimalField(
-        max_digits=6,
-        decimal_places=2,
-        validators=POSITIVE_DECIMAL_VALIDATORS,
+    budget = MoneyField(
+        validators=[validate_not_negative],
         default=100,
         help_text="Set the limit for spending on the base cost.",
     )
@@ -60,18 +50,43 @@ class Negotiation(models.Model):
     is_changeable = models.BooleanField(
         "Do you want to change the cost in the future?", default=False
     )
+    is_withdrawn = models.BooleanField(default=False, editable=False)
+    # Number of NegotiationEvents applied to the terms above, see events.py.
+    version = models.PositiveIntegerField(default=0, editable=False)
     lawyer_key = models.ForeignKey(
-        "Lawyer",
+        "accounts.Lawyer",
         models.CASCADE,
+        related_name="negotiations",
     )
     client_key = models.ForeignKey(
-        "Client",
+        "accounts.Client",
         models.CASCADE,
+        related_name="negotiations",
     )
 
+    # Messages of the errors clean() raises, by code.
+    CLEAN_ERRORS = {
+        "initial_exceeds_amount": "The client can't pay more than your base rate!",
+    }
+
     class Meta:
         # Order alphabetically by title
         ordering = ["title"]
+        indexes = [
+            # Serves keyset pages of a client's negotiations in title order.
+            models.Index(
+                fields=["client_key", "title", "key"],
+                name="negotiation_client_title_idx",
+            ),
+            # Open offers for a client, in the default title order.
+            models.Index(
+                fields=["client_key", "title"],
+                name="negotiation_open_idx",
+                condition=models.Q(is_accepted=False),
+            ),
+            # The admin changelist's order: title, then -pk as a tiebreaker.
+            models.Index(fields=["title", "-key"], name="negotiation_title_idx"),
+        ]
 
     def __str__(self):
         """Returns human-readable reference to model instance."""
@@ -84,13 +99,69 @@ class Negotiation(models.Model):
     def clean(self):
         """Validates various fields of this model."""
         if self.initial_amount  > self.amount:
-            raise ValidationError(
-                "The client can't pay more than your base rate!"
+            code = "initial_exceeds_amount"
+            raise ValidationError(self.CLEAN_ERRORS[code], code=code)
+
+    @classmethod
+    def validate_batch(cls, data):
+        """Applies the rules of clean() to columns of values.
+
+        data is anything the_acce.validation.columns() takes. Returns, for
+        each row, the code of the error clean() would raise, or None.
+        """
+        return [
+            "initial_exceeds_amount" if initial_amount > amount else None
+            for initial_amount, amount in zip(
+                *columns(data, ["initial_amount", "amount"])
             )
+        ]
+
+class NegotiationEvent(models.Model):
+    """An append-only offer, counter-offer, acceptance or withdrawal.
 
-class Lawyer(models.Model):
-    pass
+    Negotiation holds the result of applying a negotiation's events in
+    sequence order. Terms are amounts of money, like the negotiation's, and
+    only the ones an event changes are set; the others are null.
+    """
 
+    class Kinds(models.IntegerChoices):
+        OFFER = 1, _("Offer")
+        COUNTER = 2, _("Counter-offer")
+        ACCEPT = 3, _("Accept")
+        WITHDRAW = 4, _("Withdraw")
 
-class Client(models.Model):
-    pass
+    class Parties(models.IntegerChoices):
+        LAWYER = 1, _("Lawyer")
+        CLIENT = 2, _("Client")
+
+    id = models.BigAutoField(primary_key=True)
+    # Indexed by the unique constraint below, which leads with it.
+    negotiation = models.ForeignKey(
+        "Negotiation",
+        models.CASCADE,
+        related_name="events",
+        db_index=False,
+    )
+    sequence = models.PositiveIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=Kinds.choices)
+    party = models.PositiveSmallIntegerField(choices=Parties.choices)
+    amount = MoneyField(blank=True, null=True, validators=[validate_not_negative])
+    initial_amount = MoneyField(
+        blank=True, null=True, validators=[validate_not_negative]
+    )
+    budget = MoneyField(blank=True, null=True, validators=[validate_not_negative])
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["negotiation", "sequence"]
+        constraints = [
+            # One event per position; also serves history range scans.
+            models.UniqueConstraint(
+                fields=["negotiation", "sequence"],
+                name="negotiation_event_sequence_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        """Returns human-readable reference to model instance."""
+        return f"{self.get_kind_display()} #{self.sequence} by {self.get_party_display()}"
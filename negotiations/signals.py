@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from the_acce.cache import bump
+
+from . import events, live
+from .models import Negotiation
+
+
+@receiver(post_init, sender=Negotiation)
+def remember_client(sender, instance, **kwargs):
+    """Keeps the client a negotiation was loaded with, in case it moves."""
+    instance._loaded_client_id = instance.__dict__.get("client_key_id")
+
+
+@receiver(post_init, sender=Negotiation)
+def remember_terms(sender, instance, **kwargs):
+    """Keeps the terms a negotiation was loaded with, which its log agrees with."""
+    instance._recorded_state = {
+        field: instance.__dict__.get(field) for field in events.STATE_FIELDS
+    }
+
+
+@receiver(pre_save, sender=Negotiation)
+def refuse_unrecorded_terms(sender, instance, raw, **kwargs):
+    """Refuses saving new terms for a negotiation without recording an event.
+
+    The snapshot would no longer be what its log replays to; events.record()
+    changes both together.
+    """
+    if raw or instance._state.adding:
+        return
+    changed = [
+        field
+        for field, value in instance._recorded_state.items()
+        if field in instance.__dict__ and instance.__dict__[field] != value
+    ]
+    if changed:
+        raise ValueError(
+            f"Changes to {', '.join(changed)} of negotiation {instance.pk} must "
+            "be recorded with negotiations.events.record()."
+        )
+
+
+# Connected before invalidate_fragments, which replaces _loaded_client_id.
+@receiver(post_save, sender=Negotiation)
+def publish_terms(sender, instance, raw=False, **kwargs):
+    if not raw:
+        live.negotiation_saved(
+            instance, {instance.client_key_id, instance._loaded_client_id} - {None}
+        )
+
+
+@receiver(post_save, sender=Negotiation)
+@receiver(post_delete, sender=Negotiation)
+def invalidate_fragments(sender, instance, **kwargs):
+    """Expires cached pages showing the negotiation."""
+    client_ids = {instance.client_key_id, instance._loaded_client_id} - {None}
+    bump(
+        ("negotiation", instance.pk),
+        *(("client-negotiations", client_id) for client_id in client_ids),
+    )
+    instance._loaded_client_id = instance.client_key_id
+
+
+@receiver(post_save, sender=Negotiation)
+def record_opening_events(sender, instance, created, raw, **kwargs):
+    """Starts the event log of negotiations created without events.record()."""
+    if created and not raw and instance.version == 0:
+        events.begin([instance])
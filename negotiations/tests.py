@@ -1,3 +1,387 @@
-from django.test import TestCase
+import random
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from accounts.parties import create_client, create_lawyer
+
+from the_acce import pubsub, sse
+from the_acce.money import Money
+from the_acce.validation import clean_error
+
+from . import events, live
+from .models import Negotiation, NegotiationEvent
+
+Kinds = NegotiationEvent.Kinds
+Parties = NegotiationEvent.Parties
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked on SQLite.")
+class OpenNegotiationIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_ = create_client()
+        Negotiation.objects.create(
+            title="Retainer", lawyer_key=create_lawyer(), client_key=cls.client_
+        )
+
+    def test_open_negotiations_for_client(self):
+        plan = Negotiation.objects.filter(
+            client_key=self.client_, is_accepted=False
+        ).explain()
+        self.assertIn("USING INDEX negotiation_open_idx", plan)
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class ExportTests(TestCase):
+    def test_csv_export_streams_negotiations(self):
+        Negotiation.objects.create(
+            title="Retainer",
+            amount=Decimal("300"),
+            lawyer_key=create_lawyer(),
+            client_key=create_client(),
+        )
+        user = User.objects.create_user("auditor")
+        user.user_permissions.add(Permission.objects.get(codename="view_negotiation"))
+        self.client.force_login(user)
+        response = self.client.get("/negotiations/export/")
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Retainer,P,300.00", lines[1])
+
+
+class ClientOverviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_ = create_client()
+        cls.negotiation = Negotiation.objects.create(
+            title="Retainer",
+            amount=Decimal("300"),
+            lawyer_key=create_lawyer(),
+            client_key=cls.client_,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = f"/negotiations/client/{self.client_.pk}/"
+
+    def test_cached_until_a_negotiation_changes(self):
+        self.client.force_login(self.client_.account.user)
+        # The session, the user and whether they are the client, then the page.
+        with self.assertNumQueries(4):
+            self.assertContains(self.client.get(self.url), "Open")
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            events.record(self.negotiation.pk, Kinds.ACCEPT, Parties.CLIENT)
+        with self.assertNumQueries(4):
+            self.assertContains(self.client.get(self.url), "Accepted")
+
+    def test_only_the_client_and_readers_may_see_it(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(create_client().account.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        reader = User.objects.create_user("reader")
+        reader.user_permissions.add(Permission.objects.get(codename="view_negotiation"))
+        self.client.force_login(reader)
+        self.assertContains(self.client.get(self.url), "Retainer")
+
+
+class NegotiationEventTests(TestCase):
+    def setUp(self):
+        self.negotiation = Negotiation.objects.create(
+            title="Retainer",
+            amount=Decimal("300"),
+            initial_amount=Decimal("50"),
+            lawyer_key=create_lawyer(),
+            client_key=create_client(),
+        )
+
+    def snapshot(self):
+        return Negotiation.objects.get(pk=self.negotiation.pk)
+
+    def test_creation_starts_the_log(self):
+        (offer,) = events.history(self.negotiation.pk)
+        self.assertEqual(offer.kind, NegotiationEvent.Kinds.OFFER)
+        self.assertEqual(
+            (offer.amount, offer.initial_amount), (Money.of("300"), Money.of("50"))
+        )
+        self.assertEqual(self.snapshot().version, 1)
+
+    def test_counter_and_accept_update_the_snapshot(self):
+        events.record(self.negotiation.pk, Kinds.COUNTER, Parties.CLIENT, amount="250")
+        events.record(self.negotiation.pk, Kinds.ACCEPT, Parties.LAWYER)
+        snapshot = self.snapshot()
+        self.assertEqual(snapshot.amount, Money.of("250"))
+        self.assertEqual(snapshot.initial_amount, Money.of("50"))
+        self.assertTrue(snapshot.is_accepted)
+        self.assertEqual(snapshot.version, 3)
+        with self.assertNumQueries(1):
+            trail = [event.kind for event in events.history(self.negotiation.pk)]
+        self.assertEqual(trail, [Kinds.OFFER, Kinds.COUNTER, Kinds.ACCEPT])
+
+    def test_terms_beyond_a_32_bit_count_of_cents(self):
+        events.record(
+            self.negotiation.pk, Kinds.COUNTER, Parties.CLIENT, amount="50000000.01"
+        )
+        counter = events.history(self.negotiation.pk).last()
+        self.assertEqual(counter.amount, Money.of("50000000.01"))
+        self.assertEqual(
+            NegotiationEvent._meta.get_field("amount").get_internal_type(),
+            "BigIntegerField",
+        )
+
+    def test_invalid_events_leave_no_trace(self):
+        with self.assertRaises(ValidationError):
+            events.record(
+                self.negotiation.pk, Kinds.COUNTER, Parties.CLIENT, initial_amount=400
+            )
+        events.record(self.negotiation.pk, Kinds.WITHDRAW, Parties.LAWYER)
+        with self.assertRaises(ValidationError):
+            events.record(self.negotiation.pk, Kinds.ACCEPT, Parties.CLIENT)
+        self.assertEqual(events.history(self.negotiation.pk).count(), 2)
+        self.assertTrue(self.snapshot().is_withdrawn)
+
+    def test_terms_only_change_through_the_log(self):
+        negotiation = self.snapshot()
+        negotiation.amount = Decimal("400")
+        with self.assertRaises(ValueError):
+            negotiation.save()
+        negotiation = self.snapshot()
+        negotiation.title = "Renamed retainer"
+        negotiation.save()
+        events.record(negotiation.pk, Kinds.COUNTER, Parties.CLIENT, amount="280")
+        self.assertEqual(self.snapshot().title, "Renamed retainer")
+
+    def change(self, **fields):
+        """Posts the admin change form with fields changed; returns the response."""
+        negotiation = self.snapshot()
+        data = {
+            "title": negotiation.title,
+            "cost_type": negotiation.cost_type,
+            "amount": negotiation.amount.amount,
+            "initial_amount": negotiation.initial_amount.amount,
+            "budget": negotiation.budget.amount,
+            "lawyer_key": negotiation.lawyer_key_id,
+            "client_key": negotiation.client_key_id,
+            "party": "",
+            "events-TOTAL_FORMS": 0,
+            "events-INITIAL_FORMS": 0,
+            **fields,
+        }
+        if negotiation.is_accepted:
+            data.setdefault("is_accepted", "on")
+        return self.client.post(
+            f"/admin/negotiations/negotiation/{negotiation.pk}/change/", data
+        )
+
+    def test_admin_records_counter_offers_and_acceptances(self):
+        self.client.force_login(User.objects.create_superuser("admin"))
+        response = self.change(amount="320")
+        self.assertContains(response, "Say which party changed the terms.")
+        response = self.change(initial_amount="500", party=Parties.CLIENT)
+        self.assertContains(response, "The client can")
+        self.assertEqual(events.history(self.negotiation.pk).count(), 1)
+
+        self.change(title="Retainer 2026", amount="320", party=Parties.CLIENT)
+        self.change(is_accepted="on", party=Parties.LAWYER)
+        snapshot = self.snapshot()
+        self.assertEqual(snapshot.title, "Retainer 2026")
+        self.assertEqual(snapshot.amount, Money.of("320"))
+        self.assertTrue(snapshot.is_accepted)
+        self.assertEqual(
+            [
+                (event.kind, event.party, event.amount)
+                for event in events.history(self.negotiation.pk)
+            ],
+            [
+                (Kinds.OFFER, Parties.LAWYER, Money.of("300")),
+                (Kinds.COUNTER, Parties.CLIENT, Money.of("320")),
+                (Kinds.ACCEPT, Parties.LAWYER, None),
+            ],
+        )
+        response = self.change(amount="1", party=Parties.CLIENT)
+        self.assertContains(response, "This negotiation is closed.")
+
+    def test_replay_command_rebuilds_snapshots(self):
+        events.record(self.negotiation.pk, Kinds.COUNTER, Parties.CLIENT, amount=280)
+        Negotiation.objects.filter(pk=self.negotiation.pk).update(amount=999)
+        (unlogged,) = Negotiation.objects.bulk_create(
+            [
+                Negotiation(
+                    title="Audit",
+                    lawyer_key=self.negotiation.lawyer_key,
+                    client_key=self.negotiation.client_key,
+                )
+            ]
+        )
+        with self.assertRaises(CommandError):
+            call_command("replay_negotiations", check=True, stdout=StringIO())
+        call_command("replay_negotiations", stdout=StringIO())
+        call_command("replay_negotiations", check=True, stdout=StringIO())
+        self.assertEqual(self.snapshot().amount, Money.of("280"))
+        self.assertEqual(events.history(unlogged.pk).count(), 1)
+
+
+class BatchValidationTests(TestCase):
+    def test_negotiations_agree_with_clean(self):
+        # Random amounts, from a fixed seed, with ties on the boundary.
+        rng = random.Random(21)
+        rows = []
+        for _ in range(2000):
+            amount = Decimal(rng.randint(0, 999_999)) / 100
+            initial_amount = rng.choice(
+                [
+                    amount,
+                    amount + Decimal("0.01"),
+                    Decimal(rng.randint(0, 999_999)) / 100,
+                ]
+            )
+            rows.append({"amount": amount, "initial_amount": initial_amount})
+        expected = [clean_error(Negotiation(**row)) for row in rows]
+        self.assertEqual(Negotiation.validate_batch(rows), expected)
+        self.assertEqual(set(expected), {None, "initial_exceeds_amount"})
+
+
+async def django_stand_in(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class LiveUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lawyer = create_lawyer()
+        cls.client_ = create_client()
+        cls.negotiation = Negotiation.objects.create(
+            title="Retainer",
+            amount=Decimal("300"),
+            lawyer_key=cls.lawyer,
+            client_key=cls.client_,
+        )
+
+    def login(self, party):
+        """Returns a Cookie header with a session for a party's user."""
+        self.client.force_login(party.account.user)
+        session = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        return f"{settings.SESSION_COOKIE_NAME}={session}".encode()
+
+    async def open_stream(self, path, party=None, host=b"testserver"):
+        """Returns a communicator for the stream at path and its first chunk.
+
+        The request is made logged in as party, or anonymously.
+        """
+        headers = [(b"host", host)]
+        if party is not None:
+            headers.append((b"cookie", await sync_to_async(self.login)(party)))
+        communicator = ApplicationCommunicator(
+            sse.EventStreams(django_stand_in, live.ROUTES),
+            {
+                "type": "http",
+                "method": "GET",
+                "path": path,
+                "query_string": b"",
+                "headers": headers,
+            },
+        )
+        await communicator.send_input({"type": "http.request"})
+        start = await communicator.receive_output(1)
+        if start["status"] != 200:
+            return communicator, start
+        return communicator, await communicator.receive_output(1)
+
+    def counter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            events.record(
+                self.negotiation.pk, Kinds.COUNTER, Parties.CLIENT, amount="350"
+            )
+
+    async def test_changes_reach_both_parties_streams(self):
+        client_stream, retry = await self.open_stream(
+            f"/negotiations/client/{self.client_.pk}/live/", self.client_
+        )
+        self.assertEqual(retry["body"], b"retry: 5000\n\n")
+        lawyer_stream, _ = await self.open_stream(
+            f"/negotiations/lawyer/{self.lawyer.pk}/live/", self.lawyer
+        )
+        other = await sync_to_async(create_client)()
+        other_stream, _ = await self.open_stream(
+            f"/negotiations/client/{other.pk}/live/", other
+        )
+        await sync_to_async(self.counter)()
+        for stream in (client_stream, lawyer_stream):
+            body = (await stream.receive_output(1))["body"].decode()
+            self.assertTrue(body.startswith(f"id: {self.negotiation.pk}:2\n"))
+            self.assertIn("event: negotiation\n", body)
+            self.assertIn('"amount": "350.00"', body)
+        self.assertTrue(await other_stream.receive_nothing())
+        for stream in (client_stream, lawyer_stream, other_stream):
+            await stream.send_input({"type": "http.disconnect"})
+            await stream.wait(1)
+
+    @override_settings(SSE_HEARTBEAT_SECONDS=0.01)
+    async def test_idle_streams_get_heartbeats(self):
+        stream, _ = await self.open_stream(
+            f"/negotiations/client/{self.client_.pk}/live/", self.client_
+        )
+        self.assertEqual((await stream.receive_output(1))["body"], sse.HEARTBEAT)
+        await stream.send_input({"type": "http.disconnect"})
+        await stream.wait(1)
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    async def test_streams_that_fall_behind_are_reset(self):
+        channel = live.channel("client", self.client_.pk)
+        stream, _ = await self.open_stream(
+            f"/negotiations/client/{self.client_.pk}/live/", self.client_
+        )
+        # Published before the stream gets to run, so they pile up.
+        for number in range(3):
+            sse.publish([channel], str(number))
+        self.assertEqual((await stream.receive_output(1))["body"], sse.RESET)
+        self.assertEqual((await stream.receive_output(1))["body"], b"")
+        await stream.wait(1)
+        self.assertEqual(pubsub.get_broker().subscriber_count(), 0)
+
+    async def test_disconnecting_ends_the_subscription(self):
+        stream, _ = await self.open_stream(
+            f"/negotiations/lawyer/{self.lawyer.pk}/live/", self.lawyer
+        )
+        self.assertEqual(pubsub.get_broker().subscriber_count(), 1)
+        await stream.send_input({"type": "http.disconnect"})
+        await stream.wait(1)
+        self.assertEqual(pubsub.get_broker().subscriber_count(), 0)
+
+    async def test_other_requests_go_to_django(self):
+        _, start = await self.open_stream("/negotiations/")
+        self.assertEqual(start["status"], 204)
+        _, start = await self.open_stream(
+            f"/negotiations/client/{self.client_.pk}/live/",
+            self.client_,
+            host=b"evil.example",
+        )
+        self.assertEqual(start["status"], 400)
+
+    async def test_only_the_party_may_follow_its_stream(self):
+        path = f"/negotiations/client/{self.client_.pk}/live/"
+        other = await sync_to_async(create_client)()
+        for party in [None, other, self.lawyer]:
+            _, start = await self.open_stream(path, party)
+            self.assertEqual(start["status"], 403)
+        self.assertEqual(pubsub.get_broker().subscriber_count(), 0)
+        _, start = await self.open_stream(
+            f"/negotiations/lawyer/{self.client_.pk}/live/", self.client_
+        )
+        self.assertEqual(start["status"], 403)
@@ -4,4 +4,6 @@ from . import views
 
 urlpatterns = [
     path("", views.index, name="Negotiations"),
+    path("client/<int:client_id>/", views.client_overview, name="Client negotiations"),
+    path("export/", views.export, name="Export negotiations"),
 ]
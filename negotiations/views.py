@@ -1,9 +1,104 @@
+from functools import partial
+
+from django.contrib.auth.decorators import permission_required
+from django.core.exceptions import BadRequest, PermissionDenied
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.views import generic
 
+from matters.pagination import clamp_page_size, keyset_page
+from the_acce.cache import cached_fragment
+from the_acce.exports import export_response
+
+from . import live
+from .models import Negotiation
+
 
 def index(request):
     return render(
         request,
         "negotiations_overview.html",
     )
+
+
+def render_client_negotiations(client_id, after=None, size=None):
+    """Returns the HTML for one page of a client's negotiations.
+
+    Cached like matters.views.render_lawyer_matters: the page until any of the
+    client's negotiations change, each row until its negotiation does.
+    """
+    size = clamp_page_size(size)
+
+    def render_row(negotiation):
+        return render_to_string(
+            "negotiations/negotiation_row.html", {"negotiation": negotiation}
+        )
+
+    def render_page():
+        negotiations = Negotiation.objects.filter(
+            client_key_id=client_id
+        ).select_related("lawyer_key")
+        page = keyset_page(negotiations, after=after, size=size)
+        rows = [
+            mark_safe(
+                cached_fragment(
+                    "negotiation-row",
+                    [negotiation.pk],
+                    [("negotiation", negotiation.pk)],
+                    partial(render_row, negotiation),
+                )
+            )
+            for negotiation in page
+        ]
+        return render_to_string(
+            "negotiations/client_negotiations.html", {"page": page, "rows": rows}
+        )
+
+    return mark_safe(
+        cached_fragment(
+            "client-negotiations",
+            [client_id, after, size],
+            [("client-negotiations", client_id)],
+            render_page,
+        )
+    )
+
+
+def client_overview(request, client_id):
+    """Lists a client's negotiations one keyset page at a time.
+
+    Only the client, whose live stream the page follows, and users with
+    negotiations.view_negotiation may see it.
+    """
+    party = {"party": "client", "party_id": client_id}
+    if not (
+        live.is_party(request.user, party)
+        or request.user.has_perm("negotiations.view_negotiation")
+    ):
+        raise PermissionDenied
+    return render(
+        request,
+        "negotiations_overview.html",
+        {
+            "negotiations": render_client_negotiations(
+                client_id, request.GET.get("after"), request.GET.get("size")
+            )
+        },
+    )
+
+
+@permission_required("negotiations.view_negotiation", raise_exception=True)
+def export(request):
+    """Streams negotiations as CSV or JSONL, optionally for one lawyer or client."""
+    negotiations = Negotiation.objects.all()
+    try:
+        if "lawyer" in request.GET:
+            negotiations = negotiations.filter(lawyer_key_id=int(request.GET["lawyer"]))
+        if "client" in request.GET:
+            negotiations = negotiations.filter(client_key_id=int(request.GET["client"]))
+    except ValueError:
+        raise BadRequest("Lawyer and client must be ids.")
+    return export_response(
+        negotiations, "negotiations", request.GET.get("format", "csv")
+    )
@@ -0,0 +1,122 @@
+"""Admin changelist helpers for tables too large to count or list in full.
+
+Django's changelist runs an exact COUNT(*) for its paginator and another
+for the "N total" link, and renders a <select> of every related row for
+each foreign key in the change form. ScalableModelAdmin avoids all three:
+counts stop at a limit and fall back to the planner's estimate where the
+database has one, the total count is off, and forms use raw id inputs.
+
+Django also searches "=" fields with iexact and "^" fields with
+istartswith, which wrap the column in UPPER() or a case-insensitive LIKE
+that no plain index can serve. ScalableModelAdmin searches them
+case-sensitively instead, so an index on the column is used.
+"""
+
+import json
+
+from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+
+# Changelists count exactly up to this many rows and estimate beyond it.
+EXACT_COUNT_LIMIT = 10000
+
+# Sorts after any character, so a prefix's matches lie below prefix + this.
+PREFIX_END = "\U0010ffff"
+
+
+def estimated_count(queryset):
+    """Returns the query planner's row estimate for queryset, or None.
+
+    Only PostgreSQL exposes a usable estimate; elsewhere this returns None.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is exact only up to EXACT_COUNT_LIMIT rows.
+
+    Past the limit it uses the planner's estimate, so a changelist never
+    scans a whole table to count it. Without an estimate (SQLite) it counts
+    exactly: capping the count would hide every page past the limit.
+    """
+
+    limit = EXACT_COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        bounded = self.object_list.order_by()[: self.limit + 1].count()
+        if bounded <= self.limit:
+            return bounded
+        estimate = estimated_count(self.object_list)
+        if estimate is None:
+            return self.object_list.count()
+        return max(estimate, self.limit)
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """ModelAdmin defaults for tables with millions of rows.
+
+    Subclasses should still set list_select_related for any foreign keys in
+    list_display, and raw_id_fields (or autocomplete_fields) for relations.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_search_results(self, request, queryset, search_term):
+        """Filters queryset to rows matching every word of search_term.
+
+        A word matches a row if any search field matches it: "=field" by
+        exact value and "^field" by case-sensitive prefix, both of which an
+        index on the field can serve. Other fields match as in Django, by
+        icontains.
+        """
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            matches = Q()
+            for field_name in search_fields:
+                match = self.search_match(field_name, bit)
+                if match is not None:
+                    matches |= match
+            # No field can hold the word (say, a key that isn't a UUID).
+            if not matches:
+                return queryset.none(), False
+            queryset = queryset.filter(matches)
+        return queryset, False
+
+    def search_match(self, field_name, term):
+        """Returns the Q for term in one search field, or None if it can't match."""
+        if field_name.startswith("^"):
+            name = field_name[1:]
+            # The range is what the index serves; startswith keeps the
+            # result exact under collations that don't sort by code point.
+            return Q(
+                **{
+                    f"{name}__gte": term,
+                    f"{name}__lt": term + PREFIX_END,
+                    f"{name}__startswith": term,
+                }
+            )
+        if field_name.startswith("="):
+            name = field_name[1:]
+            field = get_fields_from_path(self.model, name)[-1]
+            try:
+                field.to_python(term)
+            except ValidationError:
+                return None
+            return Q(**{f"{name}__exact": term})
+        return Q(**{f"{field_name}__icontains": term})
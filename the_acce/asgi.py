@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from the_acce.handlers import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "the_acce.settings")
 
-application = get_asgi_application()
+# Reads streaming responses, such as exports, off the event loop.
+django_application = get_asgi_application()
+
+# Imported once get_asgi_application() has set Django up.
+from negotiations.live import ROUTES as NEGOTIATION_STREAMS  # noqa: E402
+from the_acce.sse import EventStreams  # noqa: E402
+
+# Long-lived event streams are served outside Django, see the_acce/sse.py.
+application = EventStreams(django_application, NEGOTIATION_STREAMS)
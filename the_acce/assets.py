@@ -0,0 +1,216 @@
+"""Static asset storage, purging and serving.
+
+collectstatic writes every file under a content-hashed name (through
+ManifestStaticFilesStorage) plus gzip and, when the brotli package is
+installed, brotli siblings. Since a hashed name's content never changes,
+serve() can mark those files immutable for a year: browsers fetch each
+version once and never revalidate.
+
+Bootstrap is vendored under home/static/vendor/bootstrap and committed,
+checked against the integrity hashes jsDelivr publishes. manage.py
+build_assets purges its CSS again whenever the templates change.
+"""
+
+import gzip
+import mimetypes
+import re
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
+from django.views.decorators.http import require_safe
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip siblings are written without it.
+    brotli = None
+
+# Extensions worth compressing; images and fonts are compressed already.
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".map", ".svg", ".txt", ".json", ".html"}
+# Files smaller than this are sent as they are.
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Plain names are only cacheable until the next deploy.
+MUTABLE_CACHE_CONTROL = "public, max-age=300"
+
+BOOTSTRAP_URL = "https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/"
+# Vendored files and the subresource integrity hashes jsDelivr publishes.
+BOOTSTRAP_FILES = {
+    "bootstrap.min.css": (
+        "css/bootstrap.min.css",
+        "sha384-1BmE4kWBq78iYhFldvKuhfTAU6auU8tT94WrHftjDbrCEXSU1oBoqyl2QvZ6jIW3",
+    ),
+    "bootstrap.bundle.min.js": (
+        "js/bootstrap.bundle.min.js",
+        "sha384-ka7Sk0Gln4gmtz2MlQnikT1wXgYsOg+OMhuP+IlRH9sENBO0LRn5q+8nbTov4+1p",
+    ),
+}
+BOOTSTRAP_STATIC_DIR = "vendor/bootstrap"
+PURGED_CSS = "bootstrap.purged.css"
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz and .br siblings of hashed files."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self.__dict__.pop("hashed_names", None)
+        if dry_run:
+            return
+        # Only the final names: earlier passes yield intermediate ones too.
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            for compressed_name in self.compress(hashed_name):
+                yield hashed_name, compressed_name, True
+
+    def compress(self, name):
+        """Writes the compressed siblings of a file, returning their names."""
+        path = Path(self.path(name))
+        if path.suffix not in COMPRESSIBLE_EXTENSIONS:
+            return []
+        content = path.read_bytes()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return []
+        written = []
+        encoders = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            encoders.append((".br", lambda data: brotli.compress(data, quality=11)))
+        for suffix, encode in encoders:
+            compressed = encode(content)
+            if len(compressed) < len(content):
+                Path(f"{path}{suffix}").write_bytes(compressed)
+                written.append(f"{name}{suffix}")
+        return written
+
+    @cached_property
+    def hashed_names(self):
+        """The content-hashed names in the manifest, read once per process."""
+        return frozenset(self.hashed_files.values())
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected yet, as in development and tests: use the plain
+            # name rather than failing to render the page.
+            return name
+
+
+@require_safe
+def serve(request, path):
+    """Serves a collected static file, precompressed when the client allows."""
+    try:
+        full_path = Path(safe_join(str(staticfiles_storage.location), path))
+    except ValueError:
+        raise Http404("Not found.")
+    if not full_path.is_file():
+        raise Http404("Not found.")
+    content_type, _ = mimetypes.guess_type(full_path.name)
+    accepted = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    encoding = None
+    for name, suffix in (("br", ".br"), ("gzip", ".gz")):
+        candidate = full_path.with_name(full_path.name + suffix)
+        if re.search(rf"\b{name}\b", accepted) and candidate.is_file():
+            full_path, encoding = candidate, name
+            break
+    response = FileResponse(
+        full_path.open("rb"), content_type=content_type or "application/octet-stream"
+    )
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL
+        if path in staticfiles_storage.hashed_names
+        else MUTABLE_CACHE_CONTROL
+    )
+    return response
+
+
+# Rules that apply whatever markup a page has.
+_ALWAYS_KEPT_AT_RULES = ("@font-face", "@keyframes", "@-webkit-keyframes", "@charset")
+_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_NOT = re.compile(r":not\([^)]*\)")
+_CLASS_ATTRIBUTE = re.compile(r"""class\s*=\s*["']([^"']*)["']""")
+
+
+def used_classes(template_dirs):
+    """Returns every class named in a class="..." attribute of the templates."""
+    classes = set()
+    for directory in template_dirs:
+        for path in Path(directory).rglob("*.html"):
+            for value in _CLASS_ATTRIBUTE.findall(path.read_text(encoding="utf-8")):
+                # Template tags inside the attribute may name classes too.
+                classes.update(re.findall(r"[\w-]+", value))
+    return classes
+
+
+def _split_blocks(css):
+    """Yields (prelude, body) for each top-level rule of a stylesheet."""
+    depth, start, prelude_end = 0, 0, None
+    for index, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude_end = index
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                yield css[start:prelude_end].strip(), css[prelude_end + 1 : index]
+                start = index + 1
+        elif char == ";" and depth == 0:
+            # Statement at-rules such as @import or @charset.
+            yield css[start : index + 1].strip(), None
+            start = index + 1
+
+
+def _split_selectors(prelude):
+    """Splits a selector list on the commas that are not inside parentheses."""
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _selector_used(selector, classes):
+    return all(name in classes for name in _CLASS.findall(_NOT.sub("", selector)))
+
+
+def purge_css(css, classes):
+    """Returns css without the rules whose selectors need classes not in use.
+
+    A selector is kept when every class it requires is in classes; selectors
+    with no classes (element rules, :root) are always kept.
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    output = []
+    for prelude, body in _split_blocks(css):
+        if body is None:
+            output.append(prelude)
+        elif prelude.startswith(_ALWAYS_KEPT_AT_RULES):
+            output.append(f"{prelude}{{{body}}}")
+        elif prelude.startswith("@"):
+            inner = purge_css(body, classes)
+            if inner:
+                output.append(f"{prelude}{{{inner}}}")
+        else:
+            selectors = [
+                selector
+                for selector in _split_selectors(prelude)
+                if _selector_used(selector, classes)
+            ]
+            if selectors:
+                output.append(f"{','.join(selectors)}{{{body}}}")
+    return "".join(output)
@@ -0,0 +1,110 @@
+"""Fragment caching keyed by version counters.
+
+Every cached fragment depends on one or more scopes, such as a lawyer's list
+of matters or a single matter. Each scope has a version number in the cache
+and the fragment key embeds the current versions, so a model signal only has
+to bump a counter to invalidate every fragment built from that scope: O(1),
+with the stale entries left to expire on their own.
+
+Bumps wait for the writer's transaction to commit. A reader that renders
+before then still sees the old rows, and would otherwise cache them under
+the new version, where they would stay.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .routers import from_primary
+
+HITS_KEY = "fragments:hits"
+MISSES_KEY = "fragments:misses"
+
+
+def get_cache():
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    name, ident = scope
+    return f"fragments:version:{name}:{ident}"
+
+
+def current_versions(scopes):
+    """Returns the version of each scope, creating any that are missing."""
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            # Starting from the clock rather than 1 means a version that was
+            # evicted never reuses a number an old fragment was stored under.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump(*scopes):
+    """Invalidates every fragment that depends on any of the scopes.
+
+    Inside a transaction this happens when it commits, and not at all if it
+    rolls back; outside one, straight away.
+    """
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def _count(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cached_fragment(name, parts, scopes, render):
+    """Returns render()'s output, from the cache when the scopes are unchanged.
+
+    name and parts identify the fragment (e.g. a page cursor); scopes are the
+    (name, id) pairs whose version bumps must invalidate it.
+    """
+    versions = current_versions(scopes)
+    digest = hashlib.md5(repr((parts, versions)).encode()).hexdigest()
+    key = f"fragments:{name}:{digest}"
+    cache = get_cache()
+    html = cache.get(key)
+    if html is None:
+        _count(MISSES_KEY)
+        with from_primary():
+            html = render()
+        cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+    else:
+        _count(HITS_KEY)
+    return html
+
+
+def stats():
+    """Returns the fragment cache hit and miss counts shared by all workers."""
+    counts = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+    }
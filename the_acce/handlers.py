@@ -0,0 +1,71 @@
+"""Django's ASGI handler, with streaming responses read off the event loop.
+
+Django 3.2 iterates a StreamingHttpResponse on the event loop. A generator
+that queries the database as it goes, such as an export's (see
+the_acce/exports.py), then raises SynchronousOnlyOperation after the
+headers are out, and the download stops part way. ASGIHandler instead reads
+each chunk of the response in the thread that sync views run in, one
+thread hop per chunk_size bytes rather than per line.
+"""
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+
+def read_chunk(parts, size):
+    """Returns at least size bytes from the iterator parts, or what is left.
+
+    An empty result means parts is exhausted.
+    """
+    chunk, length = [], 0
+    for part in parts:
+        chunk.append(part)
+        length += len(part)
+        if length >= size:
+            break
+    return b"".join(chunk)
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": self.response_headers(response),
+            }
+        )
+        # Iterate the response itself, not streaming_content, as Django does.
+        parts = iter(response)
+        read = sync_to_async(read_chunk, thread_sensitive=True)
+        while True:
+            chunk = await read(parts, self.chunk_size)
+            if not chunk:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    def response_headers(self, response):
+        """Returns the response's headers and cookies as ASGI header pairs."""
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode("ascii")
+            if isinstance(value, str):
+                value = value.encode("latin1")
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append(
+                (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            )
+        return headers
+
+
+def get_asgi_application():
+    """Like django.core.asgi.get_asgi_application(), with ASGIHandler above."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
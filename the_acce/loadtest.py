@@ -0,0 +1,198 @@
+"""A small closed-loop HTTP load generator for the benchmark commands.
+
+Each worker thread keeps one persistent connection open and sends its next
+request as soon as the previous response has been read, so concurrency is
+the number of requests in flight at once.
+"""
+
+import http.client
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+# Host header sent with every request; it must be in ALLOWED_HOSTS.
+DEFAULT_HOST = "the-acce.tech"
+
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction of sorted values fall."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Returns throughput and latency percentiles (in ms) as a dict."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def run_load(
+    base_url, paths, concurrency=10, requests=1000, host=DEFAULT_HOST, headers=None
+):
+    """Sends requests round-robin over paths and returns summarize()'s dict.
+
+    Responses other than 2xx and 3xx are counted as errors.
+    """
+    headers = {**(headers or {}), "Host": host}
+    parts = urlsplit(base_url)
+    per_worker = [requests // concurrency] * concurrency
+    for index in range(requests % concurrency):
+        per_worker[index] += 1
+    latencies, errors = [], []
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(number, count):
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        mine, failed = [], 0
+        ready.wait()
+        for sent in range(count):
+            path = paths[(number + sent) % len(paths)]
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(
+                    parts.hostname, parts.port, timeout=30
+                )
+                continue
+            mine.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [
+        threading.Thread(target=worker, args=(number, count), daemon=True)
+        for number, count in enumerate(per_worker)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, sum(errors))
+
+
+def wait_for_server(base_url, timeout=20.0, host=DEFAULT_HOST):
+    """Blocks until base_url accepts connections, or raises TimeoutError."""
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(
+                parts.hostname, parts.port, timeout=2
+            )
+            connection.request("GET", "/", headers={"Host": host})
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{base_url} did not start within {timeout} seconds.")
+
+
+def free_port():
+    """Returns a TCP port that nothing is listening on right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port):
+    """Returns the command line running this project under runserver or uvicorn."""
+    if server == "wsgi":
+        return [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "runserver",
+            "--noreload",
+            f"127.0.0.1:{port}",
+        ]
+    return [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "the_acce.asgi:application",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ]
+
+
+@contextmanager
+def running_server(server):
+    """Starts a "wsgi" or "asgi" server on a free port and yields its base URL."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        server_command(server, port),
+        cwd=settings.BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(base_url)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def compare(baseline, current, threshold=0.1):
+    """Returns regressions of current against baseline benchmark results.
+
+    Both are bench_routes results. A route regresses when it runs more queries,
+    or at any shared concurrency level its p95 latency grows or its throughput
+    falls by more than threshold (a fraction).
+    """
+    regressions = []
+    for path, before in baseline["routes"].items():
+        after = current["routes"].get(path)
+        if after is None:
+            continue
+        if (after["queries"] or 0) > (before["queries"] or 0):
+            regressions.append(
+                f"{path}: {before['queries']} -> {after['queries']} queries"
+            )
+        for level, old in before["levels"].items():
+            new = after["levels"].get(level)
+            if new is None:
+                continue
+            if old["p95_ms"] and new["p95_ms"] > old["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{path} at {level}: p95 {old['p95_ms']:.2f} -> "
+                    f"{new['p95_ms']:.2f} ms"
+                )
+            if new["rps"] < old["rps"] * (1 - threshold):
+                regressions.append(
+                    f"{path} at {level}: {old['rps']:.1f} -> {new['rps']:.1f} req/s"
+                )
+    return regressions
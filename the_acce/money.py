@@ -0,0 +1,298 @@
+"""Amounts of money, stored as whole minor units of a currency.
+
+Fees and budgets used to be DecimalField(max_digits=6, decimal_places=2)
+columns: capped at 9999.99, and every total a round trip through Decimal
+(SQLite even sums decimals as floats, so totals had to be rounded back).
+A MoneyField is a BIGINT holding a count of its currency's minor units,
+cents for USD, so sums and comparisons are exact integer arithmetic in the
+database and amounts run to 92 quadrillion cents.
+
+In Python an amount is a Money: immutable, hashable and exact. Amounts in
+the same currency add, subtract and compare; they multiply by whole numbers
+only, since anything else needs rounding the caller should choose. str()
+gives the decimal form, "150.00", so templates and exports show amounts as
+they always have.
+
+A column's currency is fixed, settings.DEFAULT_CURRENCY unless given.
+Assigning a Decimal, string or int to a MoneyField converts it to Money,
+and lookups take the same: numbers are whole units of the currency, so
+filter(amount__gt=100) means more than 100.00. Fractions of a minor unit
+are refused rather than rounded.
+"""
+
+from decimal import Decimal, InvalidOperation
+from functools import total_ordering
+
+from django import forms
+from django.conf import settings
+from django.core import exceptions
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.translation import gettext_lazy as _
+
+# Currencies whose minor unit isn't a hundredth, by ISO 4217 code.
+MINOR_DIGITS = {
+    "BHD": 3,
+    "CLP": 0,
+    "IQD": 3,
+    "ISK": 0,
+    "JOD": 3,
+    "JPY": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "OMR": 3,
+    "TND": 3,
+    "UGX": 0,
+    "VND": 0,
+}
+
+# The range of a BIGINT.
+MINOR_MIN = -(2**63)
+MINOR_MAX = 2**63 - 1
+
+_new = object.__new__
+_set = object.__setattr__
+
+
+def minor_digits(currency):
+    """Returns how many decimal places a currency's minor unit has."""
+    return MINOR_DIGITS.get(currency, 2)
+
+
+@total_ordering
+class Money:
+    """An exact amount of money: an int of minor units and a currency code."""
+
+    __slots__ = ("minor", "currency")
+
+    def __init__(self, minor, currency=None):
+        if type(minor) is not int:
+            raise TypeError(f"Minor units must be an int, not {minor!r}.")
+        _set(self, "minor", minor)
+        _set(self, "currency", currency or settings.DEFAULT_CURRENCY)
+
+    @classmethod
+    def _make(cls, minor, currency):
+        """Returns Money without checking its arguments, for loading rows."""
+        money = _new(cls)
+        _set(money, "minor", minor)
+        _set(money, "currency", currency)
+        return money
+
+    @classmethod
+    def of(cls, amount, currency=None):
+        """Returns an amount in whole units (a Decimal, str or number) as Money.
+
+        Raises ValueError if amount isn't a number, or has more decimal places
+        than the currency's minor unit.
+        """
+        currency = currency or settings.DEFAULT_CURRENCY
+        if isinstance(amount, Money):
+            if amount.currency != currency:
+                raise ValueError(f"{amount!r} is not in {currency}.")
+            return amount
+        if isinstance(amount, float):
+            # The shortest repr, so 0.1 is 0.1 and not its binary neighbour.
+            amount = repr(amount)
+        try:
+            amount = Decimal(amount)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f"{amount!r} is not an amount of money.")
+        if not amount.is_finite():
+            raise ValueError(f"{amount} is not an amount of money.")
+        minor = amount.scaleb(minor_digits(currency))
+        if minor != minor.to_integral_value():
+            raise ValueError(f"{amount} is a fraction of a {currency} minor unit.")
+        return cls(int(minor), currency)
+
+    @property
+    def amount(self):
+        """Returns the amount in whole units, as an exact Decimal."""
+        return Decimal(self.minor).scaleb(-minor_digits(self.currency))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Money is immutable.")
+
+    def __reduce__(self):
+        return self.__class__, (self.minor, self.currency)
+
+    def __str__(self):
+        # Formatting the int is quicker than making a Decimal to print.
+        places = MINOR_DIGITS.get(self.currency, 2)
+        if not places:
+            return str(self.minor)
+        whole, part = divmod(abs(self.minor), 10**places)
+        return "%s%d.%0*d" % ("-" if self.minor < 0 else "", whole, places, part)
+
+    def __repr__(self):
+        return f"Money.of('{self}', '{self.currency}')"
+
+    def __format__(self, format_spec):
+        return format(self.amount, format_spec)
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def _minor_of(self, other):
+        if other.currency != self.currency:
+            raise ValueError(f"Can't combine {self.currency} with {other.currency}.")
+        return other.minor
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.currency == other.currency and self.minor == other.minor
+
+    def __lt__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor < self._minor_of(other)
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor + self._minor_of(other), self.currency)
+
+    def __radd__(self, other):
+        # Lets sum() start from 0.
+        if isinstance(other, int) and other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.minor - self._minor_of(other), self.currency)
+
+    def __mul__(self, other):
+        if isinstance(other, bool) or not isinstance(other, int):
+            return NotImplemented
+        return Money(self.minor * other, self.currency)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Money(abs(self.minor), self.currency)
+
+
+def validate_not_negative(value):
+    if value is not None and value.minor < 0:
+        raise exceptions.ValidationError(
+            _("Ensure this value is greater than or equal to 0."), code="min_value"
+        )
+
+
+def validate_storable(value):
+    """Refuses amounts too large for a BIGINT of minor units."""
+    if value is not None and not MINOR_MIN <= value.minor <= MINOR_MAX:
+        raise exceptions.ValidationError(
+            _("Ensure this amount is less than %(limit)s."),
+            code="max_value",
+            params={"limit": Money(MINOR_MAX, value.currency)},
+        )
+
+
+class MoneyAttribute(DeferredAttribute):
+    """Converts what is assigned to a MoneyField's attribute to Money.
+
+    A value that doesn't convert is kept as it is, for full_clean() to
+    report, as with other fields.
+    """
+
+    def __set__(self, instance, value):
+        try:
+            value = self.field.to_python(value)
+        except exceptions.ValidationError:
+            pass
+        instance.__dict__[self.field.attname] = value
+
+
+class MoneyFormField(forms.DecimalField):
+    """A DecimalField whose initial value may be Money, as a model gives it."""
+
+    def prepare_value(self, value):
+        return value.amount if isinstance(value, Money) else value
+
+    def has_changed(self, initial, data):
+        # Money never equals the Decimal the field cleans to.
+        return super().has_changed(self.prepare_value(initial), data)
+
+
+class MoneyField(models.Field):
+    """An amount of money, stored as a BIGINT of minor units."""
+
+    description = _("Amount of money, in minor units of a currency")
+    descriptor_class = MoneyAttribute
+    default_validators = [validate_storable]
+    default_error_messages = {
+        "invalid": _("“%(value)s” is not an amount of %(currency)s."),
+    }
+
+    def __init__(self, *args, currency=None, **kwargs):
+        self._currency = currency
+        super().__init__(*args, **kwargs)
+
+    @property
+    def currency(self):
+        return self._currency or settings.DEFAULT_CURRENCY
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self._currency is not None:
+            kwargs["currency"] = self._currency
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return "BigIntegerField"
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return Money.of(value, self.currency)
+        except ValueError:
+            raise exceptions.ValidationError(
+                self.error_messages["invalid"],
+                code="invalid",
+                params={"value": value, "currency": self.currency},
+            )
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        if type(value) is not int:
+            # Sums come back as Decimal on PostgreSQL, and averages as floats.
+            value = round(value)
+        return Money._make(value, self._currency or settings.DEFAULT_CURRENCY)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return self.to_python(value).minor
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return None if value is None else str(value)
+
+    def formfield(self, **kwargs):
+        return super().formfield(
+            **{
+                "form_class": MoneyFormField,
+                "max_digits": None,
+                "decimal_places": minor_digits(self.currency),
+                **kwargs,
+            }
+        )
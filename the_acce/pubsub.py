@@ -0,0 +1,214 @@
+"""In-process publish/subscribe, with a pluggable backend between processes.
+
+Subscribers are asyncio consumers, such as the event streams of
+the_acce/sse.py, and publishers may run in any thread, such as a sync view
+saving a model. Each process has one Broker holding its subscriptions by
+channel. Its backend, chosen by settings.PUBSUB_BACKEND, carries published
+messages to the brokers that deliver them:
+
+* LocalBackend, the default, to this process only: enough for one ASGI
+  worker, or for trying things out;
+* RedisBackend to every process using the Redis server at PUBSUB_LOCATION,
+  so a change saved by any worker reaches subscribers on all of them. It
+  needs the redis package.
+
+Messages are strings. Every subscription has a queue of SSE_QUEUE_SIZE
+messages; a subscriber that falls that far behind is not waited for but
+dropped, its subscription closed as overflowed. A slow reader therefore
+never holds up publishers or makes the process buffer without bound.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+# What Subscription.get() returns once the subscription has ended.
+CLOSED = object()
+
+
+class Subscription:
+    """Messages published on some channels, for one consumer on one loop.
+
+    Create it with subscribe() from a coroutine. Only the loop that created
+    it may call its methods.
+    """
+
+    def __init__(self, broker, channels, size):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+        self.closed = False
+        self.overflowed = False
+
+    def put(self, message):
+        if self.closed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            self.close()
+        else:
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Returns the next message, CLOSED, or None after timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        """Ends the subscription, dropping messages not yet read."""
+        if self.closed:
+            return
+        self.closed = True
+        self.broker.unsubscribe(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSED)
+
+
+def _put_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.put(message)
+
+
+class Broker:
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, channels, size=None):
+        subscription = Subscription(self, channels, size or settings.SSE_QUEUE_SIZE)
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions[channel].add(subscription)
+        self.backend.listen(self.deliver)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.subscriptions[channel]
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(set().union(*self.subscriptions.values()))
+
+    def publish(self, channel, message):
+        self.backend.publish(channel, message)
+
+    def deliver(self, channel, message):
+        """Hands a message to this process's subscribers of channel.
+
+        Safe to call from any thread. Wakes each subscriber's loop once,
+        however many of its subscriptions the message is for. Returns the
+        number of subscriptions it was handed to.
+        """
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_put_all, group, message)
+            except RuntimeError:
+                # The loop has closed; its subscriptions went with it.
+                pass
+        return len(subscriptions)
+
+
+class LocalBackend:
+    """Delivers messages to subscribers in this process only."""
+
+    def __init__(self, location=""):
+        self.deliver = None
+
+    def listen(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel, message):
+        if self.deliver is not None:
+            self.deliver(channel, message)
+
+
+class RedisBackend:
+    """Delivers messages to subscribers in every process sharing a Redis.
+
+    A thread per process, started with its first subscription, listens on
+    all channels under one prefix. Messages published while it reconnects
+    are lost, as with any Redis pub/sub.
+    """
+
+    prefix = "the_acce:"
+    # Seconds between attempts to reconnect the listener.
+    retry_seconds = 1
+
+    def __init__(self, location=""):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                "RedisBackend needs the redis package: pip install redis"
+            )
+        self.errors = (redis.ConnectionError, redis.TimeoutError)
+        self.client = redis.Redis.from_url(location or "redis://localhost:6379/0")
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def listen(self, deliver):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self.relay, args=(deliver,), daemon=True
+                )
+                self.listener.start()
+
+    def relay(self, deliver):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{self.prefix}*")
+                for item in pubsub.listen():
+                    if item["type"] == "pmessage":
+                        channel = item["channel"].decode()[len(self.prefix) :]
+                        deliver(channel, item["data"].decode())
+            except self.errors:
+                time.sleep(self.retry_seconds)
+
+    def publish(self, channel, message):
+        self.client.publish(f"{self.prefix}{channel}", message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Returns this process's Broker, creating it on first use."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            backend = import_string(settings.PUBSUB_BACKEND)
+            _broker = Broker(backend(settings.PUBSUB_LOCATION))
+        return _broker
+
+
+def publish(channel, message):
+    get_broker().publish(channel, message)
+
+
+def subscribe(channels, size=None):
+    """Returns a Subscription to channels. Call it from a coroutine."""
+    return get_broker().subscribe(channels, size)
@@ -0,0 +1,174 @@
+"""Read replicas: reads from a replica, writes to the primary database.
+
+Reads of models in REPLICA_ROUTED_APPS go to one of DATABASE_REPLICAS, so
+overview and report pages stop competing with writes on the primary.
+Replicas lag behind, so whoever writes is pinned to the primary and reads
+their own writes: for the rest of the request (or, outside requests, the
+rest of the context), and for REPLICA_STICKY_SECONDS after it through a
+cookie set by ReplicaStickinessMiddleware. Caches that writes invalidate
+are filled from the primary, see from_primary().
+"""
+
+import asyncio
+import math
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+# Holds until when, as a Unix time, a client reads from the primary.
+STICKY_COOKIE = "primary_until"
+
+_state = ContextVar("replica_routing", default=None)
+
+
+class RoutingState:
+    """Whether the current request reads from the primary, and if it wrote."""
+
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+@contextmanager
+def routing(pinned=False):
+    """Routes the queries made inside the block afresh; yields its state.
+
+    pinned starts it off reading from the primary.
+    """
+    state = RoutingState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def from_primary():
+    """Reads from the primary inside the block.
+
+    For filling caches that writes invalidate: rows read from a lagging
+    replica just after a write would stay cached until the next one.
+    """
+    state = _state.get()
+    if state is None:
+        with routing(pinned=True):
+            yield
+        return
+    pinned = state.pinned
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = pinned or state.wrote
+
+
+def pin_to_primary(**kwargs):
+    """Makes the rest of the current context read from the primary.
+
+    Connected to pre_migrate in HomeConfig.ready(), as migrations read what
+    they have just written.
+    """
+    state = _state.get()
+    if state is None:
+        _state.set(RoutingState(pinned=True))
+    else:
+        state.pinned = True
+
+
+def is_routed(model):
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and model._meta.app_label in settings.REPLICA_ROUTED_APPS
+    )
+
+
+class ReplicaRouter:
+    """Sends reads of routed apps to a random replica unless pinned."""
+
+    def db_for_read(self, model, **hints):
+        if not is_routed(model):
+            return None
+        state = _state.get()
+        if state is not None and state.pinned:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if not is_routed(model):
+            return None
+        # Outside a request this pins the rest of the context.
+        pin_to_primary()
+        _state.get().wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so rows from any of them relate.
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+def pinned_by_cookie(request):
+    """Returns whether the client wrote within the last sticky window."""
+    try:
+        until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+    now = time.time()
+    # A value further ahead than one window was not set by us.
+    return now < until <= now + settings.REPLICA_STICKY_SECONDS
+
+
+def stick(response):
+    """Pins the client to the primary for the next REPLICA_STICKY_SECONDS."""
+    seconds = settings.REPLICA_STICKY_SECONDS
+    # Rounded down: rounding up could put it past the window it checks.
+    until = math.floor((time.time() + seconds) * 1000) / 1000
+    response.set_cookie(
+        STICKY_COOKIE,
+        f"{until:.3f}",
+        max_age=seconds,
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+@sync_and_async_middleware
+def ReplicaStickinessMiddleware(get_response):
+    """Routes each request afresh and pins clients that write to the primary.
+
+    Install it before any middleware that reads routed models.
+    """
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with routing(pinned_by_cookie(request)) as state:
+                response = await get_response(request)
+            if state.wrote:
+                stick(response)
+            return response
+
+    else:
+
+        def middleware(request):
+            with routing(pinned_by_cookie(request)) as state:
+                response = get_response(request)
+            if state.wrote:
+                stick(response)
+            return response
+
+    return middleware
@@ -56,11 +56,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers the rest of the stack; see the_acce/timing.py.
+    "the_acce.timing.ServerTimingMiddleware",
+    # Before anything that reads matters, negotiations or accounts; see
+    # the_acce/routers.py.
+    "the_acce.routers.ReplicaStickinessMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Lazy request.account, see accounts/profiles.py.
+    "accounts.middleware.AccountMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -69,7 +76,8 @@ ROOT_URLCONF = "the_acce.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates plus render timing for the Server-Timing header.
+        "BACKEND": "the_acce.timing.TimedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -101,6 +109,112 @@ DATABASES = {
     }
 }
 
+# Read replicas of "default", comma separated: hosts, or files for SQLite
+# (copied from the primary by manage.py sync_sqlite_replicas). Reads of the
+# apps below go to them and writes to the primary, see the_acce/routers.py.
+for number, replica in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(",")), 1):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "NAME" if "sqlite" in (DATABASES["default"]["ENGINE"] or "") else "HOST": replica.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["the_acce.routers.ReplicaRouter"]
+REPLICA_ROUTED_APPS = ["matters", "negotiations", "accounts"]
+# Seconds a client keeps reading from the primary after it writes, enough
+# for replicas to catch up so it sees its own changes.
+REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory by default. For a cache shared by every worker, set
+# CACHE_BACKEND in .env, e.g. django.core.cache.backends.filebased.FileBasedCache
+# with CACHE_LOCATION=/var/tmp/the_acce, or django_redis.cache.RedisCache with
+# CACHE_LOCATION=redis://127.0.0.1:6379/1.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Cache alias and lifetime (seconds) of rendered overview fragments, see
+# the_acce/cache.py. Invalidation is by version bump, so this only bounds
+# how long superseded fragments occupy the cache.
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", 60 * 60))
+
+# Cache alias and lifetime (seconds) of request.account, see
+# accounts/profiles.py. Changes expire entries at once; this bounds staleness
+# only for writes that bypass model signals, such as queryset.update().
+ACCOUNT_CACHE_ALIAS = "default"
+ACCOUNT_CACHE_TIMEOUT = int(os.getenv("ACCOUNT_CACHE_TIMEOUT", 5 * 60))
+# Account keys each process remembers the user id of, for profile pages.
+ACCOUNT_KEY_LRU_SIZE = int(os.getenv("ACCOUNT_KEY_LRU_SIZE", 10000))
+
+# Live updates, see the_acce/pubsub.py and the_acce/sse.py. The default
+# backend reaches event streams in the same process only; with several ASGI
+# workers set PUBSUB_BACKEND to the_acce.pubsub.RedisBackend and
+# PUBSUB_LOCATION to e.g. redis://127.0.0.1:6379/2. A stream sends a
+# heartbeat after SSE_HEARTBEAT_SECONDS without events, and is closed once
+# SSE_QUEUE_SIZE events wait for its client.
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "the_acce.pubsub.LocalBackend")
+PUBSUB_LOCATION = os.getenv("PUBSUB_LOCATION", "")
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", 64))
+
+# Due-date reminders, see matters/reminders.py: they are sent this many days
+# before a matter is due, at this hour, by manage.py send_reminders. A
+# worker has REMINDER_LEASE_SECONDS to send the ones it claimed before
+# another may claim them again.
+REMINDER_DAYS_BEFORE = [
+    int(days) for days in os.getenv("REMINDER_DAYS_BEFORE", "7,1,0").split(",")
+]
+REMINDER_HOUR = int(os.getenv("REMINDER_HOUR", 8))
+REMINDER_LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", 5 * 60))
+
+# Inactive matters last due (or started, if they have no due date) more than
+# this many days ago are moved to the archive tables by manage.py
+# archive_matters; see matters/archive.py.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 365))
+
+# Email
+# https://docs.djangoproject.com/en/3.2/topics/email/
+# Printed to the console unless EMAIL_BACKEND is set in .env, e.g. to
+# django.core.mail.backends.smtp.EmailBackend with EMAIL_HOST and EMAIL_PORT.
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 25))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "reminders@the-acce.tech")
+
+# Requests slower than this (milliseconds) log their slowest statements with
+# query plans, see the_acce/timing.py.
+SERVER_TIMING_SLOW_MS = int(os.getenv("SERVER_TIMING_SLOW_MS", 500))
+SERVER_TIMING_SLOW_QUERIES = 5
+
+# the_acce.timing logs only slow requests by default; set
+# SERVER_TIMING_LOG_LEVEL=INFO for a JSON line per request.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "the_acce.timing": {
+            "handlers": ["console"],
+            "level": os.getenv("SERVER_TIMING_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -134,12 +248,20 @@ USE_L10N = True
 
 USE_TZ = True
 
+# ISO 4217 code of the currency money fields are in, see the_acce/money.py.
+# Amounts are stored in its minor units, so changing it for a database with
+# amounts in it needs a data migration too.
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "USD")
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
 
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
+# Content-hashed names plus .gz/.br siblings; see the_acce/assets.py and
+# manage.py build_assets.
+STATICFILES_STORAGE = "the_acce.assets.CompressedManifestStaticFilesStorage"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -0,0 +1,168 @@
+"""Server-Sent Events over ASGI, for live updates without polling.
+
+Django 3.2 iterates a streaming response synchronously, which would block
+the event loop for as long as a stream stays open. Event streams are
+therefore served by EventStreams, an ASGI application wrapped around
+Django's in the_acce/asgi.py: requests for a stream's path are answered
+here and everything else is passed on to Django. An idle stream is a
+parked coroutine and a subscription, not a thread, so a worker can hold
+thousands of them.
+
+A stream sends:
+
+* each message published on its channels (see the_acce/pubsub.py), which
+  publish() formats as an event once for every subscriber;
+* a comment every SSE_HEARTBEAT_SECONDS, so proxies keep an idle connection
+  open and clients that have gone are noticed;
+* a "reset" event, before closing, to a client that fell so far behind
+  that messages were dropped. EventSource reconnects by itself, and pages
+  reload current state when they see it.
+
+Since Django's middleware doesn't run for them, streams check the session
+themselves: each route says which users may follow it, and everyone else
+is refused before anything is subscribed.
+"""
+
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+
+from . import pubsub
+
+HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    # Stops nginx buffering the stream.
+    (b"x-accel-buffering", b"no"),
+]
+# Milliseconds an EventSource waits before reconnecting.
+RETRY_MS = 5000
+HEARTBEAT = b": heartbeat\n\n"
+RESET = b"event: reset\ndata: {}\n\n"
+
+
+def format_event(data, event=None, event_id=None):
+    """Returns data (a string) as the text of one event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+def publish(channels, data, event=None, event_id=None):
+    """Publishes an event to the streams of channels."""
+    message = format_event(data, event, event_id)
+    for channel in channels:
+        pubsub.publish(channel, message)
+
+
+def allowed_host(scope):
+    """Applies Django's ALLOWED_HOSTS check to an ASGI request."""
+    headers = dict(scope["headers"])
+    domain, _ = split_domain_port(headers.get(b"host", b"").decode("latin-1"))
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = [".localhost", "127.0.0.1", "[::1]"]
+    return bool(domain) and validate_host(domain, allowed_hosts)
+
+
+def get_user(scope):
+    """Returns the user logged in by the session cookie of an ASGI request.
+
+    Goes through Django's session and auth backends, as AuthenticationMiddleware
+    would, so it returns AnonymousUser for a missing, expired or stale session.
+    """
+    headers = dict(scope["headers"])
+    cookies = parse_cookie(headers.get(b"cookie", b"").decode("latin-1"))
+    engine = import_module(settings.SESSION_ENGINE)
+    request = HttpRequest()
+    request.session = engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    return auth.get_user(request)
+
+
+def authorized(scope, allows, match):
+    return allows(get_user(scope), match)
+
+
+class EventStreams:
+    """ASGI application serving event streams, and application otherwise.
+
+    routes are (compiled pattern, channels, allows) triples: a GET whose
+    path matches a pattern streams the channels that channels(match)
+    returns, if allows(user, match) is true of the requesting user. allows
+    may query the database; it is called in a thread.
+    """
+
+    def __init__(self, application, routes):
+        self.application = application
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for route in self.routes:
+                match = route[0].match(scope["path"])
+                if match:
+                    return await self.respond(scope, receive, send, route, match)
+        return await self.application(scope, receive, send)
+
+    async def respond(self, scope, receive, send, route, match):
+        _, channels, allows = route
+        if not allowed_host(scope):
+            return await self.refuse(send, 400, b"Bad Request")
+        if scope["method"] != "GET":
+            return await self.refuse(send, 405, b"Method Not Allowed")
+        if not await sync_to_async(authorized)(scope, allows, match):
+            return await self.refuse(send, 403, b"Forbidden")
+        await self.stream(receive, send, channels(match))
+
+    async def refuse(self, send, status, reason):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.body", "body": reason})
+
+    async def stream(self, receive, send, channels):
+        subscription = pubsub.subscribe(channels)
+        watcher = subscription.loop.create_task(
+            self.close_on_disconnect(receive, subscription)
+        )
+        try:
+            await send(
+                {"type": "http.response.start", "status": 200, "headers": HEADERS}
+            )
+            await self.send_chunk(send, f"retry: {RETRY_MS}\n\n".encode())
+            while True:
+                message = await subscription.get(settings.SSE_HEARTBEAT_SECONDS)
+                if message is pubsub.CLOSED:
+                    if subscription.overflowed:
+                        await self.send_chunk(send, RESET)
+                    break
+                await self.send_chunk(
+                    send, HEARTBEAT if message is None else message.encode()
+                )
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+            subscription.close()
+
+    async def send_chunk(self, send, chunk):
+        # The server's send() waits while the client's socket is backed
+        # up, so a slow client fills its own queue rather than memory.
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def close_on_disconnect(self, receive, subscription):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        subscription.close()
@@ -0,0 +1,211 @@
+"""Per-request timing: SQL, template rendering and view time.
+
+ServerTimingMiddleware collects the numbers in a RequestTimings object held
+in a context variable, which sync_to_async carries into worker threads. A
+database execute wrapper and the TimedDjangoTemplates backend add to it
+while it is set and cost a context variable lookup otherwise. Results go
+out as a Server-Timing header and, at INFO, one JSON log line per request;
+requests slower than SERVER_TIMING_SLOW_MS log their slowest statements
+with the database's query plan as warnings. settings.LOGGING keeps the
+logger at WARNING unless SERVER_TIMING_LOG_LEVEL says otherwise.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger("the_acce.timing")
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Running totals for one request, in seconds."""
+
+    __slots__ = ("queries", "db", "template", "view_start", "slowest", "_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.view_start = None
+        # Min-heap of (duration, sequence, alias, sql, params), the slowest N.
+        self.slowest = []
+        self._depth = 0
+
+    def add_query(self, duration, alias, sql, params):
+        self.queries += 1
+        self.db += duration
+        entry = (duration, self.queries, alias, sql, params)
+        if len(self.slowest) < settings.SERVER_TIMING_SLOW_QUERIES:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each statement to the current request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(
+            time.perf_counter() - start,
+            context["connection"].alias,
+            sql,
+            None if many else params,
+        )
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Adds record_query to a connection as it opens, once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None or timings._depth:
+            # Nested renders are already inside the outer one's time.
+            return super().render(context, request)
+        timings._depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template += time.perf_counter() - start
+            timings._depth -= 1
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time added to request timings."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class ServerTimingMiddleware:
+    """Reports where each request's time went. Best placed first in MIDDLEWARE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all():
+            install_query_recorder(None, connection)
+        if asyncio.iscoroutinefunction(get_response):
+            # Lets Django call us without a thread hop, as MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+        if self.report(request, response, timings, total):
+            self.log_slow_queries(request, timings, total)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+        if self.report(request, response, timings, total):
+            # EXPLAIN needs the ORM's thread, not the event loop.
+            await sync_to_async(self.log_slow_queries)(request, timings, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_start = time.perf_counter()
+
+    def report(self, request, response, timings, total):
+        """Sets the header and logs the summary; returns whether it was slow."""
+        view = time.perf_counter() - timings.view_start if timings.view_start else 0.0
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+                f"tpl;dur={timings.template * 1000:.1f}",
+                f"view;dur={view * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "total_ms": round(total * 1000, 2),
+                        "view_ms": round(view * 1000, 2),
+                        "db_ms": round(timings.db * 1000, 2),
+                        "queries": timings.queries,
+                        "template_ms": round(timings.template * 1000, 2),
+                    }
+                )
+            )
+        return total * 1000 >= settings.SERVER_TIMING_SLOW_MS and bool(timings.slowest)
+
+    def log_slow_queries(self, request, timings, total):
+        """Logs the request's slowest statements with their query plans.
+
+        Runs only past the threshold, since EXPLAIN costs a round trip each.
+        """
+        for duration, _, alias, sql, params in sorted(timings.slowest, reverse=True):
+            logger.warning(
+                json.dumps(
+                    {
+                        "slow_request": request.path,
+                        "total_ms": round(total * 1000, 2),
+                        "query_ms": round(duration * 1000, 2),
+                        "sql": sql,
+                        "plan": explain(alias, sql, params),
+                    },
+                    default=str,
+                )
+            )
+
+
+def explain(alias, sql, params):
+    """Returns the database's plan for a SELECT, or None for other statements."""
+    if params is None or not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+    except Exception as error:  # A plan is diagnostic; never fail the request.
+        return f"EXPLAIN failed: {error}"
@@ -17,11 +17,15 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views import debug
 
+from the_acce import assets
+
 urlpatterns = [
     # Default Django project homepage
     path("debug/", debug.default_urlconf),
     # Django admin site
     path("admin/", admin.site.urls),
+    # Collected static files, with far-future caching for hashed names
+    path("static/<path:path>", assets.serve, name="static"),
     # Refers to object BASE_DIR / home/urls.py
     path('', include("home.urls")),
     path('home/', include("home.urls")),
@@ -0,0 +1,46 @@
+"""Batch validation of model business rules.
+
+A model's clean() checks one instance at a time, so validating a large set
+means building an instance for every row and calling into it. Models with a
+validate_batch() classmethod apply the same rules to columns of field
+values instead, in a single pass, and return for each row the code of the
+error clean() would raise, or None. The codes are the ones clean() raises,
+and the model's CLEAN_ERRORS maps them to its messages.
+"""
+
+from collections.abc import Mapping
+
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+
+
+def columns(data, fields):
+    """Returns the named columns of data as sequences of the same length.
+
+    data is a mapping of field name to a sequence of values (lists, tuples
+    or arrays), an iterable of row dicts such as a queryset's values(), or a
+    queryset, of which only the fields are fetched. Related fields hold ids.
+    """
+    if isinstance(data, QuerySet):
+        rows = list(data.values_list(*fields))
+        return list(zip(*rows)) if rows else [()] * len(fields)
+    if isinstance(data, Mapping):
+        values = [data[field] for field in fields]
+    else:
+        rows = data if isinstance(data, (list, tuple)) else list(data)
+        values = [[row[field] for row in rows] for field in fields]
+    if len({len(column) for column in values}) > 1:
+        raise ValueError("Columns must all have the same length.")
+    return values
+
+
+def clean_error(instance):
+    """Returns the code of the error instance.clean() raises, or None.
+
+    The one-row counterpart of validate_batch(), which must agree with it.
+    """
+    try:
+        instance.clean()
+    except ValidationError as error:
+        return error.code
+    return None